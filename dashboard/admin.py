@@ -1,25 +1,83 @@
 from django.contrib import admin
-from .models import Quiz, Question, Choice
+from django.contrib.admin.views.main import ORDER_VAR
+from django.db.models import Case, When, Value, IntegerField, Count
 
+from .models import Quiz, Question, Choice, QuestionPool, PoolDraw
+from .search import search
 
-class QuizAdmin(admin.ModelAdmin):
+
+class FullTextSearchMixin:
+    """
+    matches the admin search against the full-text index instead of
+    icontains scans, listing the best matches first
+    """
+    search_kind = None
+    search_limit = 1000
+
+    def owner_pk(self, entry):
+        return getattr(entry, f'{self.search_kind}_id')
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        pks = [self.owner_pk(entry) for entry in search(
+            search_term, self.search_limit, self.search_kind)]
+        rank = Case(
+            *[When(pk=pk, then=Value(i)) for i, pk in enumerate(pks)],
+            default=Value(len(pks)), output_field=IntegerField())
+        queryset = queryset.filter(pk__in=pks).annotate(search_rank=rank)
+        if ORDER_VAR not in request.GET:
+            # best first, unless sorted by a column
+            queryset = queryset.order_by('search_rank')
+        return queryset, False
+
+
+class PoolDrawInline(admin.TabularInline):
+    model = PoolDraw
+    extra = 1
+
+
+class QuizAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('quiz_title',)
     search_fields = ('quiz_title', 'quiz_text')
+    search_kind = 'quiz'
     ordering = ('quiz_title',)
+    # the blueprint of the quiz
+    inlines = [PoolDrawInline]
 
 
-class QuestionAdmin(admin.ModelAdmin):
+class QuestionAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('question_text',)
     search_fields = ('question_text',)
+    search_kind = 'question'
     ordering = ('question_text',)
 
 
-class ChoiceAdmin(admin.ModelAdmin):
+class ChoiceAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('choice_text',)
     search_fields = ('choice_text',)
+    search_kind = 'choice'
     ordering = ('choice_text',)
 
 
+class QuestionPoolAdmin(admin.ModelAdmin):
+    """
+    questions are added to and removed from pools with the pool_questions
+    command, which keeps their positions
+    """
+    list_display = ('name', 'no_of_questions')
+    search_fields = ('name',)
+    ordering = ('name',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            no_of_questions=Count('memberships'))
+
+    def no_of_questions(self, pool):
+        return pool.no_of_questions
+
+
 admin.site.register(Quiz, QuizAdmin)
 admin.site.register(Question, QuestionAdmin)
 admin.site.register(Choice, ChoiceAdmin)
+admin.site.register(QuestionPool, QuestionPoolAdmin)
@@ -0,0 +1,60 @@
+"""
+deep copies of quizzes.
+
+A quiz is read with two queries, its questions and its choices, and
+copied with the batched inserts of the importers, so the number of
+queries grows with the number of insert batches, not of questions.
+"""
+import random
+
+from django.db import transaction
+
+from .importers import bulk_create_questions
+from .models import Quiz, Question, Choice
+
+
+TITLE_MAX_LENGTH = Quiz._meta.get_field('quiz_title').max_length
+
+
+def copy_title(quiz):
+    return f'{quiz.quiz_title} (copy)'[:TITLE_MAX_LENGTH]
+
+
+def clone_quiz(quiz, quiz_title=None, no_of_questions=None, shuffle=False,
+               seed=None):
+    """
+    copies a quiz with its questions and choices, returning the copy.
+
+    `no_of_questions` copies a random subset of that many questions and
+    `shuffle` copies the questions and their choices in a random order.
+    Both draw from random.Random(seed).
+    """
+    items = {
+        question_pk: {'question_text': question_text, 'choices': []}
+        for question_pk, question_text in Question.objects.filter(
+            quiz=quiz).order_by('pk').values_list('pk', 'question_text')
+    }
+    for question_pk, choice_text, mark in Choice.objects.filter(
+            question__quiz=quiz).order_by('pk').values_list(
+            'question_id', 'choice_text', 'mark'):
+        items[question_pk]['choices'].append((choice_text, mark))
+    items = list(items.values())
+
+    rng = random.Random(seed)
+    if no_of_questions is not None and no_of_questions < len(items):
+        # sample keeps the order of the quiz unless shuffled below
+        picked = sorted(rng.sample(range(len(items)), no_of_questions))
+        items = [items[i] for i in picked]
+    if shuffle:
+        rng.shuffle(items)
+        for item in items:
+            rng.shuffle(item['choices'])
+
+    with transaction.atomic():
+        copy = Quiz.objects.create(
+            quiz_title=quiz_title or copy_title(quiz),
+            quiz_text=quiz.quiz_text,
+            duration=quiz.duration,
+        )
+        bulk_create_questions(copy, items)
+    return copy
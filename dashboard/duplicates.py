@@ -0,0 +1,225 @@
+"""
+near-duplicate questions, found with MinHash and locality sensitive
+hashing (LSH).
+
+A question text is normalised to its lowercase words and cut into
+overlapping SHINGLE_SIZE character shingles. Its MinHash signature holds
+NUM_HASHES minimum hashes of the shingles, taken with one permutation
+hashing so every shingle is hashed once; two signatures agree at a
+position with a chance close to the Jaccard similarity of the shingle
+sets. The signature is cut into BANDS bands of ROWS values and every
+band is hashed, with its number, into one QuestionBand bucket.
+Questions sharing a bucket are candidates, which costs indexed lookups
+instead of a scan of the bank, and candidates are kept when their exact
+similarity is at least SIMILARITY.
+
+With 8 bands of 4 rows, questions 80% alike share a bucket 98% of the
+time, those 70% alike 89%, those 50% alike 40% and those 30% alike 6%.
+
+The buckets of a question are saved by the signals of this app and by
+the bulk inserts of the importers.
+"""
+import hashlib
+import re
+import struct
+import zlib
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import BooleanField, Case, Value, When
+
+from .models import Question, QuestionBand
+
+
+SHINGLE_SIZE = 5
+BANDS = 8
+ROWS = 4
+NUM_HASHES = BANDS * ROWS
+SIMILARITY = 0.75
+MAX_CANDIDATES = 100
+# the questions of a bucket compared with each other, the oldest first
+MAX_BUCKET_SIZE = 100
+WORD = re.compile(r'\w+')
+
+# shingles are hashed to 64 bits with crc32 and a multiplicative mix, so
+# the buckets saved by one process are those computed by the next
+MIX = 0x9E3779B97F4A7C15
+BIN_BITS = 5
+VALUE_BITS = 64 - BIN_BITS
+if NUM_HASHES != 1 << BIN_BITS:
+    raise ImproperlyConfigured(
+        f'BANDS * ROWS must be {1 << BIN_BITS}, one hash per bin, not {NUM_HASHES}')
+
+
+def shingles(text):
+    """the set of character shingles of the words of a text"""
+    text = ' '.join(WORD.findall(text.lower()))
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def similarity(a, b):
+    """the Jaccard similarity of two shingle sets"""
+    if not a or not b:
+        return 0
+    return len(a & b) / len(a | b)
+
+
+def signature(shingle_set):
+    """
+    the MinHash signature of a shingle set, with one hash per shingle:
+    the top bits of the hash pick the position it counts for. Positions
+    no shingle fell into borrow the value of the next filled one.
+    """
+    minhashes = [None] * NUM_HASHES
+    for shingle in shingle_set:
+        value = (zlib.crc32(shingle.encode()) * MIX) & 0xFFFFFFFFFFFFFFFF
+        position = value >> VALUE_BITS
+        value &= (1 << VALUE_BITS) - 1
+        if minhashes[position] is None or value < minhashes[position]:
+            minhashes[position] = value
+    filled = [position for position, value in enumerate(minhashes) if value is not None]
+    for position in range(NUM_HASHES):
+        if minhashes[position] is None:
+            borrowed = next(
+                (filled_position for filled_position in filled
+                 if filled_position > position), filled[0] + NUM_HASHES)
+            # the distance keeps borrowed values apart from filled ones
+            minhashes[position] = (
+                minhashes[borrowed % NUM_HASHES]
+                + ((borrowed - position) << VALUE_BITS))
+    return minhashes
+
+
+def buckets(text):
+    """the LSH bucket of each band of the signature of a text"""
+    shingle_set = shingles(text)
+    if not shingle_set:
+        return []
+    minhashes = signature(shingle_set)
+    return [
+        int.from_bytes(hashlib.blake2b(
+            struct.pack(f'>B{ROWS}Q', band, *minhashes[band * ROWS:(band + 1) * ROWS]),
+            digest_size=8).digest(), 'big', signed=True)
+        for band in range(BANDS)
+    ]
+
+
+##### indexing #####
+
+def save_bands(question, created=False):
+    """saves the buckets of one question, replacing the old ones"""
+    if not created:
+        QuestionBand.objects.filter(question_id=question.pk).delete()
+    index_bands([question])
+
+
+def index_bands(questions):
+    """
+    creates the buckets of questions saved without signals, with one
+    executemany() rather than a model instance per bucket
+    """
+    rows = [
+        (question.pk, bucket)
+        for question in questions
+        for bucket in buckets(question.question_text)
+    ]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {QuestionBand._meta.db_table} (question_id, bucket) VALUES (%s, %s)',
+            rows)
+
+
+def rebuild_bands():
+    """recreates the buckets of every question"""
+    QuestionBand.objects.all().delete()
+    index_bands(Question.objects.only('pk', 'question_text').iterator())
+
+
+##### lookups #####
+
+def find_duplicates(text, exclude_pk=None, limit=5):
+    """
+    returns the questions of the bank most like `text`, most alike first,
+    each with its `similarity` and quiz selected
+    """
+    text_shingles = shingles(text)
+    # however many questions share a bucket, only the oldest
+    # MAX_CANDIDATES are read
+    candidates = QuestionBand.objects.filter(
+        bucket__in=buckets(text)).exclude(question_id=exclude_pk).order_by(
+        'question_id').values('question_id').distinct()[:MAX_CANDIDATES]
+    duplicates = []
+    for question in Question.objects.filter(
+            pk__in=candidates).select_related('quiz'):
+        question.similarity = similarity(text_shingles, shingles(question.question_text))
+        if question.similarity >= SIMILARITY:
+            duplicates.append(question)
+    duplicates.sort(key=lambda question: (-question.similarity, question.pk))
+    return duplicates[:limit]
+
+
+def duplicate_pairs(questions=None):
+    """
+    yields (question pk, pk of an older like question, similarity) for
+    the pairs of questions sharing a bucket. Only the oldest
+    MAX_BUCKET_SIZE questions of a bucket are compared with each other,
+    so a crowded bucket costs a bounded number of comparisons. Only pairs
+    with one of `questions` are looked at if given, else the whole bank.
+    """
+    bands = QuestionBand.objects.all()
+    in_scope = Value(True, output_field=BooleanField())
+    if questions is not None:
+        bands = bands.filter(bucket__in=QuestionBand.objects.filter(
+            question__in=questions).values('bucket'))
+        in_scope = Case(
+            When(question__in=questions, then=Value(True)),
+            default=Value(False), output_field=BooleanField())
+    rows = bands.annotate(in_scope=in_scope).order_by('bucket', 'question_id').values_list(
+        'bucket', 'question_id', 'question__question_text', 'in_scope')
+    shingle_sets = {}
+    pairs = set()
+    bucket = None
+    members = []
+    for row_bucket, question_pk, question_text, question_in_scope in rows.iterator():
+        if row_bucket != bucket:
+            bucket = row_bucket
+            members = []
+        if len(members) >= MAX_BUCKET_SIZE:
+            continue
+        if question_pk not in shingle_sets:
+            shingle_sets[question_pk] = shingles(question_text)
+        for like_pk, like_in_scope in members:
+            if (question_pk, like_pk) in pairs:
+                continue
+            if not (question_in_scope or like_in_scope):
+                continue
+            pairs.add((question_pk, like_pk))
+            alike = similarity(shingle_sets[question_pk], shingle_sets[like_pk])
+            if alike >= SIMILARITY:
+                yield question_pk, like_pk, alike
+        members.append((question_pk, question_in_scope))
+
+
+def duplicate_clusters(pairs):
+    """groups like questions into clusters of question pks, biggest first"""
+    parent = {}
+
+    def root(pk):
+        parent.setdefault(pk, pk)
+        while parent[pk] != pk:
+            parent[pk] = parent[parent[pk]]
+            pk = parent[pk]
+        return pk
+
+    for a, b, _ in pairs:
+        parent[root(a)] = root(b)
+    clusters = {}
+    for pk in parent:
+        clusters.setdefault(root(pk), []).append(pk)
+    return sorted(
+        (sorted(cluster) for cluster in clusters.values()),
+        key=lambda cluster: (-len(cluster), cluster[0]))
@@ -0,0 +1,72 @@
+"""
+streaming exports of results.
+
+Rows are read with QuerySet.iterator() a chunk at a time and written to
+the response as they are produced, so an export of millions of results
+never holds more than one chunk in memory.
+"""
+import csv
+import json
+
+from exam.models import Result, ArchivedResult
+
+
+EXPORT_FIELDS = (
+    ('id', 'pk'),
+    ('date', 'date'),
+    ('email', 'user__email'),
+    ('quiz_id', 'quiz_id'),
+    ('quiz', 'quiz__quiz_title'),
+    ('percentage', 'percentage'),
+    ('time_spent_seconds', 'time_spent'),
+    ('no_of_questions', 'no_of_questions'),
+    ('no_of_questions_answered', 'no_of_questions_answered'),
+    ('no_of_correct_choices_answered', 'no_of_correct_choices_answered'),
+)
+HEADER = [name for name, _ in EXPORT_FIELDS]
+
+
+def export_queryset(quiz=None, date_from=None, date_to=None):
+    """
+    the results and archived results to export as tuples of
+    EXPORT_FIELDS, with the user email and quiz title joined in, ordered
+    by pk for a stable export. The two tables never share a pk.
+    """
+    filters = {}
+    if quiz:
+        filters['quiz_id'] = quiz
+    if date_from:
+        filters['date__gte'] = date_from
+    if date_to:
+        filters['date__lte'] = date_to
+    lookups = [lookup for _, lookup in EXPORT_FIELDS]
+    results = Result.objects.filter(**filters).values_list(*lookups)
+    archived = ArchivedResult.objects.filter(**filters).values_list(*lookups)
+    return results.union(archived, all=True).order_by('id')
+
+
+def export_rows(queryset, chunk_size=2000):
+    for row in queryset.iterator(chunk_size=chunk_size):
+        row = list(row)
+        row[1] = row[1].isoformat()
+        row[6] = int(row[6].total_seconds())
+        yield row
+
+
+class Echo:
+    """a file-like object csv.writer can write to, returning each line"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(HEADER)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(HEADER, row)), separators=(',', ':')) + '\n'
@@ -1,5 +1,5 @@
 from django import forms
-from django.forms import BaseFormSet
+from django.forms import BaseFormSet, formset_factory
 
 from .models import Quiz, Question, Choice
 
@@ -23,6 +23,18 @@ class ChoiceForm(forms.ModelForm):
         model = Choice
         fields = ['choice_text', 'mark']
 
+def validate_distinct_choices(choice_texts):
+    """checks that no two choices of a question have the same text"""
+    seen = set()
+    for choice_text in choice_texts:
+        if not choice_text:
+            continue
+        choice_text = choice_text.lower()
+        if choice_text in seen:
+            raise forms.ValidationError("choices in a question set must have distinct text.")
+        seen.add(choice_text)
+
+
 class BaseChoiceFormSet(BaseFormSet):
     def __init__(self,*args,**kwargs):        
         super().__init__(*args,**kwargs)
@@ -33,11 +45,117 @@ class BaseChoiceFormSet(BaseFormSet):
         """Checks that no two choices have the same text."""
         if any(self.errors):#Don't bother if any form has an error
             return
-        choices_text = []
-        for form in self.forms:
-            if self.can_delete and self._should_delete_form(form):
-                continue
-            choice_text = form.cleaned_data.get('choice_text').lower()
-            if choice_text in choices_text:
-                raise forms.ValidationError("choices in a question set must have distinct text.")
-            choices_text.append(choice_text)
+        validate_distinct_choices(
+            form.cleaned_data.get('choice_text') for form in self.forms
+            if not (self.can_delete and self._should_delete_form(form))
+        )
+
+
+
+ChoiceFormSet = formset_factory(ChoiceForm, extra=4, max_num=4, formset=BaseChoiceFormSet)
+
+MAX_BATCH_QUESTIONS = 50
+
+
+class QuestionBatch:
+    """
+    the forms of several questions, each with its choice formset, bound
+    and validated together so they can be saved at once. Blocks left
+    blank are skipped.
+    """
+
+    def __init__(self, data=None, no_of_questions=5):
+        QuestionFormSet = formset_factory(
+            QuestionForm, extra=no_of_questions,
+            max_num=MAX_BATCH_QUESTIONS, validate_max=True)
+        self.questions = QuestionFormSet(data, prefix='questions')
+        self.blocks = [
+            (form, ChoiceFormSet(data, prefix=f'choices-{i}'))
+            for i, form in enumerate(self.questions)
+        ]
+        self.non_form_errors = []
+        for form, choices in self.blocks:
+            # a question is required once any text of its block is filled;
+            # the marks always come with a default
+            filled = form.has_changed() or any(
+                choice['choice_text'].data for choice in choices)
+            if self.is_bound and filled:
+                form.empty_permitted = False
+            else:
+                for choice in choices:
+                    choice.empty_permitted = True
+
+    @property
+    def is_bound(self):
+        return self.questions.is_bound
+
+    def filled_blocks(self):
+        return [
+            (form, choices) for form, choices in self.blocks
+            if not form.empty_permitted
+        ]
+
+    def is_valid(self):
+        valid = self.questions.is_valid()
+        for form, choices in self.filled_blocks():
+            valid = choices.is_valid() and valid
+        if self.is_bound and not self.filled_blocks():
+            self.non_form_errors = ["please fill in at least one question."]
+            valid = False
+        return valid
+
+    def items(self):
+        """the cleaned questions with their (text, mark) choices"""
+        return [
+            {
+                'question_text': form.cleaned_data['question_text'],
+                'choices': [
+                    (choice.cleaned_data['choice_text'], choice.cleaned_data['mark'])
+                    for choice in choices
+                ],
+            }
+            for form, choices in self.filled_blocks()
+        ]
+
+class DateRangeForm(forms.Form):
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError("date_from must not be after date_to.")
+        return cleaned_data
+
+
+class ResultExportForm(DateRangeForm):
+    quiz = forms.IntegerField(required=False, min_value=1)
+    format = forms.ChoiceField(
+        choices=[('csv', 'CSV'), ('ndjson', 'NDJSON')], required=False)
+
+
+class ImportQuestionsForm(forms.Form):
+    file = forms.FileField()
+    format = forms.ChoiceField(
+        choices=[
+            ('', 'From the file extension'),
+            ('csv', 'CSV'),
+            ('json', 'JSON'),
+            ('aiken', 'Aiken'),
+            ('gift', 'GIFT'),
+        ],
+        required=False,
+    )
+
+
+class CloneQuizForm(forms.Form):
+    quiz_title = forms.CharField(
+        max_length=100, required=False,
+        help_text='the title of the copy, the title of the quiz with "(copy)" by default')
+    no_of_questions = forms.IntegerField(
+        min_value=1, required=False, label='Number of questions',
+        help_text='copy this many questions picked at random, all of them by default')
+    shuffle = forms.BooleanField(
+        required=False, help_text='shuffle the questions and choices of the copy')
@@ -0,0 +1,92 @@
+"""
+the teacher gradebook: the best and latest percentage of every student on
+every quiz, a page of students at a time.
+
+A page is built with one aggregate query over the results of its
+students and one over their archived results, and cached under the
+current results version. Saving or deleting a result, a quiz or a user
+bumps the version, so cached pages are never served stale and need no
+explicit invalidation. It also means that while an exam is being taken
+every finish bumps the version, and cached pages are hardly ever reused
+until the results stop coming in.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import F, Max, Window
+from django.db.models.functions import FirstValue
+
+from exam.models import Result, ArchivedResult
+from quizproject.versions import get_version, bump_version
+from .models import Quiz
+
+
+PAGE_SIZE = 50
+VERSION_KEY = 'dashboard:results-version'
+PAGE_TIMEOUT = 60 * 60 * 24
+
+
+def results_version():
+    return get_version(VERSION_KEY)
+
+
+def bump_results_version():
+    bump_version(VERSION_KEY)
+
+
+def pivot(student_pks):
+    """
+    returns {(student pk, quiz pk): (best, latest)} with one query per
+    table of results and archived results, the latest percentage being
+    that of the newest result by (date, id).
+    """
+    partition = [F('user_id'), F('quiz_id')]
+    newest = [F('date').desc(), F('pk').desc()]
+    cells = {}
+    for results in (Result.objects.all(), ArchivedResult.objects.all()):
+        rows = results.filter(user_id__in=student_pks).annotate(
+            best=Window(Max('percentage'), partition_by=partition),
+            latest=Window(FirstValue('percentage'), partition_by=partition, order_by=newest),
+            latest_date=Window(FirstValue('date'), partition_by=partition, order_by=newest),
+            latest_pk=Window(FirstValue('pk'), partition_by=partition, order_by=newest),
+        ).order_by().values_list(
+            'user_id', 'quiz_id', 'best', 'latest', 'latest_date', 'latest_pk').distinct()
+        for student_pk, quiz_pk, best, latest, latest_date, latest_pk in rows:
+            newest_key = (latest_date, latest_pk)
+            cell = cells.get((student_pk, quiz_pk))
+            if cell is not None:
+                best = max(best, cell[0])
+                if cell[2] > newest_key:
+                    latest, newest_key = cell[1], cell[2]
+            cells[student_pk, quiz_pk] = (best, latest, newest_key)
+    return {key: (best, latest) for key, (best, latest, _) in cells.items()}
+
+
+def build_page(page_number, per_page=PAGE_SIZE):
+    """builds a page of the gradebook, one row of cells per student"""
+    students = get_user_model().objects.filter(
+        teacher=False).order_by('email').values_list('pk', 'email')
+    paginator = Paginator(students, per_page)
+    page = paginator.get_page(page_number)
+    quizzes = list(Quiz.objects.order_by('pk').values_list('pk', 'quiz_title'))
+    students = list(page.object_list)
+    cells = pivot([student_pk for student_pk, _ in students])
+    return {
+        'quizzes': [quiz_title for _, quiz_title in quizzes],
+        'rows': [
+            (email, [cells.get((student_pk, quiz_pk)) for quiz_pk, _ in quizzes])
+            for student_pk, email in students
+        ],
+        'number': page.number,
+        'num_pages': paginator.num_pages,
+    }
+
+
+def get_page(page_number, per_page=PAGE_SIZE):
+    """returns a cached page of the gradebook, building it on a miss"""
+    key = f'dashboard:gradebook:{results_version()}:{per_page}:{page_number}'
+    gradebook = cache.get(key)
+    if gradebook is None:
+        gradebook = build_page(page_number, per_page)
+        cache.set(key, gradebook, PAGE_TIMEOUT)
+    return gradebook
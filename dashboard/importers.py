@@ -0,0 +1,380 @@
+"""
+bulk import of questions from CSV, JSON, Aiken and GIFT files.
+
+Files are read a line at a time and every question is checked with the
+rules of the question and choice forms before anything is saved. The
+valid questions are then inserted into the quiz with batched
+bulk_create in one transaction, so a bank of thousands of questions
+costs a handful of queries instead of five per question. Their search
+entries and duplicate buckets are bulk inserted as well, and questions
+like ones already in the bank, or earlier in the file, are reported.
+
+CSV    question,choice 1,choice 2,...,answer where the answer is the
+       letter, number or text of the right choice. A header row whose
+       first cell is "question" is skipped.
+JSON   an array, or one object per line, of
+       {"question": "...", "choices": ["...", ...], "answer": "B"} or
+       {"question": "...", "choices": [{"text": "...", "right": true}, ...]}
+Aiken  the question, one "A. choice" line per choice and "ANSWER: A",
+       questions separated by blank lines.
+GIFT   multiple choice questions only, "::title:: question {=right ~wrong}".
+"""
+import csv
+import json
+import re
+import string
+
+from django import forms
+from django.db import transaction
+
+from exam.grading import invalidate_answer_key
+from .duplicates import index_bands, duplicate_pairs
+from .forms import validate_distinct_choices
+from .models import Question, Choice
+from .search import index_questions, index_choices
+
+
+FORMATS = ('csv', 'json', 'aiken', 'gift')
+EXTENSIONS = {
+    '.csv': 'csv',
+    '.json': 'json',
+    '.jsonl': 'json',
+    '.ndjson': 'json',
+    '.txt': 'aiken',
+    '.aiken': 'aiken',
+    '.gift': 'gift',
+}
+BATCH_SIZE = 500
+CHOICE_TEXT_MAX_LENGTH = Choice._meta.get_field('choice_text').max_length
+
+
+class ImportFileError(ValueError):
+    """the file as a whole cannot be read, e.g. it is not valid JSON"""
+
+
+def format_of(filename):
+    """guesses the format of a file from its extension"""
+    for extension, file_format in EXTENSIONS.items():
+        if filename.lower().endswith(extension):
+            return file_format
+    return None
+
+
+def _question(line, question_text, choices):
+    return {'line': line, 'question_text': question_text, 'choices': choices}
+
+
+def _error(line, message):
+    return {'line': line, 'error': message}
+
+
+def _with_answer(line, question_text, texts, answer):
+    """
+    marks the choice named by `answer`, its letter, 1-based number or
+    text, as the right one
+    """
+    answer = str(answer).strip()
+    right = None
+    if len(answer) == 1 and answer.upper() in string.ascii_uppercase:
+        right = string.ascii_uppercase.index(answer.upper())
+    elif answer.isdigit():
+        right = int(answer) - 1
+    elif answer in texts:
+        right = texts.index(answer)
+    if right is None or not 0 <= right < len(texts):
+        return _error(line, f'the answer "{answer}" is not one of the choices.')
+    return _question(line, question_text, [
+        (text, 'right' if i == right else 'wrong') for i, text in enumerate(texts)])
+
+
+##### parsers #####
+# each parser takes an iterable of lines and yields a dict per question
+# with the line it starts on, holding either the question or its error
+
+def parse_csv(lines):
+    reader = csv.reader(lines)
+    for row in reader:
+        line = reader.line_num
+        if not any(cell.strip() for cell in row):
+            continue
+        if line == 1 and row[0].strip().lower() == 'question':
+            continue
+        if len(row) < 4:
+            yield _error(line, 'a row needs the question, two choices and the answer.')
+            continue
+        texts = [cell.strip() for cell in row[1:-1] if cell.strip()]
+        yield _with_answer(line, row[0].strip(), texts, row[-1])
+
+
+def _json_question(line, item):
+    if not isinstance(item, dict):
+        return _error(line, 'a question must be an object.')
+    question_text = str(item.get('question') or '').strip()
+    choices = item.get('choices')
+    if not isinstance(choices, list):
+        return _error(line, 'a question needs a list of choices.')
+    if choices and all(isinstance(choice, dict) for choice in choices):
+        return _question(line, question_text, [
+            (str(choice.get('text') or '').strip(),
+             'right' if choice.get('right') else 'wrong')
+            for choice in choices
+        ])
+    if 'answer' not in item:
+        return _error(line, 'a question needs the answer.')
+    texts = [str(choice).strip() for choice in choices]
+    return _with_answer(line, question_text, texts, item['answer'])
+
+
+def parse_json(lines):
+    """
+    reads a JSON array, numbering its questions from 1, or one JSON
+    object per line. Only the latter is read a line at a time.
+    """
+    lines = iter(lines)
+    line = 0
+    for text in lines:
+        line += 1
+        if text.strip():
+            break
+    else:
+        return
+    if text.lstrip().startswith('['):
+        try:
+            items = json.loads(text + ''.join(lines))
+        except ValueError as error:
+            raise ImportFileError(f'the file is not valid JSON: {error}')
+        if not isinstance(items, list):
+            raise ImportFileError('the file must hold an array of questions.')
+        for number, item in enumerate(items, 1):
+            yield _json_question(number, item)
+        return
+    while text is not None:
+        if text.strip():
+            try:
+                item = json.loads(text)
+            except ValueError:
+                yield _error(line, 'the line is not valid JSON.')
+            else:
+                yield _json_question(line, item)
+        text = next(lines, None)
+        line += 1
+
+
+AIKEN_CHOICE = re.compile(r'^([A-Z])[.)]\s+(.*)$')
+AIKEN_ANSWER = re.compile(r'^ANSWER:\s*(.*)$')
+
+
+def _blocks(lines):
+    """yields (first line, lines) of each block between blank lines"""
+    block = []
+    start = None
+    for line, text in enumerate(lines, 1):
+        text = text.rstrip('\r\n')
+        if text.strip():
+            if not block:
+                start = line
+            block.append(text)
+        elif block:
+            yield start, block
+            block = []
+    if block:
+        yield start, block
+
+
+def parse_aiken(lines):
+    for line, block in _blocks(lines):
+        question_lines = []
+        texts = []
+        answer = None
+        for text in block:
+            text = text.strip()
+            choice = AIKEN_CHOICE.match(text)
+            answer_match = AIKEN_ANSWER.match(text)
+            if answer_match:
+                answer = answer_match.group(1)
+            elif choice and string.ascii_uppercase.find(choice.group(1)) == len(texts):
+                texts.append(choice.group(2).strip())
+            elif texts:
+                # a line after the choices that is neither a choice nor
+                # the answer
+                answer = None
+                break
+            else:
+                question_lines.append(text)
+        if answer is None:
+            yield _error(line, 'a question must end with an "ANSWER: <letter>" line.')
+            continue
+        yield _with_answer(line, ' '.join(question_lines), texts, answer)
+
+
+GIFT_ESCAPE = re.compile(r'\\(.)')
+GIFT_FORMAT = re.compile(r'^\[(html|moodle|plain|markdown)\]')
+GIFT_TITLE = re.compile(r'^::(?:\\.|[^\\])*?::')
+
+
+def _split_unescaped(text, delimiters):
+    """
+    splits GIFT text before every unescaped delimiter, returning
+    (delimiter, text) pairs with '' as the delimiter of the first part
+    """
+    parts = [['', []]]
+    escaped = False
+    for character in text:
+        if escaped:
+            parts[-1][1].append('\\' + character)
+            escaped = False
+        elif character == '\\':
+            escaped = True
+        elif character in delimiters:
+            parts.append([character, []])
+        else:
+            parts[-1][1].append(character)
+    return [(delimiter, ''.join(characters)) for delimiter, characters in parts]
+
+
+def _gift_text(text):
+    return GIFT_ESCAPE.sub(r'\1', GIFT_FORMAT.sub('', text.strip())).strip()
+
+
+def parse_gift(lines):
+    for line, block in _blocks(lines):
+        block = [text for text in block if not text.lstrip().startswith('//')]
+        text = ' '.join(text.strip() for text in block)
+        if not text or text.startswith('$CATEGORY:'):
+            continue
+        parts = _split_unescaped(text, '{}')
+        if [delimiter for delimiter, _ in parts] != ['', '{', '}']:
+            yield _error(line, 'a question needs its answers in one pair of braces.')
+            continue
+        question = GIFT_TITLE.sub('', parts[0][1].strip())
+        question_text = _gift_text(' '.join(
+            part for part in (question, parts[2][1]) if part.strip()))
+        choices = []
+        for delimiter, answer in _split_unescaped(parts[1][1], '=~')[1:]:
+            answer = _split_unescaped(answer, '#')[0][1]
+            weight = re.match(r'^%(-?\d+(?:\.\d+)?)%', answer)
+            if weight:
+                answer = answer[weight.end():]
+            right = delimiter == '=' or (weight and float(weight.group(1)) == 100)
+            choices.append((_gift_text(answer), 'right' if right else 'wrong'))
+        if not any(mark == 'wrong' for _, mark in choices):
+            yield _error(line, 'only multiple choice questions can be imported.')
+            continue
+        yield _question(line, question_text, choices)
+
+
+PARSERS = {
+    'csv': parse_csv,
+    'json': parse_json,
+    'aiken': parse_aiken,
+    'gift': parse_gift,
+}
+
+
+##### validation #####
+
+def validate_question(item):
+    """returns the errors of a parsed question under the rules of the forms"""
+    if 'error' in item:
+        return [item['error']]
+    errors = []
+    if not item['question_text']:
+        errors.append('the question has no text.')
+    choices = item['choices']
+    if len(choices) < 2:
+        errors.append('a question needs at least two choices.')
+    if any(not text for text, _ in choices):
+        errors.append('a choice has no text.')
+    if any(len(text) > CHOICE_TEXT_MAX_LENGTH for text, _ in choices):
+        errors.append(
+            f'a choice is longer than {CHOICE_TEXT_MAX_LENGTH} characters.')
+    if sum(mark == 'right' for _, mark in choices) != 1:
+        errors.append('a question needs exactly one right choice.')
+    try:
+        validate_distinct_choices(text for text, _ in choices)
+    except forms.ValidationError as error:
+        errors.extend(error.messages)
+    return errors
+
+
+##### saving #####
+
+def bulk_create_questions(quiz, items, batch_size=BATCH_SIZE):
+    """
+    inserts parsed questions and their choices into a quiz with batched
+    inserts. Call it inside a transaction.
+    """
+    questions = Question.objects.bulk_create(
+        [Question(quiz=quiz, question_text=item['question_text'])
+         for item in items],
+        batch_size=batch_size,
+    )
+    if questions and questions[0].pk is None:
+        # backends without INSERT ... RETURNING (sqlite) leave the pks
+        # unset; the transaction holds the write lock, so the newest
+        # questions of the quiz are the ones just inserted
+        pks = list(Question.objects.filter(quiz=quiz).order_by(
+            '-pk').values_list('pk', flat=True)[:len(questions)])
+        for question, pk in zip(questions, reversed(pks)):
+            question.pk = pk
+    Choice.objects.bulk_create(
+        (Choice(question_id=question.pk, choice_text=text, mark=mark)
+         for question, item in zip(questions, items)
+         for text, mark in item['choices']),
+        batch_size=batch_size,
+    )
+    # bulk_create sends no signals
+    if questions:
+        first_pk = min(question.pk for question in questions)
+        index_questions(Question.objects.filter(quiz=quiz, pk__gte=first_pk))
+        index_choices(Choice.objects.filter(
+            question__quiz=quiz, question_id__gte=first_pk))
+    index_bands(questions)
+    invalidate_answer_key(quiz.pk)
+    return questions
+
+
+def import_questions(quiz, lines, file_format, partial=False,
+                     batch_size=BATCH_SIZE):
+    """
+    parses and validates every question of a file, then saves them into
+    the quiz in one transaction. Unless `partial`, nothing is saved when
+    any question has an error.
+
+    Returns the number of questions saved, a list of (line, message)
+    errors and a list of (line, question) of the saved questions that
+    look like a question of the bank, or one earlier in the file.
+    """
+    valid = []
+    errors = []
+    try:
+        for item in PARSERS[file_format](lines):
+            item_errors = validate_question(item)
+            errors.extend((item['line'], message) for message in item_errors)
+            if not item_errors:
+                valid.append(item)
+    except UnicodeDecodeError:
+        raise ImportFileError('the file is not UTF-8 encoded text.')
+    except csv.Error as error:
+        raise ImportFileError(f'the file is not valid CSV: {error}')
+    if errors and not partial:
+        return 0, errors, []
+    with transaction.atomic():
+        questions = bulk_create_questions(quiz, valid, batch_size=batch_size)
+    return len(valid), errors, _duplicates(questions, valid)
+
+
+def _duplicates(questions, items):
+    """(line, like question) of the imported questions with a duplicate"""
+    if not questions:
+        return []
+    lines = {question.pk: item['line'] for question, item in zip(questions, items)}
+    like = {}
+    imported = Question.objects.filter(quiz=questions[0].quiz, pk__gte=min(lines))
+    for pk, like_pk, _ in duplicate_pairs(imported):
+        if pk in lines:
+            like.setdefault(pk, like_pk)
+    found = Question.objects.select_related('quiz').in_bulk(set(like.values()))
+    return sorted(
+        ((lines[pk], found[like_pk]) for pk, like_pk in like.items()),
+        key=lambda duplicate: duplicate[0])
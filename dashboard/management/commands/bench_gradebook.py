@@ -0,0 +1,75 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard import gradebook
+from dashboard.models import Quiz
+from exam.benchmark import rolled_back, measure
+from exam.models import Result
+
+
+def seed_gradebook(no_of_students, no_of_quizzes):
+    """creates students with one result on every quiz"""
+    User = get_user_model()
+    Quiz.objects.bulk_create(
+        Quiz(quiz_title=f'benchmark {i}', quiz_text='benchmark')
+        for i in range(no_of_quizzes)
+    )
+    User.objects.bulk_create(
+        (User(email=f'benchmark{i}@test.com', password='!')
+         for i in range(no_of_students)),
+        batch_size=1000,
+    )
+    quiz_pks = list(Quiz.objects.filter(
+        quiz_title__startswith='benchmark ').values_list('pk', flat=True))
+    student_pks = User.objects.filter(
+        email__startswith='benchmark').values_list('pk', flat=True)
+    Result.objects.bulk_create(
+        (Result(
+            percentage=(student_pk * 7 + quiz_pk) % 101,
+            time_spent=timedelta(minutes=5),
+            date=date(2020, 1, 1) + timedelta(days=quiz_pk % 30),
+            user_id=student_pk,
+            quiz_id=quiz_pk,
+        ) for student_pk in student_pks for quiz_pk in quiz_pks),
+        batch_size=5000,
+    )
+
+
+def build_cold(page_number):
+    gradebook.bump_results_version()
+    return gradebook.get_page(page_number)
+
+
+class Command(BaseCommand):
+    help = 'Reports query count and latency of building a gradebook page'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'sizes', nargs='*', default=['5000x50'],
+            help='students x quizzes of each benchmark, e.g. 5000x50')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"students":>10} {"quizzes":>8} {"page":>6} {"cold queries":>13} '
+            f'{"cold ms":>10} {"warm queries":>13} {"warm ms":>10}')
+        for size in options['sizes']:
+            try:
+                no_of_students, no_of_quizzes = map(int, size.split('x'))
+            except ValueError:
+                raise CommandError(f'{size} is not students x quizzes')
+            with rolled_back():
+                seed_gradebook(no_of_students, no_of_quizzes)
+                last_page = -(-no_of_students // gradebook.PAGE_SIZE)
+                for page_number in (1, last_page):
+                    cold_queries, cold_ms = measure(
+                        build_cold, page_number, repeat=options['repeat'])
+                    warm_queries, warm_ms = measure(
+                        gradebook.get_page, page_number, repeat=options['repeat'])
+                    self.stdout.write(
+                        f'{no_of_students:>10} {no_of_quizzes:>8} {page_number:>6} '
+                        f'{cold_queries:>13} {cold_ms:>10.2f} '
+                        f'{warm_queries:>13} {warm_ms:>10.2f}')
+            gradebook.bump_results_version()
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from dashboard.duplicates import duplicate_clusters, duplicate_pairs, rebuild_bands
+from dashboard.models import Question
+
+
+class Command(BaseCommand):
+    help = 'Reports the clusters of near-duplicate questions of the whole bank'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='recompute the buckets of every question first')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            with transaction.atomic():
+                rebuild_bands()
+        clusters = duplicate_clusters(duplicate_pairs())
+        questions = Question.objects.select_related('quiz').in_bulk(
+            [pk for cluster in clusters for pk in cluster])
+        for number, cluster in enumerate(clusters, 1):
+            self.stdout.write(f'Cluster {number}, {len(cluster)} questions')
+            for pk in cluster:
+                question = questions[pk]
+                self.stdout.write(f'  {pk} "{question.quiz}": {question.question_text}')
+        self.stdout.write(f'{len(clusters)} clusters of near-duplicate questions')
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.importers import (
+    BATCH_SIZE, FORMATS, ImportFileError, format_of, import_questions)
+from dashboard.models import Quiz
+
+
+class Command(BaseCommand):
+    help = 'Imports the questions of a CSV, JSON, Aiken or GIFT file into a quiz'
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz', type=int, help='pk of the quiz')
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='format of the file, told from its extension by default')
+        parser.add_argument(
+            '--partial', action='store_true',
+            help='import the valid questions even when some have errors')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            quiz = Quiz.objects.get(pk=options['quiz'])
+        except Quiz.DoesNotExist:
+            raise CommandError(f'Quiz {options["quiz"]} does not exist')
+        file_format = options['format'] or format_of(options['path'])
+        if file_format is None:
+            raise CommandError('The format could not be told from the file name, use --format')
+
+        start = time.perf_counter()
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as lines:
+                imported, errors, duplicates = import_questions(
+                    quiz, lines, file_format, partial=options['partial'],
+                    batch_size=options['batch_size'])
+        except (OSError, ImportFileError) as error:
+            raise CommandError(error)
+        seconds = time.perf_counter() - start
+
+        for line, message in errors:
+            self.stderr.write(f'line {line}: {message}')
+        if errors and not options['partial']:
+            raise CommandError(
+                f'{len(errors)} errors, nothing imported; fix them or use --partial')
+        self.stdout.write(
+            f'Imported {imported} questions into "{quiz}" in {seconds:.2f}s')
+        for line, question in duplicates:
+            self.stdout.write(
+                f'line {line} looks like question {question.pk} of "{question.quiz}"')
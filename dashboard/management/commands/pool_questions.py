@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from dashboard.models import Question, QuestionPool
+from dashboard.pools import add_questions, remove_questions
+
+
+class Command(BaseCommand):
+    help = 'Adds the questions of quizzes to a question pool, or removes them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('pool', help='name of the pool, created if missing')
+        parser.add_argument(
+            '--quiz', type=int, action='append', default=[],
+            help='pk of a quiz whose questions are added, may be repeated')
+        parser.add_argument(
+            '--question', type=int, action='append', default=[],
+            help='pk of a question to add, may be repeated')
+        parser.add_argument(
+            '--remove', action='store_true',
+            help='remove the questions from the pool instead')
+
+    def handle(self, *args, **options):
+        if not options['quiz'] and not options['question']:
+            raise CommandError('Name the questions with --quiz or --question')
+        questions = Question.objects.filter(
+            Q(quiz__in=options['quiz']) | Q(pk__in=options['question']))
+        if options['remove']:
+            try:
+                pool = QuestionPool.objects.get(name=options['pool'])
+            except QuestionPool.DoesNotExist:
+                raise CommandError(f'Pool "{options["pool"]}" does not exist')
+            changed = remove_questions(pool, questions)
+            self.stdout.write(f'Removed {changed} questions from "{pool}"')
+        else:
+            pool, _ = QuestionPool.objects.get_or_create(name=options['pool'])
+            changed = add_questions(pool, questions)
+            self.stdout.write(f'Added {changed} questions to "{pool}"')
+        self.stdout.write(f'"{pool}" holds {pool.memberships.count()} questions')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from dashboard.models import SearchEntry
+from dashboard.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Recreates the search entries of every quiz, question and choice'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_index()
+        self.stdout.write(f'Indexed {SearchEntry.objects.count()} entries')
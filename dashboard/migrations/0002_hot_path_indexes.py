@@ -0,0 +1,21 @@
+# Generated by Django 3.1 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='choice',
+            index=models.Index(condition=models.Q(mark='right'), fields=['question'], name='dashboard_choice_right'),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['quiz_title'], name='dashboard_quiz_title'),
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 3.1 on 2026-10-18 18:17
+
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Concat
+import django.db.models.deletion
+
+
+# the full-text index of the entries, kept by the database
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE dashboard_searchentry_fts USING fts5("
+    "text, content='dashboard_searchentry', content_rowid='id', "
+    "tokenize='porter unicode61')",
+    "CREATE TRIGGER dashboard_searchentry_ai AFTER INSERT ON dashboard_searchentry BEGIN "
+    "INSERT INTO dashboard_searchentry_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER dashboard_searchentry_ad AFTER DELETE ON dashboard_searchentry BEGIN "
+    "INSERT INTO dashboard_searchentry_fts(dashboard_searchentry_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER dashboard_searchentry_au AFTER UPDATE OF text ON dashboard_searchentry BEGIN "
+    "INSERT INTO dashboard_searchentry_fts(dashboard_searchentry_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO dashboard_searchentry_fts(rowid, text) VALUES (new.id, new.text); END",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS dashboard_searchentry_ai",
+    "DROP TRIGGER IF EXISTS dashboard_searchentry_ad",
+    "DROP TRIGGER IF EXISTS dashboard_searchentry_au",
+    "DROP TABLE IF EXISTS dashboard_searchentry_fts",
+]
+POSTGRES_CREATE = [
+    "CREATE INDEX dashboard_searchentry_tsv ON dashboard_searchentry "
+    "USING GIN (to_tsvector('english', text))",
+]
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS dashboard_searchentry_tsv",
+]
+
+
+def run(statements):
+    def run_statements(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for statement in statements.get(vendor, []):
+            schema_editor.execute(statement)
+    return run_statements
+
+
+def index_existing(apps, schema_editor):
+    """
+    creates the entries of the quizzes, questions and choices saved so
+    far, one INSERT ... SELECT each. Written out here rather than calling
+    dashboard.search, so later changes to the app cannot change what this
+    migration does.
+    """
+    Quiz = apps.get_model('dashboard', 'Quiz')
+    Question = apps.get_model('dashboard', 'Question')
+    Choice = apps.get_model('dashboard', 'Choice')
+
+    def insert_from(columns, rows):
+        sql, params = rows.query.sql_with_params()
+        schema_editor.execute(
+            f'INSERT INTO dashboard_searchentry ({", ".join(columns)}) {sql}', params)
+
+    insert_from(['quiz_id', 'text'], Quiz.objects.order_by().values_list(
+        'pk', Concat('quiz_title', Value('\n'), 'quiz_text', output_field=models.TextField())))
+    insert_from(['question_id', 'text'], Question.objects.order_by().values_list(
+        'pk', 'question_text'))
+    insert_from(['choice_id', 'question_id', 'text'], Choice.objects.order_by().values_list(
+        'pk', 'question_id', 'choice_text'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('choice', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_entry', to='dashboard.choice')),
+                ('question', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='dashboard.question')),
+                ('quiz', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_entry', to='dashboard.quiz')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchentry',
+            constraint=models.UniqueConstraint(condition=models.Q(choice=None), fields=('question',), name='dashboard_searchentry_question'),
+        ),
+        migrations.RunPython(
+            run({'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE}),
+            run({'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}),
+        ),
+        # after the triggers, which fill the full-text table
+        migrations.RunPython(index_existing, migrations.RunPython.noop),
+    ]
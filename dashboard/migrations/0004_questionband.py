@@ -0,0 +1,99 @@
+# Generated by Django 3.1 on 2026-10-18 18:34
+
+import hashlib
+import re
+import struct
+import zlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# the bucket computation of dashboard.duplicates when this migration was
+# written, kept here so later changes to the app cannot change what this
+# migration saves
+SHINGLE_SIZE = 5
+BANDS = 8
+ROWS = 4
+NUM_HASHES = BANDS * ROWS
+WORD = re.compile(r'\w+')
+MIX = 0x9E3779B97F4A7C15
+VALUE_BITS = 64 - 5
+
+
+def shingles(text):
+    text = ' '.join(WORD.findall(text.lower()))
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def signature(shingle_set):
+    minhashes = [None] * NUM_HASHES
+    for shingle in shingle_set:
+        value = (zlib.crc32(shingle.encode()) * MIX) & 0xFFFFFFFFFFFFFFFF
+        position = value >> VALUE_BITS
+        value &= (1 << VALUE_BITS) - 1
+        if minhashes[position] is None or value < minhashes[position]:
+            minhashes[position] = value
+    filled = [position for position, value in enumerate(minhashes) if value is not None]
+    for position in range(NUM_HASHES):
+        if minhashes[position] is None:
+            borrowed = next(
+                (filled_position for filled_position in filled
+                 if filled_position > position), filled[0] + NUM_HASHES)
+            minhashes[position] = (
+                minhashes[borrowed % NUM_HASHES]
+                + ((borrowed - position) << VALUE_BITS))
+    return minhashes
+
+
+def buckets(text):
+    shingle_set = shingles(text)
+    if not shingle_set:
+        return []
+    minhashes = signature(shingle_set)
+    return [
+        int.from_bytes(hashlib.blake2b(
+            struct.pack(f'>B{ROWS}Q', band, *minhashes[band * ROWS:(band + 1) * ROWS]),
+            digest_size=8).digest(), 'big', signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def index_existing(apps, schema_editor):
+    """saves the buckets of the questions saved so far"""
+    Question = apps.get_model('dashboard', 'Question')
+    QuestionBand = apps.get_model('dashboard', 'QuestionBand')
+    rows = []
+    for question in Question.objects.only('pk', 'question_text').iterator():
+        rows.extend(
+            QuestionBand(question_id=question.pk, bucket=bucket)
+            for bucket in buckets(question.question_text))
+        if len(rows) >= 1000:
+            QuestionBand.objects.bulk_create(rows)
+            rows = []
+    QuestionBand.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_searchentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionBand',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='dashboard.question')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='questionband',
+            index=models.Index(fields=['bucket', 'question'], name='dashboard_questionband_bucket'),
+        ),
+        migrations.RunPython(index_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 3.1 on 2026-10-18 18:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_questionband'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoolMembership',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuestionPool',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('questions', models.ManyToManyField(blank=True, related_name='pools', through='dashboard.PoolMembership', to='dashboard.Question')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='poolmembership',
+            name='pool',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='dashboard.questionpool'),
+        ),
+        migrations.AddField(
+            model_name='poolmembership',
+            name='question',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='dashboard.question'),
+        ),
+        migrations.CreateModel(
+            name='PoolDraw',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('no_of_questions', models.PositiveIntegerField()),
+                ('pool', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='draws', to='dashboard.questionpool')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='draws', to='dashboard.quiz')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='poolmembership',
+            constraint=models.UniqueConstraint(fields=('pool', 'position'), name='dashboard_poolmembership_position'),
+        ),
+        migrations.AddConstraint(
+            model_name='poolmembership',
+            constraint=models.UniqueConstraint(fields=('pool', 'question'), name='dashboard_poolmembership_question'),
+        ),
+        migrations.AddConstraint(
+            model_name='pooldraw',
+            constraint=models.UniqueConstraint(fields=('quiz', 'pool'), name='dashboard_pooldraw_quiz_pool'),
+        ),
+    ]
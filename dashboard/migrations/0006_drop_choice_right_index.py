@@ -0,0 +1,17 @@
+# Generated by Django 3.1 on 2026-10-18 19:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_question_pools'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='choice',
+            name='dashboard_choice_right',
+        ),
+    ]
@@ -10,6 +10,12 @@ class Quiz(models.Model):
     quiz_text = models.TextField()
     duration = models.DurationField(default=timedelta(minutes=5), help_text='HH:MM:SS')
 
+    class Meta:
+        indexes = [
+            # the sample exam is looked up by title
+            models.Index(fields=['quiz_title'], name='dashboard_quiz_title'),
+        ]
+
     def get_absolute_url(self):
         return reverse('dash:quiz_detail', args=[self.pk, ])
 
@@ -61,3 +67,116 @@ class Choice(models.Model):
 
     def __str__(self):
         return self.choice_text
+
+
+class SearchEntry(models.Model):
+    """
+    the searchable text of one quiz, question or choice, kept in sync on
+    save and deleted with its owner. The database keeps the full-text
+    index over `text`: an FTS5 table on SQLite and a GIN index on
+    PostgreSQL, see dashboard/search.py.
+    """
+    quiz = models.OneToOneField(
+        Quiz, on_delete=models.CASCADE, null=True, related_name='search_entry')
+    # set for choices as well, so matches can be listed by question
+    question = models.ForeignKey(
+        Question, on_delete=models.CASCADE, null=True, related_name='search_entries')
+    choice = models.OneToOneField(
+        Choice, on_delete=models.CASCADE, null=True, related_name='search_entry')
+    text = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['question'],
+                condition=models.Q(choice=None),
+                name='dashboard_searchentry_question',
+            ),
+        ]
+
+    @property
+    def kind(self):
+        if self.quiz_id is not None:
+            return 'quiz'
+        if self.choice_id is not None:
+            return 'choice'
+        return 'question'
+
+    def __str__(self):
+        return self.text
+
+
+class QuestionBand(models.Model):
+    """
+    one LSH bucket of the MinHash signature of a question, kept in sync
+    on save and deleted with the question. Questions sharing a bucket are
+    likely near duplicates, see dashboard/duplicates.py.
+    """
+    question = models.ForeignKey(
+        Question, on_delete=models.CASCADE, related_name='bands')
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            # the oldest question of a bucket is one index seek
+            models.Index(fields=['bucket', 'question'], name='dashboard_questionband_bucket'),
+        ]
+
+    def __str__(self):
+        return str(self.bucket)
+
+
+class QuestionPool(models.Model):
+    """
+    a named bank of questions from any quiz. A quiz with a blueprint,
+    its PoolDraws, draws the questions of every attempt from pools
+    instead of showing its own, see dashboard/pools.py.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    questions = models.ManyToManyField(
+        Question, through='PoolMembership', related_name='pools', blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class PoolMembership(models.Model):
+    """
+    a question of a pool at a position from 0 to the size of the pool, so
+    random questions are drawn by looking up random positions
+    """
+    pool = models.ForeignKey(
+        QuestionPool, on_delete=models.CASCADE, related_name='memberships')
+    question = models.ForeignKey(
+        Question, on_delete=models.CASCADE, related_name='memberships')
+    position = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            # doubles as the index positions are looked up by
+            models.UniqueConstraint(
+                fields=['pool', 'position'], name='dashboard_poolmembership_position'),
+            models.UniqueConstraint(
+                fields=['pool', 'question'], name='dashboard_poolmembership_question'),
+        ]
+
+    def __str__(self):
+        return f'{self.pool} - {self.position}'
+
+
+class PoolDraw(models.Model):
+    """one line of the blueprint of a quiz, e.g. draw 20 questions from pool A"""
+    quiz = models.ForeignKey(
+        Quiz, on_delete=models.CASCADE, related_name='draws')
+    pool = models.ForeignKey(
+        QuestionPool, on_delete=models.CASCADE, related_name='draws')
+    no_of_questions = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['quiz', 'pool'], name='dashboard_pooldraw_quiz_pool'),
+        ]
+
+    def __str__(self):
+        return f'{self.no_of_questions} from {self.pool}'
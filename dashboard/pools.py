@@ -0,0 +1,115 @@
+"""
+question pools and the random draw of the questions of an attempt.
+
+The questions of a pool hold the positions 0 to size - 1, kept without
+gaps when questions are removed through remove_questions(), so drawing
+n random questions picks n random positions and looks them up through
+the (pool, position) index. No query sorts the pool at random, and a
+draw reads about n rows however big the pool is.
+
+Questions deleted outright leave gaps until the next add_questions()
+fills them; a draw skips a gap and picks another position.
+"""
+from django.db import transaction
+from django.db.models import Max
+
+from .models import QuestionPool, PoolMembership
+
+
+def pool_size(pool_pk):
+    """one more than the last position of a pool, gaps included"""
+    last = PoolMembership.objects.filter(pool_id=pool_pk).aggregate(
+        last=Max('position'))['last']
+    return 0 if last is None else last + 1
+
+
+def add_questions(pool, questions):
+    """
+    adds the questions of a queryset that are not in the pool yet, in
+    the gaps left by deleted questions first and then at the end.
+    Returns the number of questions added.
+    """
+    with transaction.atomic():
+        # changes to a pool are made one at a time
+        QuestionPool.objects.select_for_update().get(pk=pool.pk)
+        new = list(questions.exclude(memberships__pool=pool).order_by(
+            'pk').values_list('pk', flat=True))
+        if not new:
+            return 0
+        size = pool_size(pool.pk)
+        taken = set(pool.memberships.values_list('position', flat=True))
+        gaps = [position for position in range(size) if position not in taken]
+        positions = gaps + list(range(size, size + len(new)))
+        PoolMembership.objects.bulk_create(
+            PoolMembership(pool=pool, question_id=question_pk, position=position)
+            for question_pk, position in zip(new, positions)
+        )
+    return len(new)
+
+
+def remove_questions(pool, questions):
+    """
+    removes the questions of a queryset from the pool, moving the last
+    questions of the pool into the positions they leave
+    """
+    with transaction.atomic():
+        QuestionPool.objects.select_for_update().get(pk=pool.pk)
+        removed = pool.memberships.filter(question__in=questions)
+        positions = sorted(removed.values_list('position', flat=True))
+        if not positions:
+            return 0
+        size = pool_size(pool.pk) - len(positions)
+        removed.delete()
+        last = pool.memberships.filter(position__gte=size).order_by(
+            'position').values_list('pk', flat=True)
+        holes = [position for position in positions if position < size]
+        for membership_pk, position in zip(list(last), holes):
+            PoolMembership.objects.filter(pk=membership_pk).update(position=position)
+    return len(positions)
+
+
+def draw(pool_pk, no_of_questions, rng, exclude=()):
+    """
+    returns up to `no_of_questions` question pks drawn at random from a
+    pool with the random.Random `rng`, none of them in `exclude`
+    """
+    size = pool_size(pool_pk)
+    members = PoolMembership.objects.filter(pool_id=pool_pk)
+    exclude = set(exclude)
+    drawn = []
+    tried = set()
+    # random positions are looked up while most of the pool is untried;
+    # a draw of most of the pool reads it all instead
+    while len(drawn) < no_of_questions and (len(tried) + no_of_questions) * 2 < size:
+        positions = set()
+        while len(positions) < no_of_questions - len(drawn):
+            position = rng.randrange(size)
+            if position not in tried:
+                tried.add(position)
+                positions.add(position)
+        # gaps and excluded questions are skipped and drawn again
+        for question_pk in members.filter(position__in=positions).order_by(
+                'position').values_list('question_id', flat=True):
+            if question_pk not in exclude:
+                exclude.add(question_pk)
+                drawn.append(question_pk)
+    if len(drawn) < no_of_questions:
+        rest = [
+            question_pk for position, question_pk in members.order_by(
+                'position').values_list('position', 'question_id')
+            if position not in tried and question_pk not in exclude
+        ]
+        drawn += rng.sample(rest, min(no_of_questions - len(drawn), len(rest)))
+    return drawn
+
+
+def draw_questions(draws, rng):
+    """
+    returns the question pks of an attempt drawn from (pool pk, number of
+    questions) pairs, a question drawn from one pool is not drawn again
+    from another
+    """
+    drawn = []
+    for pool_pk, no_of_questions in draws:
+        drawn += draw(pool_pk, no_of_questions, rng, exclude=drawn)
+    return drawn
@@ -0,0 +1,172 @@
+"""
+full-text search over quizzes, questions and choices.
+
+Every quiz, question and choice has a SearchEntry holding its text,
+saved by the signals of this app and by the bulk inserts of the
+importers. The full-text index over the entries is kept by the
+database itself, created by migration 0003:
+
+SQLite      an external content FTS5 table, FTS_TABLE, filled by
+            triggers on the entry table and ranked with bm25().
+PostgreSQL  a GIN index on to_tsvector('english', text), ranked with
+            ts_rank().
+
+Other databases fall back to icontains on the entries.
+"""
+import re
+
+from django.db import connection, transaction, IntegrityError
+from django.db.models import Q, Value, TextField
+from django.db.models.functions import Concat
+
+from .models import Quiz, Question, Choice, SearchEntry
+
+
+FTS_TABLE = 'dashboard_searchentry_fts'
+TERM = re.compile(r'\w+')
+
+
+def quiz_search_text(quiz):
+    return f'{quiz.quiz_title}\n{quiz.quiz_text}'
+
+
+def terms_of(query):
+    """the words of a query; punctuation and search operators are dropped"""
+    return TERM.findall(query.lower())[:16]
+
+
+def fts5_query(terms):
+    """every term must match, the last one as a prefix as it may be typed yet"""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def tsquery(terms):
+    return ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+
+
+# the entries of each kind, by the owner they have set
+KINDS = {
+    'quiz': 'e.quiz_id IS NOT NULL',
+    'question': 'e.question_id IS NOT NULL AND e.choice_id IS NULL',
+    'choice': 'e.choice_id IS NOT NULL',
+}
+KIND_FILTERS = {
+    'quiz': Q(quiz__isnull=False),
+    'question': Q(question__isnull=False, choice=None),
+    'choice': Q(choice__isnull=False),
+}
+
+
+def _ranked_ids(terms, limit, kind=None):
+    """(entry id, rank) of the best matches, the higher the rank the better"""
+    of_kind = f'AND {KINDS[kind]} ' if kind else ''
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f'SELECT e.id, -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+                f'JOIN dashboard_searchentry e ON e.id = {FTS_TABLE}.rowid '
+                f'WHERE {FTS_TABLE} MATCH %s {of_kind}'
+                f'ORDER BY bm25({FTS_TABLE}) LIMIT %s',
+                [fts5_query(terms), limit])
+        else:
+            cursor.execute(
+                "SELECT e.id, ts_rank(to_tsvector('english', e.text), query) AS rank "
+                "FROM dashboard_searchentry e, to_tsquery('english', %s) query "
+                f"WHERE to_tsvector('english', e.text) @@ query {of_kind}"
+                "ORDER BY rank DESC LIMIT %s",
+                [tsquery(terms), limit])
+        return cursor.fetchall()
+
+
+def search(query, limit=50, kind=None):
+    """
+    returns the entries best matching a query, best first, each with its
+    `rank` and its quiz, question and choice selected. `kind` limits the
+    entries to those of quizzes, questions or choices.
+    """
+    terms = terms_of(query)
+    if not terms:
+        return []
+    entries = SearchEntry.objects.select_related(
+        'quiz', 'question__quiz', 'choice')
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        if kind:
+            entries = entries.filter(KIND_FILTERS[kind])
+        for term in terms:
+            entries = entries.filter(text__icontains=term)
+        results = list(entries[:limit])
+        for entry in results:
+            entry.rank = 0
+        return results
+    ranked = _ranked_ids(terms, limit, kind)
+    found = entries.in_bulk([pk for pk, _ in ranked])
+    results = []
+    for pk, rank in ranked:
+        if pk in found:
+            found[pk].rank = rank
+            results.append(found[pk])
+    return results
+
+
+##### indexing #####
+
+def save_entry(lookup, created=False, **fields):
+    """
+    saves the entry of one quiz, question or choice, e.g.
+    save_entry({'quiz_id': 1}, text='title text'). The entry of an owner
+    just `created` cannot exist yet and is inserted right away.
+    """
+    if created:
+        SearchEntry.objects.create(**lookup, **fields)
+        return
+    if SearchEntry.objects.filter(**lookup).update(**fields):
+        return
+    try:
+        with transaction.atomic():
+            SearchEntry.objects.create(**lookup, **fields)
+    except IntegrityError:
+        # saved at the same time by another request
+        SearchEntry.objects.filter(**lookup).update(**fields)
+
+
+def _insert_from(columns, rows):
+    """
+    creates entries from the rows of a values_list() queryset with one
+    INSERT ... SELECT, however many rows there are
+    """
+    sql, params = rows.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {SearchEntry._meta.db_table} ({", ".join(columns)}) {sql}',
+            params)
+
+
+def index_quizzes(quizzes):
+    """creates the entries of quizzes saved without signals"""
+    _insert_from(['quiz_id', 'text'], quizzes.order_by().values_list(
+        'pk', Concat('quiz_title', Value('\n'), 'quiz_text', output_field=TextField())))
+
+
+def index_questions(questions):
+    """creates the entries of questions saved without signals"""
+    _insert_from(['question_id', 'text'], questions.order_by().values_list(
+        'pk', 'question_text'))
+
+
+def index_choices(choices):
+    """creates the entries of choices saved without signals"""
+    _insert_from(['choice_id', 'question_id', 'text'], choices.order_by().values_list(
+        'pk', 'question_id', 'choice_text'))
+
+
+def rebuild_index():
+    """recreates every entry, and so the full-text index, from the quizzes"""
+    SearchEntry.objects.all().delete()
+    index_quizzes(Quiz.objects.all())
+    index_questions(Question.objects.all())
+    index_choices(Choice.objects.all())
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Quiz, Question, Choice
+from .duplicates import save_bands
+from .search import quiz_search_text, save_entry
+
+
+# entries and bands are deleted by cascade with their quiz, question or choice
+
+@receiver(post_save, sender=Quiz)
+def index_quiz(sender, instance, created, **kwargs):
+    save_entry({'quiz_id': instance.pk}, created, text=quiz_search_text(instance))
+
+
+@receiver(post_save, sender=Question)
+def index_question(sender, instance, created, **kwargs):
+    save_entry(
+        {'question_id': instance.pk, 'choice_id': None}, created,
+        text=instance.question_text)
+    save_bands(instance, created)
+
+
+@receiver(post_save, sender=Choice)
+def index_choice(sender, instance, created, **kwargs):
+    # the question is saved too, as a choice may move to another question
+    save_entry(
+        {'choice_id': instance.pk}, created,
+        question_id=instance.question_id, text=instance.choice_text)
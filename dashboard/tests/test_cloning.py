@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from dashboard import models
+from dashboard.cloning import clone_quiz
+from exam.grading import get_answer_key
+
+
+class CloneQuizTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.quiz = models.Quiz.objects.create(
+            quiz_title='title 1', quiz_text='text 1')
+        for i in range(10):
+            question = models.Question.objects.create(
+                question_text=f'question {i}', quiz=cls.quiz)
+            for j in range(4):
+                models.Choice.objects.create(
+                    choice_text=f'choice {i} {j}',
+                    mark='right' if j == i % 4 else 'wrong',
+                    question=question)
+
+    def setUp(self):
+        cache.clear()
+
+    def questions_of(self, quiz):
+        return [
+            (question.question_text,
+             [(choice.choice_text, choice.mark) for choice in question.choices.all()])
+            for question in quiz.questions.order_by('pk').prefetch_related('choices')
+        ]
+
+    def test_copies_questions_and_choices(self):
+        copy = clone_quiz(self.quiz)
+        self.assertNotEqual(copy.pk, self.quiz.pk)
+        self.assertEqual(copy.quiz_title, 'title 1 (copy)')
+        self.assertEqual(copy.quiz_text, 'text 1')
+        self.assertEqual(copy.duration, self.quiz.duration)
+        self.assertEqual(self.questions_of(copy), self.questions_of(self.quiz))
+        self.assertEqual(get_answer_key(copy.pk)['no_of_questions'], 10)
+        # the original is untouched
+        self.assertEqual(self.quiz.questions.count(), 10)
+
+    def test_query_count_does_not_grow_with_questions(self):
+        # questions, choices, savepoint, quiz insert and its search entry,
+        # question insert, their pks, choice insert, one insert of the
+        # search entries of each, the duplicate buckets, release
+        with self.assertNumQueries(12):
+            clone_quiz(self.quiz)
+
+    def test_subset(self):
+        copy = clone_quiz(self.quiz, quiz_title='term 2', no_of_questions=3, seed=1)
+        self.assertEqual(copy.quiz_title, 'term 2')
+        copied = self.questions_of(copy)
+        self.assertEqual(len(copied), 3)
+        original = self.questions_of(self.quiz)
+        # picked questions keep their choices and their order in the quiz
+        indexes = [original.index(question) for question in copied]
+        self.assertEqual(indexes, sorted(indexes))
+
+    def test_shuffle(self):
+        copy = clone_quiz(self.quiz, shuffle=True, seed=1)
+        again = clone_quiz(self.quiz, shuffle=True, seed=1)
+        copied = self.questions_of(copy)
+        self.assertEqual(copied, self.questions_of(again))
+        self.assertNotEqual(copied, self.questions_of(self.quiz))
+        self.assertEqual(
+            sorted((text, sorted(choices)) for text, choices in copied),
+            sorted((text, sorted(choices)) for text, choices in self.questions_of(self.quiz)))
@@ -0,0 +1,188 @@
+import io
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from dashboard import models
+from dashboard.duplicates import (
+    BANDS, buckets, duplicate_clusters, duplicate_pairs, find_duplicates,
+    shingles, similarity)
+from dashboard.importers import import_questions
+
+
+class DuplicatesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.quiz = models.Quiz.objects.create(
+            quiz_title='Geography', quiz_text='capitals of Africa')
+        cls.other_quiz = models.Quiz.objects.create(
+            quiz_title='Science', quiz_text='the solar system')
+        cls.capital = models.Question.objects.create(
+            question_text='What is the capital of Nigeria?', quiz=cls.quiz)
+        cls.ghana = models.Question.objects.create(
+            question_text='What is the capital of Ghana?', quiz=cls.quiz)
+        cls.planet = models.Question.objects.create(
+            question_text='Which planet is closest to the Sun?', quiz=cls.other_quiz)
+
+    def test_shingles(self):
+        self.assertEqual(shingles('What is 2+2?'), shingles('what  is 2 2'))
+        self.assertEqual(shingles('Why?'), {'why'})
+        self.assertEqual(shingles('?!'), set())
+        self.assertEqual(buckets('?!'), [])
+        self.assertEqual(similarity(shingles('abcdef'), shingles('abcdef')), 1)
+
+    def test_buckets_are_saved(self):
+        self.assertEqual(self.capital.bands.count(), BANDS)
+        self.assertEqual(
+            sorted(self.capital.bands.values_list('bucket', flat=True)),
+            sorted(buckets('what is the capital of nigeria')))
+        question = models.Question.objects.get(pk=self.planet.pk)
+        question.question_text = 'Which planet is the closest to the sun?'
+        question.save()
+        self.assertEqual(
+            sorted(question.bands.values_list('bucket', flat=True)),
+            sorted(buckets(question.question_text)))
+        question.delete()
+        self.assertEqual(models.QuestionBand.objects.count(), 2 * BANDS)
+
+    def test_find_duplicates(self):
+        with self.assertNumQueries(1):
+            duplicates = find_duplicates('what is the capital of  Nigeria')
+        self.assertEqual(duplicates, [self.capital])
+        self.assertEqual(duplicates[0].similarity, 1)
+        self.assertEqual(duplicates[0].quiz.quiz_title, 'Geography')
+        # a small rewording
+        self.assertEqual(
+            find_duplicates('Which planet is the closest to the Sun?'), [self.planet])
+        self.assertEqual(find_duplicates(
+            self.capital.question_text, exclude_pk=self.capital.pk), [])
+        self.assertEqual(find_duplicates('How many moons has Mars?'), [])
+
+    def test_clusters(self):
+        copy = models.Question.objects.create(
+            question_text='What is the capital of Nigeria ?', quiz=self.other_quiz)
+        pairs = list(duplicate_pairs())
+        self.assertEqual(pairs, [(copy.pk, self.capital.pk, 1)])
+        self.assertEqual(duplicate_clusters(pairs), [[self.capital.pk, copy.pk]])
+        self.assertEqual(
+            duplicate_clusters([(3, 2, 1), (2, 1, 1), (5, 4, 1)]), [[1, 2, 3], [4, 5]])
+
+    def test_pairs_compare_every_member_of_a_bucket(self):
+        copies = [
+            models.Question.objects.create(
+                question_text='How many moons has Mars?', quiz=self.other_quiz)
+            for _ in range(2)
+        ]
+        # one bucket shared with an older question unlike both copies
+        models.QuestionBand.objects.all().delete()
+        models.QuestionBand.objects.bulk_create(
+            models.QuestionBand(question=question, bucket=42)
+            for question in [self.capital] + copies)
+        self.assertEqual(list(duplicate_pairs()), [(copies[1].pk, copies[0].pk, 1)])
+        self.assertEqual(
+            list(duplicate_pairs(models.Question.objects.filter(pk=copies[1].pk))),
+            [(copies[1].pk, copies[0].pk, 1)])
+        self.assertEqual(
+            list(duplicate_pairs(models.Question.objects.filter(pk=self.ghana.pk))), [])
+        # only the oldest questions of a crowded bucket are compared
+        with mock.patch('dashboard.duplicates.MAX_BUCKET_SIZE', 2):
+            self.assertEqual(list(duplicate_pairs()), [])
+
+    def test_candidates_are_distinct_questions(self):
+        self.ghana.delete()
+        copy = models.Question.objects.create(
+            question_text='What is the capital of Nigeria ?', quiz=self.other_quiz)
+        # each question has BANDS rows in the buckets of the text
+        with mock.patch('dashboard.duplicates.MAX_CANDIDATES', 2):
+            self.assertEqual(
+                find_duplicates('what is the capital of nigeria'), [self.capital, copy])
+
+    def test_bulk_imports_are_flagged(self):
+        imported, errors, duplicates = import_questions(self.quiz, io.StringIO(
+            'How many moons has Mars?,1,2,B\n'
+            'what is the capital of nigeria,Abuja,Lagos,A\n'
+            'How many moons has Mars ?,1,2,B\n'
+        ), 'csv')
+        self.assertEqual((imported, errors), (3, []))
+        self.assertEqual(
+            [(line, question.question_text) for line, question in duplicates],
+            [(2, 'What is the capital of Nigeria?'), (3, 'How many moons has Mars?')])
+
+    def test_command(self):
+        models.Question.objects.create(
+            question_text='What is the capital of Nigeria ?', quiz=self.other_quiz)
+        models.QuestionBand.objects.all().delete()
+        out = io.StringIO()
+        call_command('duplicate_questions', stdout=out)
+        self.assertIn('0 clusters', out.getvalue())
+        out = io.StringIO()
+        call_command('duplicate_questions', '--rebuild', stdout=out)
+        self.assertIn('Cluster 1, 2 questions', out.getvalue())
+        self.assertIn('1 clusters', out.getvalue())
+
+
+class CreateQuestionDuplicateTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ### create teacher ###
+        cls.teacher = get_user_model().objects.create_user(
+            email='teacher@test.com', password='asdf7890',)
+        cls.teacher.teacher = True
+        cls.teacher.save()
+
+        cls.quiz = models.Quiz.objects.create(
+            quiz_title='Geography', quiz_text='capitals of Africa')
+        models.Question.objects.create(
+            question_text='What is the capital of Nigeria?', quiz=cls.quiz)
+
+    def setUp(self):
+        self.client.login(email='teacher@test.com', password='asdf7890')
+
+    def post(self, question_text):
+        data = {
+            'question_text': question_text,
+            'form-TOTAL_FORMS': 2,
+            'form-INITIAL_FORMS': 0,
+            'form-0-choice_text': 'Abuja',
+            'form-0-mark': 'right',
+            'form-1-choice_text': 'Lagos',
+            'form-1-mark': 'wrong',
+            'finish': 'finish',
+        }
+        response = self.client.post(
+            reverse('dash:create_question_choice', args=[self.quiz.pk]), data, follow=True)
+        return [str(message) for message in response.context['messages']]
+
+    def test_duplicate_is_flagged(self):
+        messages = self.post('What is the capital of  nigeria')
+        self.assertIn(
+            'This question looks like "What is the capital of Nigeria?" of Geography',
+            messages)
+        # the question is saved all the same
+        self.assertEqual(self.quiz.questions.count(), 2)
+
+    def test_new_question_is_not_flagged(self):
+        self.assertEqual(len(self.post('Which river flows through Abuja?')), 1)
+
+
+class BandsMigrationTest(TransactionTestCase):
+    def test_existing_bank_is_indexed(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('dashboard', '0003_searchentry')])
+        apps = executor.loader.project_state([('dashboard', '0003_searchentry')]).apps
+        quiz = apps.get_model('dashboard', 'Quiz').objects.create(
+            quiz_title='Geography', quiz_text='capitals of Africa')
+        question = apps.get_model('dashboard', 'Question').objects.create(
+            question_text='What is the capital of Nigeria?', quiz=quiz)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        self.assertEqual(models.QuestionBand.objects.count(), BANDS)
+        self.assertEqual(
+            [duplicate.pk for duplicate in find_duplicates('what is the capital of nigeria')],
+            [question.pk])
@@ -177,4 +177,63 @@ class BaseChoiceFormSetTest(TestCase):
 
 
 
-            
\ No newline at end of file
+            
+
+def batch_data(no_of_questions, filled):
+    """POST data of a question batch with the first `filled` questions filled in"""
+    data = {
+        'questions-TOTAL_FORMS': no_of_questions,
+        'questions-INITIAL_FORMS': 0,
+    }
+    for i in range(no_of_questions):
+        data[f'choices-{i}-TOTAL_FORMS'] = 4
+        data[f'choices-{i}-INITIAL_FORMS'] = 0
+        if i < filled:
+            data[f'questions-{i}-question_text'] = f'question {i}'
+            for j in range(4):
+                data[f'choices-{i}-{j}-choice_text'] = f'choice {j}'
+                data[f'choices-{i}-{j}-mark'] = 'right' if j == 0 else 'wrong'
+    return data
+
+
+class QuestionBatchTest(SimpleTestCase):
+    def test_unbound(self):
+        batch = forms.QuestionBatch(no_of_questions=3)
+        self.assertEqual(len(batch.blocks), 3)
+        self.assertEqual(len(batch.blocks[0][1].forms), 4)
+        self.assertFalse(batch.is_valid())
+
+    def test_blank_questions_are_skipped(self):
+        batch = forms.QuestionBatch(batch_data(5, 2))
+        self.assertTrue(batch.is_valid())
+        items = batch.items()
+        self.assertEqual([item['question_text'] for item in items],
+                         ['question 0', 'question 1'])
+        self.assertEqual(items[0]['choices'][0], ('choice 0', 'right'))
+
+    def test_nothing_filled(self):
+        batch = forms.QuestionBatch(batch_data(3, 0))
+        self.assertFalse(batch.is_valid())
+        self.assertEqual(batch.non_form_errors, ['please fill in at least one question.'])
+
+    def test_partly_filled_question(self):
+        data = batch_data(3, 1)
+        # choices without their question
+        data['choices-2-0-choice_text'] = 'orphan'
+        batch = forms.QuestionBatch(data)
+        self.assertFalse(batch.is_valid())
+        question, choices = batch.blocks[2]
+        self.assertIn('question_text', question.errors)
+        self.assertFalse(choices.is_valid())
+
+    def test_errors_of_one_question_fail_the_batch(self):
+        data = batch_data(3, 3)
+        data['choices-1-1-choice_text'] = 'CHOICE 0'
+        batch = forms.QuestionBatch(data)
+        self.assertFalse(batch.is_valid())
+        self.assertEqual(batch.blocks[1][1].non_form_errors(),
+                         ['choices in a question set must have distinct text.'])
+
+    def test_too_many_questions(self):
+        batch = forms.QuestionBatch(batch_data(forms.MAX_BATCH_QUESTIONS + 1, 1))
+        self.assertFalse(batch.is_valid())
@@ -0,0 +1,191 @@
+import io
+import json
+import tempfile
+
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.test import SimpleTestCase, TestCase
+
+from dashboard import importers
+from dashboard import models
+from exam.grading import get_answer_key
+
+
+def lines(text):
+    return io.StringIO(text)
+
+
+class ParserTest(SimpleTestCase):
+    def assertParsed(self, items, question_text, choices):
+        self.assertNotIn('error', items[0], items[0].get('error'))
+        self.assertEqual(items[0]['question_text'], question_text)
+        self.assertEqual(items[0]['choices'], choices)
+
+    def test_csv(self):
+        items = list(importers.parse_csv(lines(
+            'question,a,b,c,d,answer\n'
+            '"one, two",1,2,3,,B\n'
+            'three?,3,4,5,6,4\n'
+            'short,1,A\n'
+        )))
+        self.assertParsed(items, 'one, two', [
+            ('1', 'wrong'), ('2', 'right'), ('3', 'wrong')])
+        self.assertEqual(items[1]['choices'][3], ('6', 'right'))
+        self.assertEqual(items[2]['line'], 4)
+        self.assertIn('error', items[2])
+
+    def test_csv_answer_by_text(self):
+        items = list(importers.parse_csv(lines('capital?,Lagos,Abuja,Abuja\n')))
+        self.assertParsed(items, 'capital?', [('Lagos', 'wrong'), ('Abuja', 'right')])
+
+    def test_json_array(self):
+        items = list(importers.parse_json(lines(json.dumps([
+            {'question': 'q 1', 'choices': ['a', 'b'], 'answer': 'A'},
+            {'question': 'q 2', 'choices': [
+                {'text': 'a'}, {'text': 'b', 'right': True}]},
+            'junk',
+        ]))))
+        self.assertParsed(items, 'q 1', [('a', 'right'), ('b', 'wrong')])
+        self.assertEqual(items[1]['choices'], [('a', 'wrong'), ('b', 'right')])
+        self.assertEqual(items[2]['line'], 3)
+        self.assertIn('error', items[2])
+
+    def test_json_lines(self):
+        items = list(importers.parse_json(lines(
+            '\n'
+            '{"question": "q 1", "choices": ["a", "b"], "answer": 2}\n'
+            '{not json\n'
+        )))
+        self.assertParsed(items, 'q 1', [('a', 'wrong'), ('b', 'right')])
+        self.assertEqual(items[0]['line'], 2)
+        self.assertEqual(items[1], {'line': 3, 'error': 'the line is not valid JSON.'})
+
+    def test_invalid_json_array(self):
+        with self.assertRaises(importers.ImportFileError):
+            list(importers.parse_json(lines('[{"question": ')))
+
+    def test_aiken(self):
+        items = list(importers.parse_aiken(lines(
+            'What is the capital\n'
+            'of Nigeria?\n'
+            'A. Lagos\n'
+            'B) Abuja\n'
+            'ANSWER: B\n'
+            '\n'
+            '\n'
+            'No answer?\n'
+            'A. yes\n'
+            'B. no\n'
+        )))
+        self.assertParsed(items, 'What is the capital of Nigeria?', [
+            ('Lagos', 'wrong'), ('Abuja', 'right')])
+        self.assertEqual(items[1]['line'], 8)
+        self.assertIn('error', items[1])
+
+    def test_gift(self):
+        items = list(importers.parse_gift(lines(
+            '// a comment\n'
+            '$CATEGORY: capitals\n'
+            '\n'
+            '::Q1:: What is the capital\n'
+            'of Nigeria? {\n'
+            '  ~Lagos#no, that was before 1991\n'
+            '  =Abuja\n'
+            '  ~1 \\= 2\n'
+            '}\n'
+            '\n'
+            'Grant is buried in Grant\'s tomb. {T}\n'
+            '\n'
+            '::Q3:: weighted {~%100%right ~%0%wrong}\n'
+        )))
+        self.assertEqual(len(items), 3)
+        self.assertParsed(items, 'What is the capital of Nigeria?', [
+            ('Lagos', 'wrong'), ('Abuja', 'right'), ('1 = 2', 'wrong')])
+        self.assertEqual(items[0]['line'], 4)
+        self.assertEqual(
+            items[1]['error'], 'only multiple choice questions can be imported.')
+        self.assertEqual(items[2]['choices'], [('right', 'right'), ('wrong', 'wrong')])
+
+    def test_validate_question(self):
+        item = {'line': 1, 'question_text': 'q', 'choices': [
+            ('Same', 'right'), ('same', 'wrong')]}
+        self.assertEqual(importers.validate_question(item), [
+            'choices in a question set must have distinct text.'])
+        item['choices'] = [('a' * 251, 'right'), ('b', 'right')]
+        self.assertEqual(len(importers.validate_question(item)), 2)
+        item = {'line': 1, 'question_text': '', 'choices': [('a', 'right')]}
+        self.assertEqual(len(importers.validate_question(item)), 2)
+
+    def test_format_of(self):
+        self.assertEqual(importers.format_of('bank.CSV'), 'csv')
+        self.assertEqual(importers.format_of('bank.ndjson'), 'json')
+        self.assertEqual(importers.format_of('bank.txt'), 'aiken')
+        self.assertIsNone(importers.format_of('bank.docx'))
+
+
+class ImportQuestionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.quiz = models.Quiz.objects.create(
+            quiz_title='title 1', quiz_text='text 1')
+        models.Question.objects.create(question_text='existing', quiz=cls.quiz)
+        cls.csv = ''.join(
+            f'question {i},a {i},b {i},c {i},d {i},{"ABCD"[i % 4]}\n'
+            for i in range(30))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_imports_with_batched_inserts(self):
+        get_answer_key(self.quiz.pk)
+        with self.assertNumQueries(16):
+            # savepoint, 3 question batches, their pks, 6 choice batches,
+            # the search entries of the questions and of the choices, the
+            # duplicate buckets, release, the lookup of the oldest question
+            # of each bucket and of the questions they look like
+            imported, errors, duplicates = importers.import_questions(
+                self.quiz, lines(self.csv), 'csv', batch_size=20)
+        self.assertEqual((imported, errors), (30, []))
+        # "question 10" to "question 19" hold every shingle of "question 1"
+        self.assertEqual(duplicates[0][0], 11)
+        self.assertEqual(duplicates[0][1].question_text, 'question 1')
+        questions = self.quiz.questions.order_by('pk')
+        self.assertEqual(questions.count(), 31)
+        question = questions.last()
+        self.assertEqual(question.question_text, 'question 29')
+        self.assertEqual(
+            list(question.choices.order_by('pk').values_list('choice_text', 'mark')),
+            [('a 29', 'wrong'), ('b 29', 'right'), ('c 29', 'wrong'), ('d 29', 'wrong')])
+        # the cached answer key was dropped
+        self.assertEqual(get_answer_key(self.quiz.pk)['no_of_questions'], 31)
+
+    def test_errors_import_nothing(self):
+        text = self.csv + 'bad,x,X,A\n'
+        imported, errors, _ = importers.import_questions(self.quiz, lines(text), 'csv')
+        self.assertEqual(imported, 0)
+        self.assertEqual(errors, [(31, 'choices in a question set must have distinct text.')])
+        self.assertEqual(self.quiz.questions.count(), 1)
+
+    def test_partial_import(self):
+        text = self.csv + 'bad,x,X,A\n'
+        imported, errors, _ = importers.import_questions(
+            self.quiz, lines(text), 'csv', partial=True)
+        self.assertEqual((imported, len(errors)), (30, 1))
+        self.assertEqual(self.quiz.questions.count(), 31)
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as bank:
+            bank.write(self.csv)
+            bank.flush()
+            out = io.StringIO()
+            call_command('import_questions', self.quiz.pk, bank.name, stdout=out)
+        self.assertIn('Imported 30 questions', out.getvalue())
+
+    def test_command_reports_errors(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt') as bank:
+            bank.write('question\nA. a\nB. b\n')
+            bank.flush()
+            with self.assertRaises(CommandError):
+                call_command('import_questions', self.quiz.pk, bank.name,
+                             stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(self.quiz.questions.count(), 1)
@@ -0,0 +1,94 @@
+import io
+import random
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from dashboard import models
+from dashboard.pools import add_questions, draw, draw_questions, pool_size, remove_questions
+
+
+class PoolTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.quiz = models.Quiz.objects.create(
+            quiz_title='title 1', quiz_text='text 1')
+        models.Question.objects.bulk_create(
+            models.Question(question_text=f'question {i}', quiz=cls.quiz)
+            for i in range(100)
+        )
+        cls.questions = models.Question.objects.filter(quiz=cls.quiz).order_by('pk')
+        cls.pool = models.QuestionPool.objects.create(name='pool A')
+        add_questions(cls.pool, cls.questions)
+
+    def positions(self):
+        return sorted(self.pool.memberships.values_list('position', flat=True))
+
+    def test_add_questions(self):
+        self.assertEqual(pool_size(self.pool.pk), 100)
+        self.assertEqual(self.positions(), list(range(100)))
+        # questions already in the pool are skipped
+        self.assertEqual(add_questions(self.pool, self.questions), 0)
+        self.assertEqual(self.pool.questions.count(), 100)
+
+    def test_remove_questions_keeps_positions_dense(self):
+        removed = self.questions.filter(pk__in=[
+            self.questions[3].pk, self.questions[50].pk, self.questions[99].pk])
+        self.assertEqual(remove_questions(self.pool, removed), 3)
+        self.assertEqual(self.positions(), list(range(97)))
+        self.assertFalse(self.pool.questions.filter(pk__in=removed).exists())
+
+    def test_add_questions_fills_gaps(self):
+        # deleted questions leave gaps
+        models.Question.objects.filter(pk=self.questions[10].pk).delete()
+        self.assertEqual(len(self.positions()), 99)
+        question = models.Question.objects.create(question_text='new', quiz=self.quiz)
+        add_questions(self.pool, models.Question.objects.filter(pk=question.pk))
+        self.assertEqual(self.positions(), list(range(100)))
+
+    def test_draw(self):
+        with self.assertNumQueries(2):
+            # the size of the pool, then the drawn positions
+            drawn = draw(self.pool.pk, 10, random.Random(1))
+        self.assertEqual(len(set(drawn)), 10)
+        self.assertTrue(set(drawn) <= set(self.questions.values_list('pk', flat=True)))
+        # the same seed draws the same questions
+        self.assertEqual(draw(self.pool.pk, 10, random.Random(1)), drawn)
+        self.assertNotEqual(draw(self.pool.pk, 10, random.Random(2)), drawn)
+
+    def test_draw_skips_gaps_and_excluded(self):
+        models.Question.objects.filter(pk__in=self.questions.values('pk')[:30]).delete()
+        exclude = list(self.questions.values_list('pk', flat=True)[:20])
+        drawn = draw(self.pool.pk, 20, random.Random(1), exclude=exclude)
+        self.assertEqual(len(set(drawn)), 20)
+        self.assertFalse(set(drawn) & set(exclude))
+        # more than the pool holds
+        self.assertEqual(len(draw(self.pool.pk, 500, random.Random(1))), 70)
+
+    def test_draw_is_uniform(self):
+        counts = dict.fromkeys(self.questions.values_list('pk', flat=True), 0)
+        rng = random.Random(1)
+        for _ in range(500):
+            for question_pk in draw(self.pool.pk, 10, rng):
+                counts[question_pk] += 1
+        # 50 expected draws of every question
+        self.assertGreater(min(counts.values()), 20)
+        self.assertLess(max(counts.values()), 90)
+
+    def test_draw_questions_across_pools(self):
+        pool = models.QuestionPool.objects.create(name='pool B')
+        add_questions(pool, self.questions.filter(
+            pk__in=[question.pk for question in self.questions[:5]]))
+        drawn = draw_questions([(pool.pk, 5), (self.pool.pk, 95)], random.Random(1))
+        self.assertEqual(len(drawn), 100)
+        self.assertEqual(len(set(drawn)), 100)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('pool_questions', 'pool B', '--quiz', self.quiz.pk, stdout=out)
+        self.assertIn('Added 100 questions to "pool B"', out.getvalue())
+        out = io.StringIO()
+        call_command(
+            'pool_questions', 'pool B', '--question', self.questions[0].pk,
+            '--remove', stdout=out)
+        self.assertIn('"pool B" holds 99 questions', out.getvalue())
@@ -0,0 +1,232 @@
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+
+from dashboard.tests.test_forms import batch_data
+from quizproject.query_budget import QueryBudgetTestCase, seed_quizzes, seed_results
+
+
+class DashboardQueryBudgetTest(QueryBudgetTestCase):
+    """
+    Query budgets of every dashboard url, with 20 quizzes of 50 questions
+    """
+    @classmethod
+    def setUpTestData(cls):
+        ### create teacher ###
+        cls.teacher = get_user_model().objects.create_user(
+            email='teacher@test.com', password='asdf7890',)
+        cls.teacher.teacher = True
+        cls.teacher.save()
+
+        cls.quizzes = seed_quizzes(no_of_quizzes=20, no_of_questions=50)
+        cls.quiz = cls.quizzes[0]
+        cls.question = cls.quiz.questions.first()
+        cls.choice = cls.question.choices.first()
+        seed_results(cls.teacher, cls.quizzes, per_quiz=10)
+
+    def setUp(self):
+        self.client.force_login(self.teacher)
+
+    def test_dashboard(self):
+        self.assertQueryBudget(
+            'dash:dashboard', 2, lambda: self.client.get(reverse('dash:dashboard')))
+
+    def test_quiz_list(self):
+        self.assertQueryBudget(
+            'dash:quiz_list', 3, lambda: self.client.get(reverse('dash:quiz_list')))
+
+    def test_quiz_detail(self):
+        self.assertQueryBudget(
+            'dash:quiz_detail', 3,
+            lambda: self.client.get(reverse('dash:quiz_detail', args=[self.quiz.pk])))
+
+    def test_quiz_delete(self):
+        self.assertQueryBudget(
+            'dash:quiz_delete', 3,
+            lambda: self.client.get(reverse('dash:quiz_delete', args=[self.quiz.pk])))
+
+    def test_quiz_delete_post(self):
+        self.assertQueryBudget(
+            'dash:quiz_delete POST', 27,
+            lambda: self.client.post(reverse('dash:quiz_delete', args=[self.quiz.pk])),
+            status_code=302)
+
+    def test_quiz_update(self):
+        self.assertQueryBudget(
+            'dash:quiz_update', 3,
+            lambda: self.client.get(reverse('dash:quiz_update', args=[self.quiz.pk])))
+
+    def test_quiz_update_post(self):
+        self.assertQueryBudget(
+            'dash:quiz_update POST', 5,
+            lambda: self.client.post(
+                reverse('dash:quiz_update', args=[self.quiz.pk]),
+                data={'quiz_text': 'text', 'duration': '00:10:00', 'quiz_title': 'title'}),
+            status_code=302)
+
+    def test_quiz_clone(self):
+        self.assertQueryBudget(
+            'dash:quiz_clone', 3,
+            lambda: self.client.get(reverse('dash:quiz_clone', args=[self.quiz.pk])))
+
+    def test_quiz_clone_post(self):
+        quiz = seed_quizzes(no_of_quizzes=1, no_of_questions=500)[0]
+        # 500 questions take 2 insert batches, their 2000 choices 7; the
+        # search entries one insert each and the duplicate buckets one
+        self.assertQueryBudget(
+            'dash:quiz_clone POST 500 questions', 22,
+            lambda: self.client.post(reverse('dash:quiz_clone', args=[quiz.pk])),
+            status_code=302)
+
+    def test_quiz_questions(self):
+        # the count, one page of questions with their choice counts, the quiz
+        self.assertQueryBudget(
+            'dash:quiz_questions', 5,
+            lambda: self.client.get(reverse('dash:quiz_questions', args=[self.quiz.pk])))
+
+    def test_question_list(self):
+        # the count, one page of questions with their choice counts and
+        # the quizzes to filter by
+        self.assertQueryBudget(
+            'dash:question_list', 5, lambda: self.client.get(reverse('dash:question_list')))
+
+    def test_question_list_deep_page(self):
+        self.assertQueryBudget(
+            'dash:question_list?after', 5,
+            lambda: self.client.get(
+                reverse('dash:question_list'), {'after': self.question.pk + 100}))
+
+    def test_question_detail(self):
+        self.assertQueryBudget(
+            'dash:question_detail', 4,
+            lambda: self.client.get(
+                reverse('dash:question_detail', args=[self.question.pk])))
+
+    def test_question_delete(self):
+        self.assertQueryBudget(
+            'dash:question_delete', 3,
+            lambda: self.client.get(
+                reverse('dash:question_delete', args=[self.question.pk])))
+
+    def test_question_delete_post(self):
+        self.assertQueryBudget(
+            'dash:question_delete POST', 15,
+            lambda: self.client.post(
+                reverse('dash:question_delete', args=[self.question.pk])),
+            status_code=302)
+
+    def test_question_update(self):
+        self.assertQueryBudget(
+            'dash:question_update', 3,
+            lambda: self.client.get(
+                reverse('dash:question_update', args=[self.question.pk])))
+
+    def test_question_update_post(self):
+        self.assertQueryBudget(
+            'dash:question_update POST', 8,
+            lambda: self.client.post(
+                reverse('dash:question_update', args=[self.question.pk]),
+                data={'question_text': 'updated'}),
+            status_code=302)
+
+    def test_choice_update(self):
+        self.assertQueryBudget(
+            'dash:choice_update', 3,
+            lambda: self.client.get(
+                reverse('dash:choice_update', args=[self.choice.pk])))
+
+    def test_choice_update_post(self):
+        self.assertQueryBudget(
+            'dash:choice_update POST', 7,
+            lambda: self.client.post(
+                reverse('dash:choice_update', args=[self.choice.pk]),
+                data={'choice_text': 'updated', 'mark': 'right'}),
+            status_code=302)
+
+    def test_create_quiz(self):
+        self.assertQueryBudget(
+            'dash:create_quiz', 2, lambda: self.client.get(reverse('dash:create_quiz')))
+
+    def test_create_quiz_post(self):
+        self.assertQueryBudget(
+            'dash:create_quiz POST', 4,
+            lambda: self.client.post(
+                reverse('dash:create_quiz'),
+                data={
+                    'quiz_text': 'text', 'duration': '00:10:00',
+                    'quiz_title': 'title', 'finish': 'finish',
+                }),
+            status_code=302)
+
+    def test_create_question_choice(self):
+        self.assertQueryBudget(
+            'dash:create_question_choice', 2,
+            lambda: self.client.get(
+                reverse('dash:create_question_choice', args=[self.quiz.pk])))
+
+    def test_create_question_choice_post(self):
+        data = {
+            'question_text': 'question',
+            'form-TOTAL_FORMS': 4,
+            'form-INITIAL_FORMS': 0,
+            'finish': 'finish',
+        }
+        for i in range(4):
+            data[f'form-{i}-choice_text'] = f'choice {i}'
+            data[f'form-{i}-mark'] = 'right' if i == 0 else 'wrong'
+        self.assertQueryBudget(
+            'dash:create_question_choice POST', 9,
+            lambda: self.client.post(
+                reverse('dash:create_question_choice', args=[self.quiz.pk]), data=data),
+            status_code=302)
+
+    def test_create_question_batch_post(self):
+        # one insert of the questions, their pks, one of the choices, one
+        # of the search entries of each and one of the duplicate buckets
+        self.assertQueryBudget(
+            'dash:create_question_batch POST 50 questions', 11,
+            lambda: self.client.post(
+                reverse('dash:create_question_batch', args=[self.quiz.pk]),
+                data=batch_data(50, 50)),
+            status_code=302)
+
+    def test_import_questions(self):
+        self.assertQueryBudget(
+            'dash:import_questions', 3,
+            lambda: self.client.get(reverse('dash:import_questions', args=[self.quiz.pk])))
+
+    def test_import_questions_post(self):
+        bank = ''.join(
+            f'imported question {i},choice a,choice b,choice c,A\n' for i in range(200))
+        # one insert of the questions, their pks, 2 insert batches of the
+        # choices, the search entries of each, the buckets and 2 queries
+        # looking up duplicates of the bank
+        self.assertQueryBudget(
+            'dash:import_questions POST 200 questions', 14,
+            lambda: self.client.post(
+                reverse('dash:import_questions', args=[self.quiz.pk]),
+                {'file': SimpleUploadedFile('bank.csv', bank.encode())}),
+            status_code=302)
+
+    def test_search(self):
+        # the ranked entry ids, then the entries with what they belong to
+        self.assertQueryBudget(
+            'dash:search', 4,
+            lambda: self.client.get(reverse('dash:search'), {'q': 'question 1'}))
+
+    def test_result_export(self):
+        def export():
+            response = self.client.get(reverse('dash:result_export'))
+            # the rows are only read while the response is streamed
+            b''.join(response.streaming_content)
+            return response
+        self.assertQueryBudget('dash:result_export', 3, export)
+
+    def test_gradebook(self):
+        self.assertQueryBudget(
+            'dash:gradebook', 6, lambda: self.client.get(reverse('dash:gradebook')))
+
+    def test_quiz_trend(self):
+        self.assertQueryBudget(
+            'dash:quiz_trend', 3,
+            lambda: self.client.get(reverse('dash:quiz_trend', args=[self.quiz.pk])))
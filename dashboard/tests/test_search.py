@@ -0,0 +1,181 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from dashboard import models
+from dashboard.importers import import_questions
+from dashboard.search import search, terms_of, fts5_query
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.quiz = models.Quiz.objects.create(
+            quiz_title='Geography', quiz_text='capitals and rivers of Africa')
+        cls.capital = models.Question.objects.create(
+            question_text='What is the capital of Nigeria?', quiz=cls.quiz)
+        cls.abuja = models.Choice.objects.create(
+            choice_text='Abuja', mark='right', question=cls.capital)
+        cls.lagos = models.Choice.objects.create(
+            choice_text='Lagos, the former capital', question=cls.capital)
+        cls.river = models.Question.objects.create(
+            question_text='Which river flows through Abuja and Lagos?', quiz=cls.quiz)
+
+    def texts(self, query, **kwargs):
+        return [entry.text for entry in search(query, **kwargs)]
+
+    def test_terms(self):
+        self.assertEqual(terms_of('Capital, of "Nigeria" OR*'), ['capital', 'of', 'nigeria', 'or'])
+        self.assertEqual(fts5_query(['capital', 'nig']), '"capital" "nig"*')
+
+    def test_entries_are_saved(self):
+        self.assertEqual(models.SearchEntry.objects.count(), 5)
+        entry = self.lagos.search_entry
+        self.assertEqual((entry.kind, entry.question_id), ('choice', self.capital.pk))
+        self.assertEqual(self.quiz.search_entry.kind, 'quiz')
+        self.assertEqual(self.quiz.search_entry.text, 'Geography\ncapitals and rivers of Africa')
+
+    def test_ranked_matches(self):
+        entries = search('capital nigeria')
+        self.assertEqual(entries[0].question, self.capital)
+        self.assertEqual(entries[0].kind, 'question')
+        self.assertGreater(entries[0].rank, 0)
+        # stems match and every term must match
+        self.assertEqual(self.texts('capitals'), self.texts('capital'))
+        self.assertEqual(len(self.texts('capital')), 3)
+        self.assertEqual(self.texts('capital river'), ['Geography\ncapitals and rivers of Africa'])
+
+    def test_prefix_of_last_term(self):
+        self.assertEqual(self.texts('nig'), ['What is the capital of Nigeria?'])
+
+    def test_kind(self):
+        self.assertEqual(self.texts('abuja', kind='choice'), ['Abuja'])
+        self.assertEqual(
+            self.texts('abuja', kind='question'), ['Which river flows through Abuja and Lagos?'])
+        self.assertEqual(len(self.texts('africa', kind='quiz')), 1)
+
+    def test_operators_and_empty_queries(self):
+        self.assertEqual(search(''), [])
+        self.assertEqual(search('"*()'), [])
+        self.assertEqual(self.texts('NEAR(abuja'), self.texts('near abuja'))
+
+    def test_updates_and_deletes_are_indexed(self):
+        choice = models.Choice.objects.get(pk=self.abuja.pk)
+        choice.choice_text = 'Kano'
+        choice.question = self.river
+        choice.save()
+        self.assertEqual(search('abuja', kind='choice'), [])
+        [entry] = search('kano')
+        self.assertEqual(entry.question_id, self.river.pk)
+
+        models.Question.objects.get(pk=self.capital.pk).delete()
+        self.assertEqual(self.texts('nigeria'), [])
+        self.assertEqual(self.texts('former'), [])
+        models.Quiz.objects.get(pk=self.quiz.pk).delete()
+        self.assertFalse(models.SearchEntry.objects.exists())
+        self.assertEqual(search('africa'), [])
+
+    def test_bulk_imports_are_indexed(self):
+        import_questions(self.quiz, io.StringIO('Timbuktu is in?,Mali,Niger,A\n'), 'csv')
+        self.assertEqual(self.texts('timbuktu'), ['Timbuktu is in?'])
+        self.assertEqual(self.texts('mali'), ['Mali'])
+
+    def test_rebuild_command(self):
+        models.SearchEntry.objects.all().delete()
+        self.assertEqual(search('abuja'), [])
+        out = io.StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 5 entries', out.getvalue())
+        self.assertEqual(len(search('abuja')), 2)
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ### create student ###
+        cls.student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+
+        ### create teacher ###
+        cls.teacher = get_user_model().objects.create_user(
+            email='teacher@test.com', password='asdf7890',)
+        cls.teacher.teacher = True
+        cls.teacher.is_staff = True
+        cls.teacher.is_superuser = True
+        cls.teacher.save()
+
+        cls.quiz = models.Quiz.objects.create(quiz_title='Geography', quiz_text='Africa')
+        cls.question = models.Question.objects.create(
+            question_text='What is the capital of Nigeria?', quiz=cls.quiz)
+        models.Choice.objects.create(choice_text='Abuja', question=cls.question)
+        models.Question.objects.create(question_text='Capital of Ghana?', quiz=cls.quiz)
+        models.Question.objects.create(question_text='Capital of Kenya?', quiz=cls.quiz)
+
+    def setUp(self):
+        self.client.login(email='teacher@test.com', password='asdf7890')
+
+    def test_permission(self):
+        self.client.login(email='student@test.com', password='asdf7890')
+        response = self.client.get(reverse('dash:search'), {'q': 'abuja'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_search(self):
+        response = self.client.get(reverse('dash:search'), {'q': 'abuja'})
+        self.assertTemplateUsed(response, 'dashboard/search.html')
+        [match] = response.context['matches']
+        self.assertEqual(match['kind'], 'choice')
+        self.assertEqual(match['url'], self.question.get_absolute_url())
+        self.assertEqual(match['question'], 'What is the capital of Nigeria?')
+        self.assertContains(response, 'Abuja')
+
+    def test_json(self):
+        response = self.client.get(
+            reverse('dash:search'), {'q': 'africa', 'format': 'json'})
+        [match] = response.json()['results']
+        self.assertEqual(match['kind'], 'quiz')
+        self.assertEqual(match['url'], self.quiz.get_absolute_url())
+
+    def test_no_query_and_bad_kind(self):
+        response = self.client.get(reverse('dash:search'))
+        self.assertEqual(response.context['matches'], [])
+        response = self.client.get(reverse('dash:search'), {'q': 'a', 'kind': 'user'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_search_is_ranked(self):
+        response = self.client.get(
+            reverse('admin:dashboard_question_changelist'), {'q': 'capital nigeria'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['cl'].result_list), [self.question])
+        response = self.client.get(
+            reverse('admin:dashboard_question_changelist'), {'q': 'capital'})
+        self.assertEqual(len(response.context['cl'].result_list), 3)
+        response = self.client.get(
+            reverse('admin:dashboard_choice_changelist'), {'q': 'abuja'})
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+
+
+class SearchMigrationTest(TransactionTestCase):
+    def test_existing_bank_is_indexed(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('dashboard', '0002_hot_path_indexes')])
+        apps = executor.loader.project_state(
+            [('dashboard', '0002_hot_path_indexes')]).apps
+        quiz = apps.get_model('dashboard', 'Quiz').objects.create(
+            quiz_title='Geography', quiz_text='capitals of Africa')
+        question = apps.get_model('dashboard', 'Question').objects.create(
+            question_text='What is the capital of Nigeria?', quiz=quiz)
+        apps.get_model('dashboard', 'Choice').objects.create(
+            choice_text='Abuja', mark='right', question=question)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        self.assertEqual(
+            [entry.text for entry in search('abuja')], ['Abuja'])
+        self.assertEqual(
+            [entry.quiz_id for entry in search('geography', kind='quiz')], [quiz.pk])
+        self.assertEqual(len(search('capital')), 2)
@@ -200,3 +200,51 @@ class UrlTest(SimpleTestCase):
         self.assertNotEqual(url, '/dashboard/')
         self.assertNotEqual(resolve(url).func.view_class,
                             views.DashView)
+
+    ### RESULT EXPORT VIEW ###
+
+    def test_result_export_url_resolves_to_result_export_view(self):
+        url = reverse('dash:result_export')
+        self.assertURLEqual(url, '/dashboard/results/export/')
+        self.assertEqual(resolve(url).func.view_class,
+                         views.ResultExportView)
+
+    ### GRADEBOOK VIEW ###
+
+    def test_gradebook_url_resolves_to_gradebook_view(self):
+        url = reverse('dash:gradebook')
+        self.assertURLEqual(url, '/dashboard/gradebook/')
+        self.assertEqual(resolve(url).func.view_class,
+                         views.GradebookView)
+
+    ### QUIZ TREND VIEW ###
+
+    def test_quiz_trend_url_resolves_to_quiz_trend_view(self):
+        url = reverse('dash:quiz_trend', args=[1])
+        self.assertURLEqual(url, '/dashboard/quiz/1/trend/')
+        self.assertEqual(resolve(url).func.view_class,
+                         views.QuizTrendView)
+
+    def test_import_questions_url_resolves_to_import_questions_view(self):
+        url = reverse('dash:import_questions', args=[1])
+        self.assertURLEqual(url, '/dashboard/quiz/1/import/')
+        self.assertEqual(resolve(url).func.view_class,
+                         views.ImportQuestionsView)
+
+    def test_quiz_clone_url_resolves_to_clone_quiz_view(self):
+        url = reverse('dash:quiz_clone', args=[1])
+        self.assertURLEqual(url, '/dashboard/quiz/1/clone/')
+        self.assertEqual(resolve(url).func.view_class,
+                         views.CloneQuizView)
+
+    def test_create_question_batch_url_resolves_to_create_question_batch_view(self):
+        url = reverse('dash:create_question_batch', args=[1])
+        self.assertURLEqual(url, '/dashboard/quiz/1/create_questions/')
+        self.assertEqual(resolve(url).func.view_class,
+                         views.CreateQuestionBatch)
+
+    def test_search_url_resolves_to_search_view(self):
+        url = reverse('dash:search')
+        self.assertURLEqual(url, '/dashboard/search/')
+        self.assertEqual(resolve(url).func.view_class,
+                         views.SearchView)
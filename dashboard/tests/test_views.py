@@ -1,11 +1,21 @@
-from datetime import timedelta
-
+import csv
+import io
+import json
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.contrib.messages import get_messages
 
 from dashboard import models
+from exam.models import Result, ItemStatistic
+from dashboard import gradebook
+from dashboard.tests.test_forms import batch_data
 
 
 class DashViewTest(TestCase):
@@ -152,6 +162,21 @@ class QuizDetailViewTest(TestCase):
         self.assertTrue('quiz' in self.response.context)
         self.assertContains(self.response, 'title')
 
+    def test_without_stats(self):
+        self.assertIsNone(self.response.context['stats'])
+        self.assertContains(self.response, 'Nobody has taken this quiz yet.')
+
+    def test_stats_panel(self):
+        Result.objects.create(
+            percentage=80, user=self.student, quiz=self.quiz, time_spent=timedelta(0))
+        Result.objects.create(
+            percentage=60, user=self.student, quiz=self.quiz, time_spent=timedelta(0))
+        response = self.client.get(
+            reverse('dash:quiz_detail', args=[self.quiz.pk]))
+        self.assertEqual(response.context['stats'].attempts, 2)
+        self.assertContains(response, 'Attempts: 2')
+        self.assertContains(response, 'Average: 70.0%')
+
 
 class QuizDeleteViewTest(TestCase):
     """
@@ -361,6 +386,57 @@ class QuestionListViewTest(TestCase):
         self.assertCountEqual(
             self.response.context['questions'], models.Question.objects.all())
 
+    def test_rows(self):
+        question = models.Question.objects.get(question_text='text 10')
+        models.Choice.objects.create(choice_text='a', question=question)
+        models.Choice.objects.create(choice_text='b', question=question)
+        response = self.client.get(reverse('dash:question_list'))
+        first = response.context['questions'][0]
+        self.assertEqual(first.pk, question.pk)
+        self.assertEqual(first.choice_count, 2)
+        self.assertEqual(first.url, question.get_absolute_url())
+        self.assertEqual(first.update_url, question.get_update_url())
+        self.assertEqual(first.delete_url, question.get_delete_url())
+        self.assertEqual(response.context['question_count'], 10)
+
+    def test_pages(self):
+        other = models.Quiz.objects.create(quiz_text='other', quiz_title='other')
+        models.Question.objects.bulk_create(
+            models.Question(question_text=f'other {i}', quiz=other) for i in range(60))
+        response = self.client.get(reverse('dash:question_list'))
+        self.assertEqual(len(response.context['questions']), 50)
+        self.assertContains(response, f'after={response.context["next_cursor"]}')
+        response = self.client.get(
+            reverse('dash:question_list'), {'after': response.context['next_cursor']})
+        self.assertEqual(len(response.context['questions']), 20)
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(response.context['questions'][-1].question_text, 'text 1')
+
+    def test_filter_by_quiz(self):
+        other = models.Quiz.objects.create(quiz_text='other', quiz_title='other')
+        models.Question.objects.create(question_text='other question', quiz=other)
+        response = self.client.get(reverse('dash:question_list'), {'quiz': other.pk})
+        self.assertEqual(
+            [question.question_text for question in response.context['questions']],
+            ['other question'])
+        self.assertEqual(response.context['question_count'], 1)
+
+    def test_invalid_parameters(self):
+        response = self.client.get(reverse('dash:question_list'), {'after': 'junk'})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('dash:question_list'), {'quiz': 'junk'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_json(self):
+        response = self.client.get(
+            reverse('dash:question_list'), {'format': 'json'})
+        data = response.json()
+        self.assertEqual(data['count'], 10)
+        self.assertIsNone(data['next'])
+        self.assertEqual(data['questions'][0]['text'], 'text 10')
+        self.assertEqual(data['questions'][0]['quiz'], 'title')
+        self.assertEqual(data['questions'][0]['choice_count'], 0)
+
 
 class QuestionDetailViewTest(TestCase):
     """
@@ -409,6 +485,22 @@ class QuestionDetailViewTest(TestCase):
     def test_context_object_name(self):
         self.assertTrue('question' in self.response.context)
 
+    def test_not_analysed(self):
+        self.assertIsNone(self.response.context['item_statistic'])
+        self.assertContains(self.response, 'This question has not been analysed yet.')
+
+    def test_item_analysis_panel(self):
+        choice = models.Choice.objects.create(
+            choice_text='wrong choice', mark='wrong', question=self.question)
+        ItemStatistic.objects.create(
+            question=self.question, attempts=4, difficulty=0.75,
+            discrimination=0.5, choice_rates={str(choice.pk): 0.25})
+        response = self.client.get(
+            reverse('dash:question_detail', args=[self.question.pk]))
+        self.assertEqual(response.context['choice_rates'], [(choice, 0.25)])
+        self.assertContains(response, 'Difficulty: 0.75')
+        self.assertContains(response, '25%')
+
 
 class QuestionDeleteViewTest(TestCase):
     """
@@ -625,6 +717,17 @@ class QuizQuestionsListViewTest(TestCase):
         self.assertCountEqual(
             self.response.context['quiz'].questions.all(), self.quiz.questions.all())
 
+    def test_only_questions_of_the_quiz(self):
+        other = models.Quiz.objects.create(quiz_text='other', quiz_title='other')
+        models.Question.objects.create(question_text='other question', quiz=other)
+        response = self.client.get(reverse('dash:quiz_questions', args=[self.quiz.pk]))
+        self.assertEqual(len(response.context['questions']), 10)
+        self.assertNotContains(response, 'other question')
+
+    def test_missing_quiz(self):
+        response = self.client.get(reverse('dash:quiz_questions', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
 
 class ChoiceUpdateViewTest(TestCase):
     """
@@ -968,3 +1071,467 @@ class CreateQuestionAndChoiceViewTest(TestCase):
         )
         self.assertEqual(response_post.status_code, 200)
         self.assertTemplateUsed(response_post, 'dashboard/create_quiz.html')
+
+
+    def test_choices_saved_with_one_insert(self):
+        data = {
+            'form-0-choice_text': 'choice0',
+            'form-1-choice_text': 'choice1',
+            'form-2-choice_text': 'choice2',
+            'form-3-choice_text': 'choice3',
+            'form-0-mark': 'right',
+            'form-1-mark': 'wrong',
+            'form-2-mark': 'wrong',
+            'form-3-mark': 'wrong',
+            'question_text': 'question text',
+            'form-TOTAL_FORMS': 4,
+            'form-INITIAL_FORMS': 0,
+            'form-MAX_NUM_FORMS': 4,
+            'form-MIN_NUM_FORMS': 0,
+            'finish': True,
+        }
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                reverse('dash:create_question_choice', args=[self.quiz.pk]), data)
+        inserts = [query for query in queries.captured_queries
+                   if query['sql'].startswith('INSERT INTO "dashboard_choice"')]
+        self.assertEqual(len(inserts), 1)
+        question = self.quiz.questions.get()
+        self.assertEqual(question.choices.filter(mark='right').get().choice_text, 'choice0')
+
+
+class CreateQuestionBatchViewTest(TestCase):
+    """
+    Test Create Question Batch View
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client = Client()
+
+        ### create student ###
+        cls.student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+
+        ### create teacher ###
+        cls.teacher = get_user_model().objects.create_user(
+            email='teacher@test.com', password='asdf7890',)
+        cls.teacher.teacher = True
+        cls.teacher.save()
+
+        ### create quiz ###
+        cls.quiz = models.Quiz.objects.create(
+            quiz_text='text', quiz_title='title')
+        cls.url = reverse('dash:create_question_batch', args=[cls.quiz.pk])
+
+    def setUp(self):
+        self.client.login(
+            email='teacher@test.com', password='asdf7890')
+
+    def test_redirect_if_not_logged_in(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertRedirects(
+            response, f'/login/?next=/dashboard/quiz/{self.quiz.pk}/create_questions/')
+
+    def test_logged_in_but_not_correct_permission(self):
+        self.client.login(
+            email='student@test.com', password='asdf7890')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.post(self.url).status_code, 403)
+
+    def test_get(self):
+        response = self.client.get(self.url, {'questions': 8})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'dashboard/create_question_batch.html')
+        self.assertEqual(len(response.context['batch'].blocks), 8)
+        response = self.client.get(self.url, {'questions': 'junk'})
+        self.assertEqual(len(response.context['batch'].blocks), 5)
+
+    def test_save_in_one_transaction(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, batch_data(10, 8))
+        # executemany() is logged as "<n> times: INSERT ..."
+        inserts = [query for query in queries.captured_queries
+                   if 'INSERT INTO' in query['sql']]
+        # one insert of the questions and one of their choices, one of
+        # the search entries of each and one of the duplicate buckets
+        self.assertEqual(len(inserts), 5)
+        self.assertRedirects(response, f'/dashboard/quiz/{self.quiz.pk}/questions/')
+        messages = list(get_messages(response.wsgi_request))
+        self.assertEqual(str(messages[0]), 'SuccessFully Created 8 Questions and Choices')
+        self.assertEqual(self.quiz.questions.count(), 8)
+        self.assertEqual(
+            models.Choice.objects.filter(question__quiz=self.quiz, mark='right').count(), 8)
+
+    def test_invalid_saves_nothing(self):
+        data = batch_data(3, 3)
+        data['choices-2-3-choice_text'] = ''
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(self.quiz.questions.exists())
+
+class ImportQuestionsViewTest(TestCase):
+    """
+    Test Import Questions View
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client = Client()
+
+        ### create student ###
+        cls.student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+
+        ### create teacher ###
+        cls.teacher = get_user_model().objects.create_user(
+            email='teacher@test.com', password='asdf7890',)
+        cls.teacher.teacher = True
+        cls.teacher.save()
+
+        ### create quiz ###
+        cls.quiz = models.Quiz.objects.create(
+            quiz_text='text', quiz_title='title')
+        cls.url = reverse('dash:import_questions', args=[cls.quiz.pk])
+
+    def setUp(self):
+        self.client.login(
+            email='teacher@test.com', password='asdf7890')
+
+    def upload(self, name, text, **data):
+        return self.client.post(self.url, {
+            'file': SimpleUploadedFile(name, text.encode()), **data})
+
+    def test_redirect_if_not_logged_in(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertRedirects(
+            response, f'/login/?next=/dashboard/quiz/{self.quiz.pk}/import/')
+
+    def test_logged_in_but_not_correct_permission(self):
+        self.client.login(
+            email='student@test.com', password='asdf7890')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.post(self.url).status_code, 403)
+
+    def test_get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'dashboard/import_questions.html')
+
+    def test_import_aiken(self):
+        response = self.upload(
+            'bank.txt',
+            'capital of Nigeria?\nA. Lagos\nB. Abuja\nANSWER: B\n\n'
+            '1 + 1?\nA. 2\nB. 3\nANSWER: A\n',
+        )
+        self.assertRedirects(response, f'/dashboard/quiz/{self.quiz.pk}/questions/')
+        messages = list(get_messages(response.wsgi_request))
+        self.assertEqual(str(messages[0]), 'SuccessFully Imported 2 Questions')
+        self.assertEqual(self.quiz.questions.count(), 2)
+
+    def test_format_overrides_extension(self):
+        response = self.upload(
+            'bank.dat', '{"question": "q", "choices": ["a", "b"], "answer": "A"}\n',
+            format='json')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.quiz.questions.count(), 1)
+
+    def test_unknown_format(self):
+        response = self.upload('bank.dat', 'q,a,b,A\n')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error('format'))
+
+    def test_row_errors_are_listed(self):
+        response = self.upload('bank.csv', 'q 1,a,b,A\nq 2,a,A,B\n')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['errors'], [
+            (2, 'choices in a question set must have distinct text.')])
+        self.assertContains(response, 'Line 2: choices in a question set')
+        self.assertFalse(self.quiz.questions.exists())
+
+    def test_file_errors(self):
+        response = self.upload('bank.json', '[{"question"')
+        self.assertTrue(response.context['form'].has_error('file'))
+        response = self.upload('bank.csv', '')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error('file'))
+
+class CloneQuizViewTest(TestCase):
+    """
+    Test Clone Quiz View
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client = Client()
+
+        ### create student ###
+        cls.student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+
+        ### create teacher ###
+        cls.teacher = get_user_model().objects.create_user(
+            email='teacher@test.com', password='asdf7890',)
+        cls.teacher.teacher = True
+        cls.teacher.save()
+
+        ### create quiz with 5 questions ###
+        cls.quiz = models.Quiz.objects.create(
+            quiz_text='text', quiz_title='title')
+        for i in range(5):
+            question = models.Question.objects.create(
+                question_text=f'question {i}', quiz=cls.quiz)
+            models.Choice.objects.create(
+                choice_text='right', mark='right', question=question)
+            models.Choice.objects.create(
+                choice_text='wrong', mark='wrong', question=question)
+        cls.url = reverse('dash:quiz_clone', args=[cls.quiz.pk])
+
+    def setUp(self):
+        self.client.login(
+            email='teacher@test.com', password='asdf7890')
+
+    def test_redirect_if_not_logged_in(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertRedirects(
+            response, f'/login/?next=/dashboard/quiz/{self.quiz.pk}/clone/')
+
+    def test_logged_in_but_not_correct_permission(self):
+        self.client.login(
+            email='student@test.com', password='asdf7890')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.post(self.url).status_code, 403)
+
+    def test_get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'dashboard/clone_quiz.html')
+
+    def test_clone(self):
+        response = self.client.post(self.url)
+        copy = models.Quiz.objects.latest('pk')
+        self.assertRedirects(response, copy.get_absolute_url())
+        self.assertEqual(copy.quiz_title, 'title (copy)')
+        self.assertEqual(copy.questions.count(), 5)
+        messages = list(get_messages(response.wsgi_request))
+        self.assertEqual(str(messages[0]), 'Successfully Copied title to title (copy)')
+
+    def test_clone_subset_as_json(self):
+        response = self.client.post(self.url, {
+            'quiz_title': 'term 2', 'no_of_questions': 2, 'shuffle': 'on',
+            'format': 'json'})
+        self.assertEqual(response.status_code, 201)
+        copy = models.Quiz.objects.get(pk=response.json()['id'])
+        self.assertEqual(response.json()['url'], copy.get_absolute_url())
+        self.assertEqual(copy.quiz_title, 'term 2')
+        self.assertEqual(copy.questions.count(), 2)
+
+    def test_invalid(self):
+        response = self.client.post(self.url, {'no_of_questions': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error('no_of_questions'))
+        response = self.client.post(self.url, {'no_of_questions': 0, 'format': 'json'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('no_of_questions', response.json()['errors'])
+        self.assertEqual(models.Quiz.objects.count(), 1)
+
+    def test_missing_quiz(self):
+        response = self.client.post(reverse('dash:quiz_clone', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+class ResultExportViewTest(TestCase):
+    """
+    Test Result Export View
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.client = Client()
+
+        ### create student ###
+        cls.student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+
+        ### create teacher ###
+        cls.teacher = get_user_model().objects.create_user(
+            email='teacher@test.com', password='asdf7890',)
+        cls.teacher.teacher = True
+        cls.teacher.save()
+
+        cls.quiz = models.Quiz.objects.create(
+            quiz_text='text', quiz_title='title, with comma')
+        cls.other_quiz = models.Quiz.objects.create(
+            quiz_text='text', quiz_title='other')
+        for day, quiz in ((1, cls.quiz), (2, cls.quiz), (3, cls.other_quiz)):
+            Result.objects.create(
+                percentage=day * 10, user=cls.student, quiz=quiz,
+                time_spent=timedelta(minutes=day), date=date(2020, 10, day))
+
+    def setUp(self):
+        self.client.login(
+            email='teacher@test.com', password='asdf7890')
+
+    def export(self, **params):
+        response = self.client.get(reverse('dash:result_export'), params)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_student_forbidden(self):
+        self.client.login(
+            email='student@test.com', password='asdf7890')
+        response = self.client.get(reverse('dash:result_export'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_csv(self):
+        response, content = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0][:3], ['id', 'date', 'email'])
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][1:3], ['2020-10-01', 'student@test.com'])
+        self.assertEqual(rows[1][4], 'title, with comma')
+        self.assertEqual(rows[1][6], '60')
+
+    def test_ndjson_filtered(self):
+        response, content = self.export(
+            format='ndjson', quiz=self.quiz.pk, date_from='2020-10-02')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]['percentage'], 20)
+        self.assertEqual(lines[0]['quiz'], 'title, with comma')
+
+    def test_invalid_filters(self):
+        response = self.client.get(
+            reverse('dash:result_export'),
+            {'date_from': '2020-10-03', 'date_to': '2020-10-01'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('dash:result_export'), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+class GradebookViewTest(TestCase):
+    """
+    Test Gradebook View
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.client = Client()
+
+        ### create students ###
+        cls.students = [
+            get_user_model().objects.create_user(
+                email=f'student{i}@test.com', password='asdf7890')
+            for i in range(3)
+        ]
+
+        ### create teacher ###
+        cls.teacher = get_user_model().objects.create_user(
+            email='teacher@test.com', password='asdf7890',)
+        cls.teacher.teacher = True
+        cls.teacher.save()
+
+        cls.quizzes = [
+            models.Quiz.objects.create(quiz_text='text', quiz_title=f'quiz {i}')
+            for i in range(2)
+        ]
+        for percentage, day in ((40, 1), (90, 2), (60, 3)):
+            Result.objects.create(
+                percentage=percentage, user=cls.students[0], quiz=cls.quizzes[0],
+                time_spent=timedelta(0), date=date(2020, 10, day))
+        Result.objects.create(
+            percentage=70, user=cls.students[1], quiz=cls.quizzes[1],
+            time_spent=timedelta(0))
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(
+            email='teacher@test.com', password='asdf7890')
+
+    def test_student_forbidden(self):
+        self.client.login(
+            email='student0@test.com', password='asdf7890')
+        response = self.client.get(reverse('dash:gradebook'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_best_and_latest(self):
+        response = self.client.get(reverse('dash:gradebook'))
+        self.assertTemplateUsed(response, 'dashboard/gradebook.html')
+        self.assertEqual(response.context['quizzes'], ['quiz 0', 'quiz 1'])
+        self.assertEqual(response.context['rows'], [
+            ('student0@test.com', [(90, 60), None]),
+            ('student1@test.com', [None, (70, 70)]),
+            ('student2@test.com', [None, None]),
+        ])
+
+    def test_cached_until_results_change(self):
+        self.client.get(reverse('dash:gradebook'))
+        with self.assertNumQueries(2):
+            # only the session and the user
+            self.client.get(reverse('dash:gradebook'))
+        Result.objects.create(
+            percentage=100, user=self.students[2], quiz=self.quizzes[0],
+            time_spent=timedelta(0))
+        response = self.client.get(reverse('dash:gradebook'))
+        self.assertEqual(response.context['rows'][2][1][0], (100, 100))
+
+    def test_paginated_by_student(self):
+        page = gradebook.get_page(2, per_page=2)
+        self.assertEqual(page['num_pages'], 2)
+        self.assertEqual([email for email, _ in page['rows']], ['student2@test.com'])
+
+
+class QuizTrendViewTest(TestCase):
+    """
+    Test Quiz Trend View
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.client = Client()
+
+        ### create student ###
+        cls.student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+
+        ### create teacher ###
+        cls.teacher = get_user_model().objects.create_user(
+            email='teacher@test.com', password='asdf7890',)
+        cls.teacher.teacher = True
+        cls.teacher.save()
+
+        cls.quiz = models.Quiz.objects.create(quiz_text='text', quiz_title='title')
+        for percentage, day in ((40, 1), (80, 1), (50, 3)):
+            Result.objects.create(
+                percentage=percentage, user=cls.student, quiz=cls.quiz,
+                time_spent=timedelta(minutes=1), date=date(2020, 10, day))
+
+    def setUp(self):
+        self.client.login(
+            email='teacher@test.com', password='asdf7890')
+
+    def test_student_forbidden(self):
+        self.client.login(
+            email='student@test.com', password='asdf7890')
+        response = self.client.get(reverse('dash:quiz_trend', args=[self.quiz.pk]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_days_from_rollups(self):
+        with self.assertNumQueries(3):
+            # session, user and the rollups
+            response = self.client.get(reverse('dash:quiz_trend', args=[self.quiz.pk]))
+        self.assertEqual(response.json()['days'], [
+            {'date': '2020-10-01', 'results': 2, 'average_percentage': 60,
+             'average_time_spent': 60},
+            {'date': '2020-10-03', 'results': 1, 'average_percentage': 50,
+             'average_time_spent': 60},
+        ])
+
+    def test_date_range(self):
+        response = self.client.get(
+            reverse('dash:quiz_trend', args=[self.quiz.pk]), {'date_from': '2020-10-02'})
+        self.assertEqual(len(response.json()['days']), 1)
+        response = self.client.get(
+            reverse('dash:quiz_trend', args=[self.quiz.pk]), {'date_from': 'junk'})
+        self.assertEqual(response.status_code, 400)
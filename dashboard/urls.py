@@ -12,10 +12,14 @@ urlpatterns = [
     ### quiz url ###
     path('quizzes/', views.QuizListView.as_view(), name='quiz_list'),
     path('quiz/<int:pk>/', views.QuizDetailView.as_view(), name='quiz_detail'),
+    path('quiz/<int:pk>/trend/',
+         views.QuizTrendView.as_view(), name='quiz_trend'),
     path('quiz/<int:pk>/delete/',
          views.QuizDeleteView.as_view(), name='quiz_delete'),
     path('quiz/<int:pk>/update/',
          views.QuizUpdateView.as_view(), name='quiz_update'),
+    path('quiz/<int:pk>/clone/',
+         views.CloneQuizView.as_view(), name='quiz_clone'),
 
     ### question for quiz ###
     path('quiz/<int:pk>/questions/',
@@ -30,13 +34,25 @@ urlpatterns = [
     path('question/<int:pk>/update/',
          views.QuestionUpdateView.as_view(), name='question_update'),
 
+    ### search ###
+    path('search/', views.SearchView.as_view(), name='search'),
+
     ### choice ###
     path('choice/<int:pk>/update/',
          views.ChoiceUpdateView.as_view(), name='choice_update'),
 
+    ### results ###
+    path('results/export/',
+         views.ResultExportView.as_view(), name='result_export'),
+    path('gradebook/', views.GradebookView.as_view(), name='gradebook'),
+
     # Create Quiz
     path('create_quiz/', views.CreateQuiz.as_view(), name='create_quiz'),
     path('quiz/<int:pk>/create_question_choice/',
-         views.CreateQuestionAndChoice.as_view(), name='create_question_choice')
+         views.CreateQuestionAndChoice.as_view(), name='create_question_choice'),
+    path('quiz/<int:pk>/create_questions/',
+         views.CreateQuestionBatch.as_view(), name='create_question_batch'),
+    path('quiz/<int:pk>/import/',
+         views.ImportQuestionsView.as_view(), name='import_questions'),
 
 ]
@@ -1,3 +1,5 @@
+import codecs
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.messages.views import SuccessMessageMixin
@@ -6,13 +8,29 @@ from django.core.exceptions import PermissionDenied
 from django.views import generic, View
 from django.urls import reverse_lazy, reverse
 from django.contrib import messages
-from django.http import HttpResponse
-from django.forms import formset_factory
+from django.http import (
+    HttpResponse, HttpResponseBadRequest, StreamingHttpResponse, JsonResponse,
+    Http404)
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 
 from .models import Quiz, Choice, Question
-from .forms import QuizForm, QuestionForm, ChoiceForm, BaseChoiceFormSet
+from .forms import (
+    QuizForm, QuestionForm, DateRangeForm,
+    ResultExportForm, ImportQuestionsForm, CloneQuizForm, ChoiceFormSet,
+    QuestionBatch, MAX_BATCH_QUESTIONS)
+from .cloning import clone_quiz
+from .duplicates import find_duplicates
+from .search import index_choices, search
+from .importers import (
+    ImportFileError, format_of, import_questions, bulk_create_questions)
+from .export import export_queryset, export_rows, csv_lines, ndjson_lines
+from . import gradebook
 from exam.views import clearSessionWithoutLoggingOut
+from exam.grading import invalidate_answer_key
+from exam.models import DailyQuizRollup
 
 
 class DashView(LoginRequiredMixin, View):
@@ -22,7 +40,7 @@ class DashView(LoginRequiredMixin, View):
 
 
 class QuizListView(LoginRequiredMixin, UserPassesTestMixin, generic.ListView):
-    model = Quiz
+    queryset = Quiz.objects.annotate(question_count=Count('questions'))
     template_name = "dashboard/quiz_list.html"
     context_object_name = 'quizzes'
 
@@ -35,10 +53,16 @@ class QuizListView(LoginRequiredMixin, UserPassesTestMixin, generic.ListView):
 
 ##### quiz #####
 class QuizDetailView(LoginRequiredMixin, UserPassesTestMixin, generic.DetailView):
-    model = Quiz
+    queryset = Quiz.objects.select_related('stats')
     template_name = "dashboard/quiz_detail.html"
     context_object_name = 'quiz'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # quizzes nobody has taken yet have no stats
+        context['stats'] = getattr(self.object, 'stats', None)
+        return context
+
     def test_func(self):
         user = self.request.user
         if not user.teacher:
@@ -46,6 +70,41 @@ class QuizDetailView(LoginRequiredMixin, UserPassesTestMixin, generic.DetailView
         return True
 
 
+class QuizTrendView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    chart data of a quiz, one point per day, read from the daily rollups
+    alone, e.g. /dashboard/quiz/1/trend/?date_from=2020-10-01
+    """
+
+    def test_func(self):
+        user = self.request.user
+        if not user.teacher:
+            raise PermissionDenied
+        return True
+
+    def get(self, request, *args, **kwargs):
+        form = DateRangeForm(request.GET)
+        if not form.is_valid():
+            return HttpResponseBadRequest(form.errors.as_text())
+        rollups = DailyQuizRollup.objects.filter(quiz_id=kwargs['pk'])
+        if form.cleaned_data['date_from']:
+            rollups = rollups.filter(date__gte=form.cleaned_data['date_from'])
+        if form.cleaned_data['date_to']:
+            rollups = rollups.filter(date__lte=form.cleaned_data['date_to'])
+        return JsonResponse({
+            'quiz': kwargs['pk'],
+            'days': [
+                {
+                    'date': rollup.date,
+                    'results': rollup.results,
+                    'average_percentage': round(rollup.average_percentage, 2),
+                    'average_time_spent': round(rollup.average_time_spent, 2),
+                }
+                for rollup in rollups.order_by('date')
+            ],
+        })
+
+
 class QuizDeleteView(
     LoginRequiredMixin,
     UserPassesTestMixin,
@@ -86,11 +145,76 @@ class QuizUpdateView(
         return True
 
 
+
+class CloneQuizView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    copies a quiz with its questions and choices, whole, shuffled or a
+    random subset. Posted with format=json it answers with the copy
+    instead of redirecting to it.
+    """
+    template_name = 'dashboard/clone_quiz.html'
+
+    def test_func(self):
+        user = self.request.user
+        if not user.teacher:
+            raise PermissionDenied
+        return True
+
+    def get(self, request, *args, **kwargs):
+        quiz = get_object_or_404(Quiz, pk=kwargs['pk'])
+        context = {'quiz': quiz, 'form': CloneQuizForm()}
+        return render(request, self.template_name, context)
+
+    def post(self, request, *args, **kwargs):
+        quiz = get_object_or_404(Quiz, pk=kwargs['pk'])
+        form = CloneQuizForm(request.POST)
+        as_json = request.POST.get('format') == 'json'
+        if not form.is_valid():
+            if as_json:
+                return JsonResponse({'errors': form.errors}, status=400)
+            return render(request, self.template_name, {'quiz': quiz, 'form': form})
+        copy = clone_quiz(
+            quiz,
+            quiz_title=form.cleaned_data['quiz_title'],
+            no_of_questions=form.cleaned_data['no_of_questions'],
+            shuffle=form.cleaned_data['shuffle'],
+        )
+        if as_json:
+            return JsonResponse({
+                'id': copy.pk,
+                'title': copy.quiz_title,
+                'url': copy.get_absolute_url(),
+            }, status=201)
+        messages.success(request, f'Successfully Copied {quiz} to {copy}')
+        return redirect(copy.get_absolute_url())
+
 ###### QUESTION ######
+def duplicate_list(questions):
+    """names like questions in a message"""
+    return ', '.join(
+        f'"{question.question_text}" of {question.quiz.quiz_title}'
+        for question in questions)
+
+
+def pk_url_format(viewname):
+    """
+    the url of a view taking one pk as a format string, e.g.
+    '/dashboard/question/{}/', so the urls of a page of rows are built
+    without a reverse() per row
+    """
+    return reverse(viewname, args=[0]).replace('/0/', '/{}/')
+
+
 class QuestionListView(LoginRequiredMixin, UserPassesTestMixin, generic.ListView):
-    model = Question
+    """
+    the question bank, newest first, with the number of choices of each
+    question. Filtered by ?quiz=<pk> and paged by the `after` cursor, the
+    id of the last question of the previous page; ?format=json answers
+    with the page as JSON.
+    """
     template_name = "dashboard/question_list.html"
     context_object_name = 'questions'
+    paginate_by = 50
 
     def test_func(self):
         user = self.request.user
@@ -98,12 +222,104 @@ class QuestionListView(LoginRequiredMixin, UserPassesTestMixin, generic.ListView
             raise PermissionDenied
         return True
 
+    def int_param(self, name):
+        value = self.request.GET.get(name)
+        if not value:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise Http404(f'Invalid {name}')
+
+    def get_quiz_pk(self):
+        return self.int_param('quiz')
+
+    def get_queryset(self):
+        questions = Question.objects.all()
+        self.quiz_pk = self.get_quiz_pk()
+        if self.quiz_pk is not None:
+            questions = questions.filter(quiz_id=self.quiz_pk)
+        return questions
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        pages by id from the `after` cursor instead of by offset, so a
+        deep page of a large bank costs the same as the first one
+        """
+        self.question_count = queryset.count()
+        after = self.int_param('after')
+        if after is not None:
+            queryset = queryset.filter(pk__lt=after)
+        # a correlated count is only run for the rows of the page, where a
+        # join grouped by question would count the choices of the bank
+        choice_count = Choice.objects.filter(
+            question=OuterRef('pk')).order_by().values('question').annotate(
+            count=Count('pk')).values('count')
+        questions = list(queryset.annotate(
+            choice_count=Coalesce(Subquery(choice_count), 0)).select_related(
+            'quiz').order_by('-pk')[:page_size + 1])
+        self.next_cursor = None
+        if len(questions) > page_size:
+            questions = questions[:page_size]
+            self.next_cursor = questions[-1].pk
+        urls = [
+            (name, pk_url_format(viewname)) for name, viewname in (
+                ('url', 'dash:question_detail'),
+                ('update_url', 'dash:question_update'),
+                ('delete_url', 'dash:question_delete'),
+            )
+        ]
+        for question in questions:
+            for name, url_format in urls:
+                setattr(question, name, url_format.format(question.pk))
+        return None, None, questions, self.next_cursor is not None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.next_cursor
+        context['question_count'] = self.question_count
+        context['quiz_pk'] = self.quiz_pk
+        context['quiz_choices'] = Quiz.objects.order_by(
+            'quiz_title').values_list('pk', 'quiz_title')
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.GET.get('format') != 'json':
+            return super().render_to_response(context, **response_kwargs)
+        return JsonResponse({
+            'questions': [
+                {
+                    'id': question.pk,
+                    'text': question.question_text,
+                    'quiz_id': question.quiz_id,
+                    'quiz': question.quiz.quiz_title,
+                    'choice_count': question.choice_count,
+                    'url': question.url,
+                }
+                for question in context['questions']
+            ],
+            'count': self.question_count,
+            'next': self.next_cursor,
+        })
+
 
 class QuestionDetailView(LoginRequiredMixin, generic.DetailView):
-    model = Question
+    queryset = Question.objects.select_related('quiz', 'item_statistic')
     template_name = "dashboard/question_detail.html"
     context_object_name = 'question'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # questions are analysed by the analyse_items command
+        statistic = getattr(self.object, 'item_statistic', None)
+        context['item_statistic'] = statistic
+        if statistic is not None:
+            context['choice_rates'] = [
+                (choice, statistic.rate_of(choice.pk))
+                for choice in self.object.choices.all()
+            ]
+        return context
+
 
 class QuestionDeleteView(
     LoginRequiredMixin,
@@ -148,22 +364,17 @@ class QuestionUpdateView(
         return True
 
 
-class QuizQuestionsListView(
-    LoginRequiredMixin,
-    UserPassesTestMixin,
-    generic.ListView
-):
+class QuizQuestionsListView(QuestionListView):
+    """the question bank of one quiz"""
     template_name = "dashboard/quiz_question_list.html"
-    context_object_name = 'quiz'
 
-    def get_queryset(self):
-        return Quiz.objects.get(pk=self.kwargs['pk'])    
+    def get_quiz_pk(self):
+        return self.kwargs['pk']
 
-    def test_func(self):
-        user = self.request.user
-        if not user.teacher:
-            raise PermissionDenied
-        return True
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['quiz'] = get_object_or_404(Quiz, pk=self.quiz_pk)
+        return context
 
 
 class ChoiceUpdateView(
@@ -178,9 +389,7 @@ class ChoiceUpdateView(
     template_name = "dashboard/dash_form.html"
 
     def get_success_url(self):
-        question_pk = Choice.objects.get(
-            pk=self.kwargs['pk']).question.pk
-        return reverse('dash:question_detail', args=[question_pk])
+        return reverse('dash:question_detail', args=[self.object.question_id])
 
     def test_func(self):
         user = self.request.user
@@ -231,7 +440,7 @@ class CreateQuestionAndChoice(
     UserPassesTestMixin,
     generic.edit.FormView
 ):
-    ChoiceFormSet = formset_factory(ChoiceForm, extra=4, max_num=4, formset=BaseChoiceFormSet )
+    ChoiceFormSet = ChoiceFormSet
 
     def get(self, request, *args, **kwargs):
         context = {
@@ -255,10 +464,22 @@ class CreateQuestionAndChoice(
             quiz = Quiz.objects.get(pk=kwargs['pk'])
             questionform.quiz = quiz
             questionform.save()
+            choices = []
             for form in formset:
                 instance = form.save(commit=False)
                 instance.question = questionform
-                instance.save()
+                choices.append(instance)
+            Choice.objects.bulk_create(choices)
+            # bulk_create sends no signals
+            index_choices(questionform.choices.all())
+            invalidate_answer_key(quiz.pk)
+            duplicates = find_duplicates(
+                questionform.question_text, exclude_pk=questionform.pk)
+            if duplicates:
+                messages.warning(
+                    request,
+                    f'This question looks like {duplicate_list(duplicates)}'
+                )
             if request.POST.get('finish', None):
                 messages.success(
                     request, 'SuccessFully Created Question and Choices')
@@ -276,3 +497,187 @@ class CreateQuestionAndChoice(
         if not user.teacher:
             raise PermissionDenied
         return True
+
+
+
+class CreateQuestionBatch(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    authoring of several questions with their choices on one page, e.g.
+    /dashboard/quiz/1/create_questions/?questions=10. Everything is
+    validated together and saved in one transaction.
+    """
+    template_name = 'dashboard/create_question_batch.html'
+
+    def test_func(self):
+        user = self.request.user
+        if not user.teacher:
+            raise PermissionDenied
+        return True
+
+    def no_of_questions(self):
+        try:
+            no_of_questions = int(self.request.GET.get('questions', 5))
+        except ValueError:
+            no_of_questions = 5
+        return min(max(no_of_questions, 1), MAX_BATCH_QUESTIONS)
+
+    def get(self, request, *args, **kwargs):
+        quiz = get_object_or_404(Quiz, pk=kwargs['pk'])
+        context = {
+            'quiz': quiz,
+            'batch': QuestionBatch(no_of_questions=self.no_of_questions()),
+        }
+        return render(request, self.template_name, context)
+
+    def post(self, request, *args, **kwargs):
+        quiz = get_object_or_404(Quiz, pk=kwargs['pk'])
+        batch = QuestionBatch(request.POST)
+        if not batch.is_valid():
+            return render(request, self.template_name, {'quiz': quiz, 'batch': batch})
+        items = batch.items()
+        with transaction.atomic():
+            bulk_create_questions(quiz, items)
+        messages.success(
+            request, f'SuccessFully Created {len(items)} Questions and Choices')
+        return redirect(reverse('dash:quiz_questions', args=[quiz.pk]))
+
+class ImportQuestionsView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    imports the questions of a CSV, JSON, Aiken or GIFT file into a quiz.
+    Nothing is saved when any question has an error; the errors are
+    listed with their lines instead.
+    """
+    template_name = 'dashboard/import_questions.html'
+
+    def test_func(self):
+        user = self.request.user
+        if not user.teacher:
+            raise PermissionDenied
+        return True
+
+    def get(self, request, *args, **kwargs):
+        quiz = get_object_or_404(Quiz, pk=kwargs['pk'])
+        context = {'quiz': quiz, 'form': ImportQuestionsForm()}
+        return render(request, self.template_name, context)
+
+    def post(self, request, *args, **kwargs):
+        quiz = get_object_or_404(Quiz, pk=kwargs['pk'])
+        form = ImportQuestionsForm(request.POST, request.FILES)
+        context = {'quiz': quiz, 'form': form}
+        if not form.is_valid():
+            return render(request, self.template_name, context)
+        upload = form.cleaned_data['file']
+        file_format = form.cleaned_data['format'] or format_of(upload.name)
+        if file_format is None:
+            form.add_error(
+                'format', 'the format could not be told from the file name.')
+            return render(request, self.template_name, context)
+        try:
+            # the upload is decoded and parsed a line at a time
+            imported, errors, duplicates = import_questions(
+                quiz, codecs.iterdecode(upload, 'utf-8-sig'), file_format)
+        except ImportFileError as error:
+            form.add_error('file', str(error))
+            return render(request, self.template_name, context)
+        if errors:
+            context['errors'] = errors
+            return render(request, self.template_name, context)
+        messages.success(request, f'SuccessFully Imported {imported} Questions')
+        if duplicates:
+            examples = '; '.join(
+                f'line {line} like {duplicate_list([question])}'
+                for line, question in duplicates[:5])
+            messages.warning(
+                request,
+                f'{len(duplicates)} of them look like questions already saved: {examples}'
+            )
+        return redirect(reverse('dash:quiz_questions', args=[quiz.pk]))
+
+
+class SearchView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    ranked full-text search of quizzes, questions and choices, e.g.
+    /dashboard/search/?q=capital&kind=question; ?format=json answers with
+    the matches as JSON
+    """
+    template_name = 'dashboard/search.html'
+
+    def test_func(self):
+        user = self.request.user
+        if not user.teacher:
+            raise PermissionDenied
+        return True
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get('q', '').strip()
+        kind = request.GET.get('kind') or None
+        if kind not in (None, 'quiz', 'question', 'choice'):
+            return HttpResponseBadRequest('kind must be quiz, question or choice.')
+        quiz_url = pk_url_format('dash:quiz_detail')
+        question_url = pk_url_format('dash:question_detail')
+        matches = []
+        for entry in search(query, kind=kind) if query else []:
+            if entry.quiz_id is not None:
+                quiz, url = entry.quiz, quiz_url.format(entry.quiz_id)
+            else:
+                quiz, url = entry.question.quiz, question_url.format(entry.question_id)
+            matches.append({
+                'kind': entry.kind,
+                'text': entry.text,
+                'quiz': quiz.quiz_title,
+                'question': entry.question.question_text if entry.kind == 'choice' else None,
+                'url': url,
+                'rank': entry.rank,
+            })
+        if request.GET.get('format') == 'json':
+            return JsonResponse({'query': query, 'results': matches})
+        context = {'query': query, 'kind': kind, 'matches': matches}
+        return render(request, self.template_name, context)
+
+##### results #####
+class ResultExportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    streams results as CSV or NDJSON, filtered by quiz and date range,
+    e.g. /dashboard/results/export/?quiz=1&date_from=2020-10-01&format=ndjson
+    """
+    content_types = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+    }
+
+    def test_func(self):
+        user = self.request.user
+        if not user.teacher:
+            raise PermissionDenied
+        return True
+
+    def get(self, request, *args, **kwargs):
+        form = ResultExportForm(request.GET)
+        if not form.is_valid():
+            return HttpResponseBadRequest(form.errors.as_text())
+        export_format = form.cleaned_data['format'] or 'csv'
+        rows = export_rows(export_queryset(
+            quiz=form.cleaned_data['quiz'],
+            date_from=form.cleaned_data['date_from'],
+            date_to=form.cleaned_data['date_to'],
+        ))
+        lines = csv_lines(rows) if export_format == 'csv' else ndjson_lines(rows)
+        response = StreamingHttpResponse(
+            lines, content_type=self.content_types[export_format])
+        response['Content-Disposition'] = (
+            f'attachment; filename="results.{export_format}"')
+        return response
+
+
+class GradebookView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """the best and latest percentage of each student on each quiz"""
+
+    def test_func(self):
+        user = self.request.user
+        if not user.teacher:
+            raise PermissionDenied
+        return True
+
+    def get(self, request, *args, **kwargs):
+        context = gradebook.get_page(request.GET.get('page'))
+        return render(request, 'dashboard/gradebook.html', context)
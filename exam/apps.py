@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ExamConfig(AppConfig):
     name = 'exam'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,63 @@
+"""
+archival of old results.
+
+Results older than settings.RESULT_ARCHIVE_AFTER_DAYS are copied to the
+ArchivedResult table and deleted from Result in batches, each batch in
+its own transaction, so the Result table only holds recent results and
+a long archive run never holds a lock for long.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from dashboard.gradebook import bump_results_version
+from .models import Result, ArchivedResult
+from . import signals
+
+
+ARCHIVED_FIELDS = (
+    'id', 'percentage', 'user_id', 'time_spent', 'no_of_questions_answered',
+    'no_of_correct_choices_answered', 'no_of_questions', 'quiz_id', 'date',
+)
+
+
+def archive_cutoff(days=None):
+    """the first day of results that stay in the Result table"""
+    if days is None:
+        days = settings.RESULT_ARCHIVE_AFTER_DAYS
+    return timezone.localdate() - timedelta(days=days)
+
+
+def archive_batch(before, batch_size=1000):
+    """moves up to `batch_size` results dated before `before`"""
+    with transaction.atomic():
+        rows = list(Result.objects.filter(date__lt=before).order_by(
+            'pk').values_list(*ARCHIVED_FIELDS)[:batch_size])
+        if not rows:
+            return 0
+        archived_at = timezone.now()
+        ArchivedResult.objects.bulk_create(
+            ArchivedResult(archived_at=archived_at, **dict(zip(ARCHIVED_FIELDS, row)))
+            for row in rows
+        )
+        pks = [row[0] for row in rows]
+        signals.archiving.update(pks)
+        try:
+            Result.objects.filter(pk__in=pks).delete()
+        finally:
+            signals.archiving.difference_update(pks)
+    bump_results_version()
+    return len(rows)
+
+
+def archive_results(before=None, batch_size=1000):
+    """archives every result dated before `before`, the cutoff by default"""
+    before = before or archive_cutoff()
+    archived = 0
+    while True:
+        moved = archive_batch(before, batch_size)
+        if not moved:
+            return archived
+        archived += moved
@@ -0,0 +1,73 @@
+"""
+helpers shared by the benchmark management commands.
+
+Every benchmark seeds its own data inside a transaction that is rolled
+back afterwards, so running one against a real database leaves no rows
+behind.
+"""
+import time
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from dashboard.models import Quiz, Question, Choice
+from .grading import invalidate_answer_key
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """runs the block in a transaction that is always rolled back"""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def seed_quiz(no_of_questions, no_of_choices=4, title='benchmark'):
+    """
+    creates a quiz with `no_of_questions` questions, each with one right
+    and `no_of_choices - 1` wrong choices, and returns the quiz together
+    with the pks of its right choices.
+    """
+    quiz = Quiz.objects.create(quiz_title=title, quiz_text=title)
+    Question.objects.bulk_create(
+        Question(question_text=f'question {i}', quiz=quiz)
+        for i in range(no_of_questions)
+    )
+    question_pks = Question.objects.filter(
+        quiz=quiz).order_by('pk').values_list('pk', flat=True)
+    Choice.objects.bulk_create(
+        Choice(
+            choice_text=f'choice {i}',
+            mark='right' if i == 0 else 'wrong',
+            question_id=question_pk,
+        )
+        for question_pk in question_pks
+        for i in range(no_of_choices)
+    )
+    # bulk_create sends no signals, so drop any key cached for this pk
+    invalidate_answer_key(quiz.pk)
+    right_choices = list(Choice.objects.filter(
+        question__quiz=quiz, mark='right').values_list('pk', flat=True))
+    return quiz, right_choices
+
+
+def measure(func, *args, repeat=5, **kwargs):
+    """
+    calls `func` `repeat` times and returns the number of queries of one
+    call and the best wall-clock time in milliseconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            func(*args, **kwargs)
+            timings.append((time.perf_counter() - start) * 1000)
+    return len(queries), min(timings)
@@ -0,0 +1,181 @@
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from dashboard.models import Choice, Question
+from quizproject.versions import get_version, bump_version
+from .models import Result, Answer
+
+
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+
+
+def _answer_key_version_key(quiz_pk):
+    return f'exam:answer-key-version:{quiz_pk}'
+
+
+def _answer_key_version(quiz_pk):
+    return get_version(_answer_key_version_key(quiz_pk))
+
+
+def _bump_answer_key_version(quiz_pk):
+    bump_version(_answer_key_version_key(quiz_pk))
+
+
+def compile_answer_key(quiz_pk=None, question_pks=None):
+    """
+    builds the answer key of a quiz, or of the given questions only, with
+    two queries.
+
+    The key holds everything grading and the result sheet need:
+    question texts, every choice with its question and text, the right
+    choice of each question and the number of questions.
+    """
+    if question_pks is None:
+        question_rows = Question.objects.filter(quiz__pk=quiz_pk)
+        choice_rows = Choice.objects.filter(question__quiz__pk=quiz_pk)
+    else:
+        question_rows = Question.objects.filter(pk__in=question_pks)
+        choice_rows = Choice.objects.filter(question_id__in=question_pks)
+    questions = dict(question_rows.values_list('pk', 'question_text'))
+    choices = {}
+    answers = {}
+    right_choices = set()
+    for choice_pk, question_pk, choice_text, mark in choice_rows.values_list(
+            'pk', 'question_id', 'choice_text', 'mark').order_by('pk'):
+        choices[choice_pk] = (question_pk, choice_text)
+        if mark == 'right':
+            answers[question_pk] = choice_pk
+            right_choices.add(choice_pk)
+    return {
+        'questions': questions,
+        'choices': choices,
+        'answers': answers,
+        'right_choices': right_choices,
+        'no_of_questions': len(questions),
+    }
+
+
+def get_answer_key(quiz_pk):
+    """
+    returns the cached answer key of a quiz, compiling it on a miss.
+
+    The key is cached under the current version of the quiz, read before
+    the key is compiled, so a key compiled from rows that have changed
+    since is saved under a version no one reads any more.
+    """
+    quiz_pk = int(quiz_pk)
+    key = f'exam:answer-key:{quiz_pk}:{_answer_key_version(quiz_pk)}'
+    answer_key = cache.get(key)
+    if answer_key is None:
+        answer_key = compile_answer_key(quiz_pk)
+        cache.set(key, answer_key, ANSWER_KEY_TIMEOUT)
+    return answer_key
+
+
+def invalidate_answer_key(quiz_pk):
+    """
+    drops the cached answer key of a quiz by bumping its version, and
+    bumps it again once the running transaction commits: a Finish running
+    meanwhile may cache a key compiled from the rows not yet committed.
+    """
+    if quiz_pk is None:
+        return
+    quiz_pk = int(quiz_pk)
+    _bump_answer_key_version(quiz_pk)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump_answer_key_version(quiz_pk))
+
+
+def _choice_ids(answers):
+    """returns the submitted choice ids as integers, skipping junk values"""
+    choice_ids = []
+    for value in answers:
+        try:
+            choice_ids.append(int(value))
+        except (TypeError, ValueError):
+            continue
+    return choice_ids
+
+
+def grade(quiz_pk, answers, question_pks=None):
+    """
+    grades the submitted choice ids against the answer key of a quiz.
+
+    Only the answer key is read, so grading costs no queries at all once
+    the key is cached. An attempt drawn from question pools passes its
+    `question_pks` and is graded on the key of those questions alone.
+    """
+    if question_pks is None:
+        answer_key = get_answer_key(quiz_pk)
+    else:
+        answer_key = compile_answer_key(question_pks=question_pks)
+    questions = answer_key['questions']
+    choices = answer_key['choices']
+
+    corrections = {}
+    for question_pk, choice_pk in sorted(
+            answer_key['answers'].items(), key=lambda item: item[1]):
+        corrections[question_pk] = {
+            'question': questions[question_pk],
+            'correct_choice': choices[choice_pk][1],
+            'your_choice': 'You Did not Answer This Question',
+        }
+
+    your_choices = {}
+    for choice_pk in _choice_ids(answers):
+        if choice_pk not in choices:
+            continue
+        question_pk, choice_text = choices[choice_pk]
+        your_choices[question_pk] = choice_pk
+        if question_pk in corrections:
+            corrections[question_pk]['your_choice'] = choice_text
+
+    # counted once per question, however many times a choice was sent
+    no_of_questions_answered = len(your_choices)
+    no_of_correct_choices_answered = sum(
+        1 for choice_pk in your_choices.values()
+        if choice_pk in answer_key['right_choices'])
+
+    no_of_questions = answer_key['no_of_questions']
+    percentage = 0
+    if no_of_questions:
+        percentage = int(no_of_correct_choices_answered / no_of_questions * 100)
+
+    return {
+        'no_of_questions': no_of_questions,
+        'no_of_correct_choices_answered': no_of_correct_choices_answered,
+        'no_of_questions_answered': no_of_questions_answered,
+        'corrections': list(corrections.values()),
+        'percentage': percentage,
+        'your_choices': your_choices,
+    }
+
+
+def record_result(user, quiz_pk, result, attempt=None):
+    """
+    saves a graded exam. When the attempt is known, the chosen answers
+    are saved with one bulk insert in the same transaction as the result.
+    """
+    with transaction.atomic():
+        saved = Result.objects.create(
+            percentage=result['percentage'],
+            user=user,
+            time_spent=result['time_spent'],
+            no_of_questions_answered=result['no_of_questions_answered'],
+            no_of_correct_choices_answered=result['no_of_correct_choices_answered'],
+            no_of_questions=result['no_of_questions'],
+            quiz_id=quiz_pk,
+        )
+        if attempt is not None:
+            answered_at = timezone.now()
+            Answer.objects.bulk_create(
+                Answer(
+                    attempt=attempt,
+                    question_id=question_pk,
+                    choice_id=choice_pk,
+                    answered_at=answered_at,
+                )
+                for question_pk, choice_pk in result['your_choices'].items()
+            )
+    return saved
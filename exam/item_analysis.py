@@ -0,0 +1,187 @@
+"""
+item analysis of the questions of a quiz.
+
+Answers are loaded as an attempt x question response matrix, a chunk of
+attempts at a time, and every statistic is computed with NumPy array
+operations:
+
+- difficulty, the share of attempts that chose the right choice
+- discrimination, the point-biserial correlation between answering the
+  question right and the score on the rest of the quiz
+- the share of attempts that chose each choice, right or distractor
+
+Only running sums are kept between chunks, so memory depends on the
+chunk size and not on the number of attempts.
+"""
+import numpy as np
+
+from django.db import transaction
+from django.utils import timezone
+
+from dashboard.models import Question, Choice
+from .models import ExamAttempt, Answer, ItemStatistic
+
+
+UNANSWERED = -1
+
+
+class ItemAnalysis:
+    """
+    accumulates the response matrix of a quiz chunk by chunk.
+
+    `choice_question[c]` is the question index of choice index `c` and
+    `right[c]` tells whether choice index `c` is right.
+    """
+
+    def __init__(self, no_of_questions, choice_question, right):
+        self.no_of_questions = no_of_questions
+        self.choice_question = np.asarray(choice_question, dtype=np.int64)
+        # one extra slot so UNANSWERED cells index a wrong "choice"
+        self.right = np.append(np.asarray(right, dtype=bool), False)
+        self.attempts = 0
+        self.sum_total = 0
+        self.sum_total_squares = 0
+        self.sum_right = np.zeros(no_of_questions, dtype=np.int64)
+        self.sum_right_total = np.zeros(no_of_questions, dtype=np.int64)
+        self.choice_counts = np.zeros(len(self.choice_question), dtype=np.int64)
+
+    def add_chunk(self, no_of_attempts, attempt_index, choice_index):
+        """
+        adds `no_of_attempts` attempts, given as parallel arrays of the
+        attempt index (within the chunk) and choice index of each answer.
+        """
+        attempt_index = np.asarray(attempt_index, dtype=np.int64)
+        choice_index = np.asarray(choice_index, dtype=np.int64)
+        matrix = np.full(
+            (no_of_attempts, self.no_of_questions), UNANSWERED, dtype=np.int64)
+        matrix[attempt_index, self.choice_question[choice_index]] = choice_index
+
+        correct = self.right[matrix].astype(np.int64)
+        total = correct.sum(axis=1)
+        self.attempts += no_of_attempts
+        self.sum_total += int(total.sum())
+        self.sum_total_squares += int((total * total).sum())
+        self.sum_right += correct.sum(axis=0)
+        self.sum_right_total += total @ correct
+        self.choice_counts += np.bincount(
+            choice_index, minlength=len(self.choice_counts))
+
+    def difficulty(self):
+        if not self.attempts:
+            return np.full(self.no_of_questions, np.nan)
+        return self.sum_right / self.attempts
+
+    def discrimination(self):
+        """
+        the point-biserial correlation of each question with the rest
+        score, the total score without the question itself. It is nan
+        when everybody, or nobody, got the question or the rest right.
+        """
+        n = self.attempts
+        if not n:
+            return np.full(self.no_of_questions, np.nan)
+        # the item is 0 or 1, so the sum of its squares is its sum
+        sum_rest = self.sum_total - self.sum_right
+        sum_rest_squares = (
+            self.sum_total_squares - 2 * self.sum_right_total + self.sum_right)
+        sum_right_rest = self.sum_right_total - self.sum_right
+
+        p = self.sum_right / n
+        mean_rest = sum_rest / n
+        covariance = sum_right_rest / n - p * mean_rest
+        variance = p * (1 - p) * (sum_rest_squares / n - mean_rest ** 2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(
+                variance > 0, covariance / np.sqrt(np.maximum(variance, 0)), np.nan)
+
+    def choice_rates(self):
+        if not self.attempts:
+            return np.zeros(len(self.choice_counts))
+        return self.choice_counts / self.attempts
+
+
+def _float_or_none(value):
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def response_chunks(quiz_pk, choice_pks, chunk_size=5000):
+    """
+    yields (no_of_attempts, attempt_index, choice_index) for the finished
+    attempts of a quiz, `chunk_size` attempts at a time. Each chunk reads
+    a range of attempt pks, so no chunk needs a long IN list.
+
+    Only attempts of users are read, as anonymous attempts save no
+    answers. Attempts drawn from question pools are left out: they did
+    not show every question of the quiz, and may show questions of
+    other quizzes.
+    """
+    attempt_pks = np.fromiter(
+        ExamAttempt.objects.filter(
+            quiz_id=quiz_pk,
+            finished_at__isnull=False,
+            user__isnull=False,
+            drawn=False,
+        ).order_by('pk').values_list('pk', flat=True),
+        dtype=np.int64,
+    )
+    for start in range(0, len(attempt_pks), chunk_size):
+        chunk = attempt_pks[start:start + chunk_size]
+        rows = Answer.objects.filter(
+            attempt_id__gte=chunk[0],
+            attempt_id__lte=chunk[-1],
+            attempt__quiz_id=quiz_pk,
+        ).values_list('attempt_id', 'choice_id')
+        answers = np.array(list(rows), dtype=np.int64).reshape(-1, 2)
+        # answers of unfinished attempts fall between finished ones
+        answers = answers[np.isin(answers[:, 0], chunk)]
+        answers = answers[np.isin(answers[:, 1], choice_pks)]
+        yield (
+            len(chunk),
+            np.searchsorted(chunk, answers[:, 0]),
+            np.searchsorted(choice_pks, answers[:, 1]),
+        )
+
+
+def analyse_quiz(quiz_pk, chunk_size=5000):
+    """
+    computes the item statistics of every question of a quiz and saves
+    them, replacing the previous ones. Returns the saved statistics.
+    """
+    question_pks = list(Question.objects.filter(
+        quiz_id=quiz_pk).order_by('pk').values_list('pk', flat=True))
+    question_index = {pk: i for i, pk in enumerate(question_pks)}
+    choices = list(Choice.objects.filter(
+        question__quiz_id=quiz_pk).order_by('pk').values_list(
+        'pk', 'question_id', 'mark'))
+    choice_pks = np.array([pk for pk, _, _ in choices], dtype=np.int64)
+
+    analysis = ItemAnalysis(
+        len(question_pks),
+        [question_index[question_pk] for _, question_pk, _ in choices],
+        [mark == 'right' for _, _, mark in choices],
+    )
+    for chunk in response_chunks(quiz_pk, choice_pks, chunk_size):
+        analysis.add_chunk(*chunk)
+
+    difficulty = analysis.difficulty()
+    discrimination = analysis.discrimination()
+    choice_rates = {question_pk: {} for question_pk in question_pks}
+    for (choice_pk, question_pk, _), rate in zip(choices, analysis.choice_rates()):
+        choice_rates[question_pk][str(choice_pk)] = round(float(rate), 4)
+
+    computed_at = timezone.now()
+    statistics = [
+        ItemStatistic(
+            question_id=question_pk,
+            attempts=analysis.attempts,
+            difficulty=_float_or_none(difficulty[i]),
+            discrimination=_float_or_none(discrimination[i]),
+            choice_rates=choice_rates[question_pk],
+            computed_at=computed_at,
+        )
+        for i, question_pk in enumerate(question_pks)
+    ]
+    with transaction.atomic():
+        ItemStatistic.objects.filter(question__quiz_id=quiz_pk).delete()
+        ItemStatistic.objects.bulk_create(statistics)
+    return statistics
@@ -0,0 +1,118 @@
+"""
+per-quiz leaderboards.
+
+LeaderboardEntry keeps the best result of each user on each quiz and is
+updated as results are saved. A rank is counted from the table, using
+the exam_leaderboard_rank index, so it is always that of the committed
+entries. Only the top of each leaderboard is cached; saving an entry
+drops the cached copy, and drops it again once the transaction commits,
+so a finish that rolls back leaves no entry behind and concurrent
+finishes cannot overwrite each other's.
+"""
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from .models import LeaderboardEntry
+
+
+LEADERBOARD_TIMEOUT = 60 * 60
+# the number of entries cached for the top of a leaderboard
+TOP_SIZE = 100
+
+
+def _cache_key(quiz_pk):
+    return f'exam:leaderboard:top:{quiz_pk}'
+
+
+def display_name(first_name, last_name, email):
+    """
+    the name a leaderboard shows for a user: their full name, else the
+    start of their email address, so addresses are never shown
+    """
+    name = f'{first_name} {last_name}'.strip()
+    if name:
+        return name
+    return email.split('@')[0][:3] + '***'
+
+
+def build_top(quiz_pk, n=TOP_SIZE):
+    """
+    returns (rank, name, percentage, seconds) of the best n users of a
+    quiz: highest percentage first, then shortest time.
+    """
+    top = []
+    previous = None
+    for i, (first_name, last_name, email, percentage, time_spent) in enumerate(
+            LeaderboardEntry.objects.filter(quiz_id=quiz_pk).order_by(
+                '-percentage', 'time_spent', 'user_id').values_list(
+                'user__first_name', 'user__last_name', 'user__email',
+                'percentage', 'time_spent')[:n]):
+        # users with the same percentage and time share a rank
+        if previous is None or previous[1:] != (percentage, time_spent):
+            previous = (i + 1, percentage, time_spent)
+        top.append((
+            previous[0], display_name(first_name, last_name, email),
+            percentage, int(time_spent.total_seconds())))
+    return top
+
+
+def top(quiz_pk, n=10):
+    """returns (rank, name, percentage, seconds) of the best n users"""
+    if n > TOP_SIZE:
+        return build_top(quiz_pk, n)
+    key = _cache_key(int(quiz_pk))
+    cached = cache.get(key)
+    if cached is None:
+        cached = build_top(quiz_pk)
+        cache.set(key, cached, LEADERBOARD_TIMEOUT)
+    return cached[:n]
+
+
+def rank_of(quiz_pk, user_pk):
+    """returns (rank, number of ranked users), the rank None if unranked"""
+    entries = LeaderboardEntry.objects.filter(quiz_id=quiz_pk)
+    entry = entries.filter(user_id=user_pk).values_list(
+        'percentage', 'time_spent').first()
+    if entry is None:
+        return None, entries.count()
+    percentage, time_spent = entry
+    ahead = Q(percentage__gt=percentage) | Q(
+        percentage=percentage, time_spent__lt=time_spent)
+    counts = entries.aggregate(
+        ranked=Count('pk'), ahead=Count('pk', filter=ahead))
+    return counts['ahead'] + 1, counts['ranked']
+
+
+def record(result):
+    """
+    makes a new result the leaderboard entry of its user if it beats
+    their best one, and drops the cached top of the leaderboard.
+    """
+    better = Q(percentage__lt=result.percentage) | Q(
+        percentage=result.percentage, time_spent__gt=result.time_spent)
+    entries = LeaderboardEntry.objects.filter(
+        quiz_id=result.quiz_id, user_id=result.user_id)
+    improved = entries.filter(better).update(
+        result=result, percentage=result.percentage, time_spent=result.time_spent)
+    if not improved:
+        _, improved = LeaderboardEntry.objects.get_or_create(
+            quiz_id=result.quiz_id, user_id=result.user_id, defaults={
+            'result': result,
+            'percentage': result.percentage,
+            'time_spent': result.time_spent,
+        })
+    if improved:
+        invalidate(result.quiz_id)
+
+
+def invalidate(quiz_pk):
+    """
+    drops the cached top of a leaderboard, and drops it again once the
+    running transaction commits, as it may be cached again meanwhile from
+    the rows not yet committed.
+    """
+    quiz_pk = int(quiz_pk)
+    cache.delete(_cache_key(quiz_pk))
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: cache.delete(_cache_key(quiz_pk)))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.models import Quiz
+from exam.item_analysis import analyse_quiz
+
+
+class Command(BaseCommand):
+    help = 'Computes the item analysis of the questions of quizzes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'quizzes', nargs='*', type=int,
+            help='pks of the quizzes to analyse, all quizzes by default')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+            help='number of attempts loaded at a time')
+
+    def handle(self, *args, **options):
+        quiz_pks = options['quizzes'] or Quiz.objects.values_list('pk', flat=True)
+        for quiz_pk in quiz_pks:
+            statistics = analyse_quiz(quiz_pk, options['chunk_size'])
+            self.stdout.write(
+                f'Analysed {len(statistics)} questions of quiz {quiz_pk}')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from exam.archive import archive_cutoff, archive_results
+
+
+class Command(BaseCommand):
+    help = 'Moves old results from the Result table to the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            help='archive results older than this many days, '
+                 'RESULT_ARCHIVE_AFTER_DAYS by default')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        before = archive_cutoff(options['days'])
+        archived = archive_results(before, options['batch_size'])
+        self.stdout.write(f'Archived {archived} results dated before {before}')
@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from exam.benchmark import rolled_back, seed_quiz, measure
+from exam.grading import grade, record_result
+from exam.models import ExamAttempt
+
+
+class Command(BaseCommand):
+    help = 'Reports finish latency with and without persisting the answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'sizes', nargs='*', type=int, default=[100, 1000],
+            help='number of questions of each benchmarked quiz')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        self.stdout.write(
+            f'{"questions":>10} {"plain queries":>14} {"plain ms":>10} '
+            f'{"persist queries":>16} {"persist ms":>11}')
+        for size in options['sizes']:
+            with rolled_back():
+                user = get_user_model().objects.create_user(
+                    email='benchmark@example.com')
+                quiz, right_choices = seed_quiz(size)
+                # warm the answer key, as it is during exam peaks
+                grade(quiz.pk, [])
+                attempts = [ExamAttempt.start(quiz, user) for _ in range(repeat)]
+
+                def finish(persist):
+                    result = grade(quiz.pk, right_choices)
+                    result['time_spent'] = timedelta(minutes=5)
+                    attempt = attempts.pop() if persist else None
+                    record_result(user, quiz.pk, result, attempt)
+
+                plain_queries, plain_ms = measure(finish, False, repeat=repeat)
+                persist_queries, persist_ms = measure(finish, True, repeat=repeat)
+            self.stdout.write(
+                f'{size:>10} {plain_queries:>14} {plain_ms:>10.2f} '
+                f'{persist_queries:>16} {persist_ms:>11.2f}')
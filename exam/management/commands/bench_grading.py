@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from exam.benchmark import rolled_back, seed_quiz, measure
+from exam.grading import grade, invalidate_answer_key
+
+
+def grade_cold(quiz_pk, answers):
+    invalidate_answer_key(quiz_pk)
+    return grade(quiz_pk, answers)
+
+
+class Command(BaseCommand):
+    help = 'Reports query count and latency of grading a finished exam'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'sizes', nargs='*', type=int, default=[10, 100, 1000],
+            help='number of questions of each benchmarked quiz')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"questions":>10} {"cold queries":>13} {"cold ms":>10} '
+            f'{"warm queries":>13} {"warm ms":>10}')
+        for size in options['sizes']:
+            with rolled_back():
+                quiz, right_choices = seed_quiz(size)
+                # answer half of the questions, every answer right
+                answers = right_choices[::2]
+                cold_queries, cold_ms = measure(
+                    grade_cold, quiz.pk, answers, repeat=options['repeat'])
+                warm_queries, warm_ms = measure(
+                    grade, quiz.pk, answers, repeat=options['repeat'])
+                invalidate_answer_key(quiz.pk)
+            self.stdout.write(
+                f'{size:>10} {cold_queries:>13} {cold_ms:>10.2f} '
+                f'{warm_queries:>13} {warm_ms:>10.2f}')
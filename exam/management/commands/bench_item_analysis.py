@@ -0,0 +1,126 @@
+import time
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from dashboard.models import Choice
+from exam.benchmark import rolled_back, seed_quiz
+from exam.item_analysis import ItemAnalysis, analyse_quiz
+from exam.models import ExamAttempt, Answer
+
+
+def random_chunks(no_of_attempts, no_of_questions, no_of_choices,
+                  chunk_size, answer_rate=0.9, seed=0):
+    """
+    yields response chunks as exam.item_analysis.response_chunks does,
+    where each attempt answers about `answer_rate` of the questions.
+    """
+    rng = np.random.default_rng(seed)
+    for start in range(0, no_of_attempts, chunk_size):
+        size = min(chunk_size, no_of_attempts - start)
+        attempt_index, question_index = np.nonzero(
+            rng.random((size, no_of_questions)) < answer_rate)
+        choice_index = (question_index * no_of_choices +
+                        rng.integers(0, no_of_choices, len(question_index)))
+        yield size, attempt_index, choice_index
+
+
+def seed_answers(quiz, user, chunks, batch_size=5000):
+    """
+    saves the generated response chunks as finished attempts of `user`
+    with their answers, and returns the number of answers saved.
+    """
+    no_of_attempts = sum(chunk[0] for chunk in chunks)
+    now = timezone.now()
+    ExamAttempt.objects.bulk_create((
+        ExamAttempt(quiz=quiz, user=user, started_at=now, deadline=now,
+                    finished_at=now)
+        for _ in range(no_of_attempts)
+    ), batch_size=batch_size)
+    attempt_pks = np.fromiter(
+        ExamAttempt.objects.filter(quiz=quiz).order_by('pk').values_list(
+            'pk', flat=True), dtype=np.int64)
+    # seed_quiz creates the choices question by question
+    choices = np.array(list(Choice.objects.filter(
+        question__quiz=quiz).order_by('pk').values_list('pk', 'question_id')),
+        dtype=np.int64)
+
+    answers = 0
+    offset = 0
+    for size, attempt_index, choice_index in chunks:
+        Answer.objects.bulk_create((
+            Answer(attempt_id=attempt_pk, question_id=question_pk,
+                   choice_id=choice_pk, answered_at=now)
+            for attempt_pk, (choice_pk, question_pk) in zip(
+                attempt_pks[offset + attempt_index].tolist(),
+                choices[choice_index].tolist())
+        ), batch_size=batch_size)
+        answers += len(attempt_index)
+        offset += size
+    return answers
+
+
+class Command(BaseCommand):
+    help = ('Reports the time item analysis takes on generated responses, '
+            'leaving out loading the answers from the database unless '
+            '--database is given')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'sizes', nargs='*', default=['10000x100', '100000x200'],
+            help='attempts x questions of each benchmark, e.g. 10000x100')
+        parser.add_argument('--choices', type=int, default=4)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument(
+            '--database', action='store_true',
+            help='save the answers in a rolled back transaction and time '
+                 'analyse_quiz end to end, loading included')
+
+    def handle(self, *args, **options):
+        no_of_choices = options['choices']
+        chunk_size = options['chunk_size']
+        self.stdout.write(
+            f'{"attempts":>10} {"questions":>10} {"answers":>12} {"ms":>10}')
+        for size in options['sizes']:
+            try:
+                no_of_attempts, no_of_questions = map(int, size.split('x'))
+            except ValueError:
+                raise CommandError(f'{size} is not attempts x questions')
+            chunks = list(random_chunks(
+                no_of_attempts, no_of_questions, no_of_choices, chunk_size))
+            if options['database']:
+                answers, ms = self.analyse_database(
+                    chunks, no_of_questions, no_of_choices, chunk_size)
+            else:
+                answers, ms = self.analyse_memory(
+                    chunks, no_of_questions, no_of_choices)
+            self.stdout.write(
+                f'{no_of_attempts:>10} {no_of_questions:>10} {answers:>12} {ms:>10.2f}')
+
+    def analyse_memory(self, chunks, no_of_questions, no_of_choices):
+        analysis = ItemAnalysis(
+            no_of_questions,
+            np.repeat(np.arange(no_of_questions), no_of_choices),
+            np.tile(np.arange(no_of_choices) == 0, no_of_questions),
+        )
+        start = time.perf_counter()
+        for chunk in chunks:
+            analysis.add_chunk(*chunk)
+        analysis.difficulty()
+        analysis.discrimination()
+        analysis.choice_rates()
+        ms = (time.perf_counter() - start) * 1000
+        return sum(len(chunk[1]) for chunk in chunks), ms
+
+    def analyse_database(self, chunks, no_of_questions, no_of_choices, chunk_size):
+        with rolled_back():
+            user = get_user_model().objects.create_user(
+                email='benchmark@example.com')
+            quiz, _ = seed_quiz(no_of_questions, no_of_choices)
+            answers = seed_answers(quiz, user, chunks)
+            start = time.perf_counter()
+            analyse_quiz(quiz.pk, chunk_size)
+            ms = (time.perf_counter() - start) * 1000
+        return answers, ms
@@ -0,0 +1,113 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from dashboard.models import Quiz, Question, Choice
+from exam.benchmark import rolled_back, measure
+from exam.models import Result, LeaderboardEntry
+
+
+def hot_paths():
+    """
+    (name, index the plan must use, queryset) of each hot lookup, run
+    against the newest quiz and user.
+    """
+    quiz = Quiz.objects.order_by('-pk').values_list('pk', flat=True).first() or 1
+    user = get_user_model().objects.order_by('-pk').values_list('pk', flat=True).first() or 1
+    return [
+        ('result history page', 'exam_result_user_date_id',
+         Result.objects.filter(user_id=user).order_by('-date', '-id')[:26]),
+        ('results of a quiz by date', 'exam_result_quiz_date',
+         Result.objects.filter(
+             quiz_id=quiz, date__gte=date.today() - timedelta(days=30))),
+        ('sample exam', 'dashboard_quiz_title',
+         Quiz.objects.filter(quiz_title='sample')),
+        ('leaderboard', 'exam_leaderboard_rank',
+         LeaderboardEntry.objects.filter(quiz_id=quiz).order_by(
+             '-percentage', 'time_spent')[:10]),
+    ]
+
+
+def seed_results(no_of_results, no_of_quizzes=100, no_of_users=1000):
+    """creates quizzes, users with one question each and results"""
+    User = get_user_model()
+    Quiz.objects.bulk_create(
+        Quiz(quiz_title=f'explain {i}', quiz_text='explain')
+        for i in range(no_of_quizzes))
+    User.objects.bulk_create(
+        (User(email=f'explain{i}@test.com', password='!')
+         for i in range(no_of_users)), batch_size=1000)
+    quiz_pks = list(Quiz.objects.filter(
+        quiz_title__startswith='explain ').values_list('pk', flat=True))
+    user_pks = list(User.objects.filter(
+        email__startswith='explain').values_list('pk', flat=True))
+    Question.objects.bulk_create(
+        Question(question_text='explain', quiz_id=quiz_pk) for quiz_pk in quiz_pks)
+    Choice.objects.bulk_create(
+        Choice(choice_text=f'choice {i}', question_id=question_pk,
+               mark='right' if i == 0 else 'wrong')
+        for question_pk in Question.objects.filter(
+            quiz_id__in=quiz_pks).values_list('pk', flat=True)
+        for i in range(4))
+    Result.objects.bulk_create(
+        (Result(
+            percentage=i % 101,
+            time_spent=timedelta(minutes=i % 30),
+            date=date.today() - timedelta(days=i % 365),
+            user_id=user_pks[i % len(user_pks)],
+            quiz_id=quiz_pks[i % len(quiz_pks)],
+        ) for i in range(no_of_results)),
+        batch_size=5000)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+class Command(BaseCommand):
+    help = ('Checks with EXPLAIN that each hot lookup uses its index, '
+            'and optionally times it')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='number of results to create first, rolled back afterwards')
+        parser.add_argument(
+            '--time', action='store_true', help='report the time of each lookup')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--check', action='store_true',
+            help='fail when a lookup does not use its index')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            with rolled_back():
+                seed_results(options['seed'])
+                missing = self.explain(options)
+        else:
+            missing = self.explain(options)
+        if missing and options['check']:
+            raise CommandError(f'Indexes not used: {", ".join(missing)}')
+
+    def explain(self, options):
+        missing = []
+        for name, index, queryset in hot_paths():
+            with transaction.atomic():
+                if connection.vendor == 'postgresql':
+                    # small tables are scanned whatever their indexes; ask
+                    # whether the index can serve the lookup at all
+                    with connection.cursor() as cursor:
+                        cursor.execute('SET LOCAL enable_seqscan = off')
+                plan = queryset.explain()
+            used = index in plan
+            if not used:
+                missing.append(index)
+            line = f'{"ok" if used else "MISSING":<8} {name:<28} {index:<26}'
+            if options['time']:
+                _, ms = measure(
+                    lambda: list(queryset.all()), repeat=options['repeat'])
+                line += f' {ms:>9.2f}ms'
+            self.stdout.write(line)
+            if options['verbosity'] > 1:
+                self.stdout.write(plan)
+        return missing
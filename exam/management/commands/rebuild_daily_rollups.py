@@ -0,0 +1,66 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from exam.models import Result, ArchivedResult, DailyQuizRollup
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'{value} is not a YYYY-MM-DD date')
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily quiz rollups from the results over a date range'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'quizzes', nargs='*', type=int,
+            help='pks of the quizzes to rebuild, all quizzes by default')
+        parser.add_argument('--from', dest='date_from', type=parse_date,
+            help='first day to rebuild, YYYY-MM-DD')
+        parser.add_argument('--to', dest='date_to', type=parse_date,
+            help='last day to rebuild, YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        filters = {}
+        if options['quizzes']:
+            filters['quiz_id__in'] = options['quizzes']
+        if options['date_from']:
+            filters['date__gte'] = options['date_from']
+        if options['date_to']:
+            filters['date__lte'] = options['date_to']
+        rollups = DailyQuizRollup.objects.filter(**filters)
+
+        # archived results are summed into the days they were dated
+        days = {}
+        for results in (Result.objects.all(), ArchivedResult.objects.all()):
+            rows = results.filter(**filters).order_by().values('quiz_id', 'date').annotate(
+                results=Count('pk'),
+                total_percentage=Sum('percentage'),
+                total_time_spent=Sum('time_spent'),
+            )
+            for row in rows.iterator():
+                seconds = int(row['total_time_spent'].total_seconds())
+                day = days.get((row['quiz_id'], row['date']))
+                if day is None:
+                    days[row['quiz_id'], row['date']] = DailyQuizRollup(
+                        quiz_id=row['quiz_id'],
+                        date=row['date'],
+                        results=row['results'],
+                        total_percentage=row['total_percentage'],
+                        total_time_spent=seconds,
+                    )
+                    continue
+                day.results += row['results']
+                day.total_percentage += row['total_percentage']
+                day.total_time_spent += seconds
+        days = list(days.values())
+        with transaction.atomic():
+            rollups.delete()
+            DailyQuizRollup.objects.bulk_create(days, batch_size=1000)
+        self.stdout.write(f'Rebuilt {len(days)} daily rollups')
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import BooleanField, Value
+
+from exam.models import Result, ArchivedResult, LeaderboardEntry
+from exam import leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the quiz leaderboards from every saved and archived result'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'quizzes', nargs='*', type=int,
+            help='pks of the quizzes to rebuild, all quizzes by default')
+
+    def handle(self, *args, **options):
+        quiz_pks = options['quizzes']
+        results = Result.objects.annotate(archived=Value(False, BooleanField()))
+        archived = ArchivedResult.objects.annotate(archived=Value(True, BooleanField()))
+        entries = LeaderboardEntry.objects.all()
+        if quiz_pks:
+            results = results.filter(quiz_id__in=quiz_pks)
+            archived = archived.filter(quiz_id__in=quiz_pks)
+            entries = entries.filter(quiz_id__in=quiz_pks)
+        fields = ('pk', 'quiz_id', 'user_id', 'percentage', 'time_spent', 'archived')
+        results = results.values_list(*fields).union(
+            archived.values_list(*fields), all=True).order_by(
+            'quiz_id', 'user_id', '-percentage', 'time_spent', 'pk')
+
+        best = []
+        last = None
+        # the first result of each quiz and user is their best one
+        for pk, quiz_pk, user_pk, percentage, time_spent, is_archived in results.iterator():
+            if (quiz_pk, user_pk) == last:
+                continue
+            last = (quiz_pk, user_pk)
+            # an archived result is no longer in the Result table
+            best.append(LeaderboardEntry(
+                quiz_id=quiz_pk, user_id=user_pk,
+                result_id=None if is_archived else pk,
+                percentage=percentage, time_spent=time_spent))
+
+        with transaction.atomic():
+            # deleting invalidates the cached leaderboards of the old entries
+            entries.delete()
+            LeaderboardEntry.objects.bulk_create(best, batch_size=1000)
+        for quiz_pk in {entry.quiz_id for entry in best}:
+            leaderboard.invalidate(quiz_pk)
+        self.stdout.write(f'Rebuilt {len(best)} leaderboard entries')
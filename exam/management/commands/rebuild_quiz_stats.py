@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum, Min, Max, F, Q
+
+from exam.models import Result, ArchivedResult, QuizStats
+
+
+def aggregate_stats(quiz_pks=None):
+    """
+    computes the stats of every quiz with results or archived results,
+    with one grouped query per table
+    """
+    buckets = {}
+    for i in range(QuizStats.BUCKETS):
+        in_bucket = Q(percentage__gte=i * 10)
+        if i < QuizStats.BUCKETS - 1:
+            in_bucket &= Q(percentage__lt=(i + 1) * 10)
+        buckets[f'bucket_{i}'] = Count('pk', filter=in_bucket)
+    stats = {}
+    for results in (Result.objects.all(), ArchivedResult.objects.all()):
+        if quiz_pks:
+            results = results.filter(quiz_id__in=quiz_pks)
+        rows = results.order_by().values('quiz_id').annotate(
+            attempts=Count('pk'),
+            total=Sum('percentage'),
+            total_squares=Sum(F('percentage') * F('percentage')),
+            min_percentage=Min('percentage'),
+            max_percentage=Max('percentage'),
+            **buckets,
+        )
+        for row in rows:
+            quiz_stats = stats.get(row['quiz_id'])
+            if quiz_stats is None:
+                stats[row['quiz_id']] = row
+                continue
+            for field, value in row.items():
+                if field == 'min_percentage':
+                    quiz_stats[field] = min(quiz_stats[field], value)
+                elif field == 'max_percentage':
+                    quiz_stats[field] = max(quiz_stats[field], value)
+                elif field != 'quiz_id':
+                    quiz_stats[field] += value
+    return [QuizStats(**row) for row in stats.values()]
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the quiz stats from every saved and archived result'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'quizzes', nargs='*', type=int,
+            help='pks of the quizzes to rebuild, all quizzes by default')
+
+    def handle(self, *args, **options):
+        quiz_pks = options['quizzes']
+        with transaction.atomic():
+            stats = QuizStats.objects.all()
+            if quiz_pks:
+                stats = stats.filter(quiz_id__in=quiz_pks)
+            stats.delete()
+            stats = QuizStats.objects.bulk_create(aggregate_stats(quiz_pks))
+        self.stdout.write(f'Rebuilt the stats of {len(stats)} quizzes')
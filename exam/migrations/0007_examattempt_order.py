@@ -0,0 +1,24 @@
+# Generated by Django 3.1 on 2026-10-18 17:33
+
+from django.db import migrations, models
+import exam.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0006_answer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examattempt',
+            name='question_order',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='examattempt',
+            name='seed',
+            field=models.PositiveIntegerField(default=exam.models.random_seed),
+        ),
+    ]
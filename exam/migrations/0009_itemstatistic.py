@@ -0,0 +1,27 @@
+# Generated by Django 3.1 on 2026-10-18 17:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+        ('exam', '0008_quizstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemStatistic',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='item_statistic', serialize=False, to='dashboard.question')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('difficulty', models.FloatField(blank=True, null=True)),
+                ('discrimination', models.FloatField(blank=True, null=True)),
+                ('choice_rates', models.JSONField(blank=True, default=dict)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
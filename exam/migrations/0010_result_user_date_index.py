@@ -0,0 +1,17 @@
+# Generated by Django 3.1 on 2026-10-18 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0009_itemstatistic'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['user', '-date', '-id'], name='exam_result_user_date_id'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.1 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0011_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['quiz', 'date'], name='exam_result_quiz_date'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.1 on 2026-10-18 17:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_hot_path_indexes'),
+        ('exam', '0012_result_quiz_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyQuizRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('results', models.PositiveIntegerField(default=0)),
+                ('total_percentage', models.PositiveIntegerField(default=0)),
+                ('total_time_spent', models.BigIntegerField(default=0, help_text='seconds')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='dashboard.quiz')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailyquizrollup',
+            constraint=models.UniqueConstraint(fields=('quiz', 'date'), name='exam_rollup_one_per_day'),
+        ),
+    ]
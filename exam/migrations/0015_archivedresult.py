@@ -0,0 +1,43 @@
+# Generated by Django 3.1 on 2026-10-18 18:00
+
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('exam', '0014_scorecount'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='leaderboardentry',
+            name='result',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='exam.result'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedResult',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('percentage', models.PositiveIntegerField(default=0)),
+                ('time_spent', models.DurationField(default=datetime.timedelta(0))),
+                ('no_of_questions_answered', models.IntegerField(default=0)),
+                ('no_of_correct_choices_answered', models.IntegerField(default=0)),
+                ('no_of_questions', models.IntegerField(default=0)),
+                ('date', models.DateField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_results', to='dashboard.quiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_results', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedresult',
+            index=models.Index(fields=['user', '-date', '-id'], name='exam_archived_user_date_id'),
+        ),
+    ]
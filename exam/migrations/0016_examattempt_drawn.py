@@ -0,0 +1,18 @@
+# Generated by Django 3.1 on 2026-10-18 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0015_archivedresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examattempt',
+            name='drawn',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.1 on 2026-10-18 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0016_examattempt_drawn'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quizstats',
+            name='total',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='quizstats',
+            name='total_squares',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
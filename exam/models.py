@@ -1,8 +1,15 @@
-from django.db import models
+import random
+from datetime import timedelta
+
+from django.core import signing
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Value
+from django.db.models.functions import Least, Greatest
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
-from dashboard.models import Quiz
+from dashboard.models import Quiz, Question, Choice
+from dashboard.pools import draw_questions
 
 class Result(models.Model):
     percentage = models.PositiveIntegerField(default=0)
@@ -17,6 +24,415 @@ class Result(models.Model):
         on_delete=models.CASCADE,
     )
     date = models.DateField(default = timezone.now)
+
+    class Meta:
+        indexes = [
+            # keyset pagination of the results of a user, newest first
+            models.Index(fields=['user', '-date', '-id'], name='exam_result_user_date_id'),
+            # results of a quiz over a date range, for exports and stats
+            models.Index(fields=['quiz', 'date'], name='exam_result_quiz_date'),
+        ]
     
     def __str__(self):
         return f'{self.percentage}'
+
+
+def random_seed():
+    return random.getrandbits(31)
+
+
+class ExamAttempt(models.Model):
+    user = models.ForeignKey(
+        get_user_model(),
+        related_name='attempts',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+    )
+    quiz = models.ForeignKey(Quiz,
+        related_name='attempts',
+        on_delete=models.CASCADE,
+    )
+    started_at = models.DateTimeField(default=timezone.now)
+    deadline = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # the shuffled question pks; page n of the exam shows question_order[n - 1]
+    question_order = models.JSONField(default=list, blank=True)
+    seed = models.PositiveIntegerField(default=random_seed)
+    # the questions were drawn from the pools of the quiz blueprint
+    drawn = models.BooleanField(default=False)
+
+    TOKEN_SALT = 'exam.attempt'
+    # answers sent by the timer at the deadline may arrive a little late
+    GRACE = timedelta(seconds=30)
+
+    @classmethod
+    def start(cls, quiz, user=None):
+        """
+        starts an attempt that must be finished within the quiz duration.
+        A quiz with a blueprint has the questions of the attempt drawn
+        from its pools, any other quiz shows all its questions.
+        """
+        started_at = timezone.now()
+        seed = random_seed()
+        rng = random.Random(seed)
+        draws = list(quiz.draws.order_by('pk').values_list('pool_id', 'no_of_questions'))
+        if draws:
+            question_order = draw_questions(draws, rng)
+        else:
+            question_order = list(
+                quiz.questions.order_by('pk').values_list('pk', flat=True))
+        rng.shuffle(question_order)
+        return cls.objects.create(
+            quiz=quiz,
+            user=user,
+            started_at=started_at,
+            deadline=started_at + quiz.duration,
+            question_order=question_order,
+            seed=seed,
+            drawn=bool(draws),
+        )
+
+    def shuffle_choices(self, question_pk, choices):
+        """
+        returns the choices of a question, given in pk order, in the order
+        this attempt shows them. The order only depends on the seed, so it
+        is the same on every reload.
+        """
+        choices = list(choices)
+        random.Random(f'{self.seed}:{question_pk}').shuffle(choices)
+        return choices
+
+    def deadline_ms(self):
+        """the deadline in milliseconds since the epoch, as the timer uses it"""
+        return int(self.deadline.timestamp() * 1000)
+
+    def token(self):
+        """a signed token of the attempt and its deadline for the exam page"""
+        return signing.dumps(
+            {'attempt': self.pk, 'deadline': self.deadline_ms()},
+            salt=self.TOKEN_SALT,
+        )
+
+    @classmethod
+    def pk_from_token(cls, token):
+        """returns the attempt pk of a token, or None if it was tampered with"""
+        try:
+            return signing.loads(token, salt=cls.TOKEN_SALT)['attempt']
+        except (signing.BadSignature, KeyError, TypeError):
+            return None
+
+    def is_over(self, now=None):
+        """whether the deadline and its grace period have passed"""
+        return (now or timezone.now()) > self.deadline + self.GRACE
+
+    def time_spent(self, now=None):
+        """time spent on the attempt, never more than the quiz duration"""
+        now = now or timezone.now()
+        spent = min(now, self.deadline) - self.started_at
+        return timedelta(seconds=int(spent.total_seconds()))
+
+    def __str__(self):
+        return f'{self.quiz} - {self.started_at}'
+
+
+class Answer(models.Model):
+    attempt = models.ForeignKey(ExamAttempt,
+        related_name='answers',
+        on_delete=models.CASCADE,
+    )
+    question = models.ForeignKey(Question,
+        related_name='answers',
+        on_delete=models.CASCADE,
+    )
+    choice = models.ForeignKey(Choice,
+        related_name='answers',
+        on_delete=models.CASCADE,
+    )
+    answered_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            # doubles as the index for reading the answers of an attempt
+            models.UniqueConstraint(
+                fields=['attempt', 'question'], name='exam_answer_one_per_question'),
+        ]
+        indexes = [
+            # per question scans, e.g. how often each choice was picked
+            models.Index(fields=['question', 'choice'], name='exam_answer_question_choice'),
+        ]
+
+    def __str__(self):
+        return f'{self.attempt_id} - {self.choice}'
+
+
+class QuizStats(models.Model):
+    """
+    running totals of the results of a quiz, updated in place whenever a
+    result is saved so reading them never scans the results.
+
+    The histogram counts percentages in ten buckets of ten points, the
+    last bucket also holding 100.
+    """
+    BUCKETS = 10
+
+    quiz = models.OneToOneField(Quiz,
+        related_name='stats',
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    # a 32 bit sum of squares overflows after about 215,000 full scores
+    total = models.PositiveBigIntegerField(default=0)
+    total_squares = models.PositiveBigIntegerField(default=0)
+    min_percentage = models.PositiveIntegerField(default=0)
+    max_percentage = models.PositiveIntegerField(default=0)
+    bucket_0 = models.PositiveIntegerField(default=0)
+    bucket_1 = models.PositiveIntegerField(default=0)
+    bucket_2 = models.PositiveIntegerField(default=0)
+    bucket_3 = models.PositiveIntegerField(default=0)
+    bucket_4 = models.PositiveIntegerField(default=0)
+    bucket_5 = models.PositiveIntegerField(default=0)
+    bucket_6 = models.PositiveIntegerField(default=0)
+    bucket_7 = models.PositiveIntegerField(default=0)
+    bucket_8 = models.PositiveIntegerField(default=0)
+    bucket_9 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'quiz stats'
+
+    @classmethod
+    def bucket_of(cls, percentage):
+        return f'bucket_{min(percentage // 10, cls.BUCKETS - 1)}'
+
+    @classmethod
+    def record(cls, quiz_pk, percentage):
+        """
+        adds a percentage to the stats of a quiz with one UPDATE, so
+        concurrent results never overwrite each other.
+        """
+        bucket = cls.bucket_of(percentage)
+        updated = cls.objects.filter(quiz_id=quiz_pk).update(
+            attempts=F('attempts') + 1,
+            total=F('total') + percentage,
+            total_squares=F('total_squares') + percentage * percentage,
+            min_percentage=Least('min_percentage', Value(percentage)),
+            max_percentage=Greatest('max_percentage', Value(percentage)),
+            **{bucket: F(bucket) + 1},
+        )
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    quiz_id=quiz_pk,
+                    attempts=1,
+                    total=percentage,
+                    total_squares=percentage * percentage,
+                    min_percentage=percentage,
+                    max_percentage=percentage,
+                    **{bucket: 1},
+                )
+        except IntegrityError:
+            # another result created the row first
+            cls.record(quiz_pk, percentage)
+
+    @property
+    def mean(self):
+        if not self.attempts:
+            return 0
+        return self.total / self.attempts
+
+    @property
+    def stdev(self):
+        """the population standard deviation of the percentages"""
+        if not self.attempts:
+            return 0
+        variance = self.total_squares / self.attempts - self.mean ** 2
+        return max(variance, 0) ** 0.5
+
+    def histogram(self):
+        """returns (label, count) for each bucket"""
+        histogram = []
+        for i in range(self.BUCKETS):
+            upper = 100 if i == self.BUCKETS - 1 else i * 10 + 9
+            histogram.append(
+                (f'{i * 10}-{upper}', getattr(self, f'bucket_{i}')))
+        return histogram
+
+    def __str__(self):
+        return f'{self.quiz} - {self.attempts}'
+
+
+class ItemStatistic(models.Model):
+    """
+    the item analysis of a question, computed by exam.item_analysis.
+
+    `choice_rates` maps each choice pk to the share of attempts that
+    chose it. Difficulty and discrimination are null when there is
+    nothing to compute them from.
+    """
+    question = models.OneToOneField(Question,
+        related_name='item_statistic',
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    difficulty = models.FloatField(null=True, blank=True)
+    discrimination = models.FloatField(null=True, blank=True)
+    choice_rates = models.JSONField(default=dict, blank=True)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    def rate_of(self, choice_pk):
+        return self.choice_rates.get(str(choice_pk), 0)
+
+    def __str__(self):
+        return f'{self.question} - {self.difficulty}'
+
+
+class LeaderboardEntry(models.Model):
+    """
+    the best result of a user on a quiz: the highest percentage, then the
+    shortest time. Kept up to date as results are saved, see
+    exam.leaderboard.
+    """
+    quiz = models.ForeignKey(Quiz,
+        related_name='leaderboard',
+        on_delete=models.CASCADE,
+    )
+    user = models.ForeignKey(
+        get_user_model(), related_name='leaderboard_entries', on_delete=models.CASCADE)
+    # archiving the result keeps the entry, see ArchivedResult
+    result = models.ForeignKey(Result,
+        related_name='+',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    percentage = models.PositiveIntegerField(default=0)
+    time_spent = models.DurationField(default=timedelta(0))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['quiz', 'user'], name='exam_leaderboard_one_per_user'),
+        ]
+        indexes = [
+            # reading a leaderboard in rank order
+            models.Index(
+                fields=['quiz', '-percentage', 'time_spent'], name='exam_leaderboard_rank'),
+        ]
+
+    def __str__(self):
+        return f'{self.quiz} - {self.user} - {self.percentage}'
+
+
+class DailyQuizRollup(models.Model):
+    """
+    the results of a quiz on one day, summed as they are saved so trends
+    are read without scanning the results.
+    """
+    quiz = models.ForeignKey(Quiz,
+        related_name='daily_rollups',
+        on_delete=models.CASCADE,
+    )
+    date = models.DateField()
+    results = models.PositiveIntegerField(default=0)
+    total_percentage = models.PositiveIntegerField(default=0)
+    total_time_spent = models.BigIntegerField(default=0, help_text='seconds')
+
+    class Meta:
+        constraints = [
+            # doubles as the index for reading a quiz over a date range
+            models.UniqueConstraint(
+                fields=['quiz', 'date'], name='exam_rollup_one_per_day'),
+        ]
+
+    @classmethod
+    def record(cls, result):
+        """adds a result to the rollup of its quiz and day with one UPDATE"""
+        seconds = int(result.time_spent.total_seconds())
+        updated = cls.objects.filter(quiz_id=result.quiz_id, date=result.date).update(
+            results=F('results') + 1,
+            total_percentage=F('total_percentage') + result.percentage,
+            total_time_spent=F('total_time_spent') + seconds,
+        )
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    quiz_id=result.quiz_id,
+                    date=result.date,
+                    results=1,
+                    total_percentage=result.percentage,
+                    total_time_spent=seconds,
+                )
+        except IntegrityError:
+            # another result created the row first
+            cls.record(result)
+
+    @property
+    def average_percentage(self):
+        return self.total_percentage / self.results if self.results else 0
+
+    @property
+    def average_time_spent(self):
+        return self.total_time_spent / self.results if self.results else 0
+
+    def __str__(self):
+        return f'{self.quiz} - {self.date}'
+
+
+class ScoreCount(models.Model):
+    """
+    how many results of a quiz scored each percentage: an exact histogram
+    of 101 buckets at most, see exam.percentiles.
+    """
+    quiz = models.ForeignKey(Quiz,
+        related_name='score_counts',
+        on_delete=models.CASCADE,
+    )
+    percentage = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['quiz', 'percentage'], name='exam_score_count_one_per_percentage'),
+        ]
+
+    def __str__(self):
+        return f'{self.quiz} - {self.percentage}% x {self.count}'
+
+
+class ArchivedResult(models.Model):
+    """
+    a result moved out of the Result table by the archive_results command.
+
+    It keeps the pk and fields of the result, so views reading both
+    tables can treat it as a Result. Stats, rollups, leaderboards and
+    percentiles were counted when the result was saved and keep it.
+    """
+    id = models.IntegerField(primary_key=True)
+    percentage = models.PositiveIntegerField(default=0)
+    user = models.ForeignKey(
+        get_user_model(), related_name='archived_results', on_delete=models.CASCADE)
+    time_spent = models.DurationField(default=timedelta(0))
+    no_of_questions_answered = models.IntegerField(default=0)
+    no_of_correct_choices_answered = models.IntegerField(default=0)
+    no_of_questions = models.IntegerField(default=0)
+    quiz = models.ForeignKey(Quiz,
+        related_name='archived_results',
+        on_delete=models.CASCADE,
+    )
+    date = models.DateField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-date', '-id'], name='exam_archived_user_date_id'),
+        ]
+
+    def __str__(self):
+        return f'{self.percentage}'
@@ -0,0 +1,42 @@
+from django.db.models import Prefetch
+
+from dashboard.models import Question, Choice
+
+
+class AttemptQuestions:
+    """
+    the questions of an attempt in its shuffled order, as a sequence the
+    paginator can slice.
+
+    Only the length of the stored order is needed to count the pages, and
+    a page fetches its questions by primary key, so no page sorts the
+    questions of the quiz. Questions deleted since the attempt started
+    are skipped.
+    """
+
+    def __init__(self, attempt):
+        self.attempt = attempt
+        self.order = attempt.question_order
+
+    def count(self):
+        return len(self.order)
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        pks = self.order[index]
+        questions = Question.objects.filter(pk__in=pks).select_related(
+            'quiz').prefetch_related(
+            Prefetch('choices', queryset=Choice.objects.order_by('pk')))
+        questions = {question.pk: question for question in questions}
+        page = []
+        for pk in pks:
+            if pk in questions:
+                question = questions[pk]
+                question.shuffled_choices = self.attempt.shuffle_choices(
+                    pk, question.choices.all())
+                page.append(question)
+        return page
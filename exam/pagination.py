@@ -0,0 +1,44 @@
+import heapq
+from datetime import date
+
+from django.db.models import Q
+from django.http import Http404
+
+
+def cursor_of(row):
+    """the cursor of a result, from its (date, id) key"""
+    return f'{row.date.isoformat()}.{row.pk}'
+
+
+def parse_cursor(cursor):
+    """returns the (date, id) key of a cursor, or raises 404"""
+    try:
+        day, pk = cursor.split('.')
+        return date.fromisoformat(day), int(pk)
+    except ValueError:
+        raise Http404('Invalid cursor')
+
+
+def keyset_page(querysets, cursor=None, per_page=25):
+    """
+    returns the page after `cursor` of the rows of `querysets` merged,
+    newest first by (date, id), and the cursor of the next page or None
+    on the last page. The querysets must not share ids, as results and
+    archived results do not.
+
+    Pages start from a key instead of an offset, so a deep page costs the
+    same as the first one with an index on (date, id): one query per
+    queryset.
+    """
+    if cursor:
+        day, pk = parse_cursor(cursor)
+        after = Q(date__lt=day) | Q(date=day, pk__lt=pk)
+        querysets = [queryset.filter(after) for queryset in querysets]
+    rows = list(heapq.merge(
+        *[queryset.order_by('-date', '-pk')[:per_page + 1] for queryset in querysets],
+        key=lambda row: (row.date, row.pk),
+        reverse=True,
+    ))[:per_page + 1]
+    if len(rows) > per_page:
+        return rows[:per_page], cursor_of(rows[per_page - 1])
+    return rows, None
@@ -0,0 +1,47 @@
+from dashboard.models import Question
+
+
+def build_exam_payload(attempt):
+    """
+    returns the quiz of an attempt as one JSON-ready dict built with one
+    query joining every question to its choices. The attempt should come
+    with its quiz selected.
+
+    Questions and choices are listed in the shuffled order of the attempt,
+    the order of the paginated exam pages, so question n of the payload
+    answers to the `Question<n>` session key.
+    """
+    quiz = attempt.quiz
+    if attempt.drawn:
+        rows = Question.objects.filter(pk__in=attempt.question_order)
+    else:
+        rows = Question.objects.filter(quiz__pk=quiz.pk)
+    rows = rows.order_by(
+        'pk', 'choices__pk').values_list(
+        'pk', 'question_text', 'choices__pk', 'choices__choice_text')
+
+    questions = {}
+    for question_pk, question_text, choice_pk, choice_text in rows:
+        if question_pk not in questions:
+            questions[question_pk] = {
+                'id': question_pk, 'text': question_text, 'choices': []}
+        # questions without choices come back once with a null choice
+        if choice_pk is not None:
+            questions[question_pk]['choices'].append(
+                {'id': choice_pk, 'text': choice_text})
+
+    ordered = []
+    for question_pk in attempt.question_order:
+        if question_pk in questions:
+            question = questions[question_pk]
+            question['choices'] = attempt.shuffle_choices(
+                question_pk, question['choices'])
+            ordered.append(question)
+
+    return {
+        'id': quiz.pk,
+        'title': quiz.quiz_title,
+        'text': quiz.quiz_text,
+        'duration': int(quiz.duration.total_seconds()),
+        'questions': ordered,
+    }
@@ -0,0 +1,85 @@
+"""
+percentile of a score among the results of a quiz.
+
+Percentages are saved as whole numbers from 0 to 100, so a histogram of
+101 counts replaces a quantile sketch, and histograms of two sets of
+results merge by adding them. The counts live in ScoreCount, one row per
+quiz and percentage, and a cached copy of the histogram answers lookups
+with one sum over at most 101 integers.
+
+The counts are exact for the saved percentages, which grading has
+already rounded, so two scores rounding to the same percentage count as
+a tie. Saving a result drops the cached copy, and drops it again once
+the transaction commits. A copy rebuilt by a concurrent lookup from rows
+not yet committed can still miss a few results until it expires.
+"""
+from django.core.cache import cache
+from django.db import connection, transaction, IntegrityError
+from django.db.models import F
+
+from .models import ScoreCount
+
+
+HISTOGRAM_TIMEOUT = 60 * 60
+BUCKETS = 101
+
+
+def _cache_key(quiz_pk):
+    return f'exam:score-histogram:{quiz_pk}'
+
+
+def build_histogram(quiz_pk):
+    histogram = [0] * BUCKETS
+    for percentage, count in ScoreCount.objects.filter(
+            quiz_id=quiz_pk).values_list('percentage', 'count'):
+        histogram[percentage] = count
+    return histogram
+
+
+def get_histogram(quiz_pk):
+    key = _cache_key(int(quiz_pk))
+    histogram = cache.get(key)
+    if histogram is None:
+        histogram = build_histogram(quiz_pk)
+        cache.set(key, histogram, HISTOGRAM_TIMEOUT)
+    return histogram
+
+
+def record(quiz_pk, percentage):
+    """counts a new result of a quiz"""
+    percentage = min(max(int(percentage), 0), BUCKETS - 1)
+    updated = ScoreCount.objects.filter(
+        quiz_id=quiz_pk, percentage=percentage).update(count=F('count') + 1)
+    if not updated:
+        try:
+            with transaction.atomic():
+                ScoreCount.objects.create(
+                    quiz_id=quiz_pk, percentage=percentage, count=1)
+        except IntegrityError:
+            # another result created the row first
+            return record(quiz_pk, percentage)
+    invalidate(quiz_pk)
+
+
+def percentile_of(quiz_pk, percentage):
+    """
+    returns the share, from 0 to 100, of the results of a quiz that
+    scored lower than `percentage`, or None when there are no results.
+    """
+    histogram = get_histogram(quiz_pk)
+    total = sum(histogram)
+    if not total:
+        return None
+    return sum(histogram[:max(int(percentage), 0)]) * 100 / total
+
+
+def invalidate(quiz_pk):
+    """
+    drops the cached histogram of a quiz, and drops it again once the
+    running transaction commits, as it may be cached again meanwhile from
+    the rows not yet committed.
+    """
+    key = _cache_key(int(quiz_pk))
+    cache.delete(key)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: cache.delete(key))
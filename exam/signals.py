@@ -0,0 +1,104 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django.contrib.auth import get_user_model
+
+from dashboard.models import Quiz, Question, Choice
+from .grading import invalidate_answer_key
+from .models import Result, QuizStats, LeaderboardEntry, DailyQuizRollup
+from . import leaderboard, percentiles
+from dashboard.gradebook import bump_results_version
+
+
+# set while results are archived; the archive bumps the results version
+# once per batch instead of once per deleted result
+archiving = set()
+
+# questions being deleted; their choices are deleted first and need not
+# look up the quiz, as deleting the question invalidates it anyway
+_deleting_questions = set()
+
+
+def _quiz_pk_of_choice(choice):
+    if Choice.question.is_cached(choice):
+        return choice.question.quiz_id
+    return Question.objects.filter(
+        pk=choice.question_id).values_list('quiz_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Question)
+@receiver(pre_save, sender=Choice)
+def remember_previous_quiz(sender, instance, **kwargs):
+    """
+    remembers the quiz a question or choice belonged to before saving, so
+    moving it to another quiz (e.g. in the admin) invalidates both keys.
+    """
+    instance._previous_quiz_pk = None
+    if instance.pk is None:
+        return
+    if sender is Question:
+        instance._previous_quiz_pk = Question.objects.filter(
+            pk=instance.pk).values_list('quiz_id', flat=True).first()
+    else:
+        instance._previous_quiz_pk = Choice.objects.filter(
+            pk=instance.pk).values_list('question__quiz_id', flat=True).first()
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def quiz_changed(sender, instance, **kwargs):
+    invalidate_answer_key(instance.pk)
+    bump_results_version()
+
+
+@receiver(pre_delete, sender=Question)
+def question_deleting(sender, instance, **kwargs):
+    _deleting_questions.add(instance.pk)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_changed(sender, instance, **kwargs):
+    _deleting_questions.discard(instance.pk)
+    invalidate_answer_key(getattr(instance, '_previous_quiz_pk', None))
+    invalidate_answer_key(instance.quiz_id)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def choice_changed(sender, instance, **kwargs):
+    invalidate_answer_key(getattr(instance, '_previous_quiz_pk', None))
+    if instance.question_id not in _deleting_questions:
+        invalidate_answer_key(_quiz_pk_of_choice(instance))
+
+
+@receiver(post_save, sender=Result)
+def result_created(sender, instance, created, **kwargs):
+    bump_results_version()
+    if created:
+        QuizStats.record(instance.quiz_id, instance.percentage)
+        DailyQuizRollup.record(instance)
+        leaderboard.record(instance)
+        percentiles.record(instance.quiz_id, instance.percentage)
+
+
+@receiver(post_delete, sender=Result)
+def result_deleted(sender, instance, **kwargs):
+    if instance.pk not in archiving:
+        bump_results_version()
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # logging in only saves last_login, which the gradebook does not show
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        bump_results_version()
+
+
+@receiver(post_delete, sender=get_user_model())
+def user_deleted(sender, instance, **kwargs):
+    bump_results_version()
+
+
+@receiver(post_delete, sender=LeaderboardEntry)
+def leaderboard_entry_deleted(sender, instance, **kwargs):
+    leaderboard.invalidate(instance.quiz_id)
@@ -0,0 +1,90 @@
+$(function () {
+
+  // renders the whole exam from one payload request and navigates
+  // between questions without going back to the server
+  var url = $('#client-exam').data('payload-url');
+  var questions = [];
+  var answers = {};
+  var position = 1;
+
+  function key(index) {
+    return 'Question' + index;
+  }
+
+  function renderLinks() {
+    var list = $('#question-links').empty();
+    $.each(questions, function (index) {
+      var link = $('<a class="page-link border-0 text-white" href="#">')
+        .attr('id', key(index + 1))
+        .attr('data-position', index + 1)
+        .addClass(answers[key(index + 1)] ? 'bg-success' : 'bg-danger')
+        .text(index + 1);
+      list.append($('<li class="page-item" id="top">').append(link));
+    });
+  }
+
+  function render() {
+    var question = questions[position - 1];
+    if (!question) {
+      return;
+    }
+    $('#position').text(position);
+    $('#question-text').text(question.text);
+
+    var choices = $('#choices').empty();
+    $.each(question.choices, function (_, choice) {
+      var input = $('<input type="radio" name="choice">')
+        .attr('id', key(position))
+        .val(choice.id)
+        .prop('checked', answers[key(position)] == choice.id);
+      choices.append(
+        $('<li class="list-group-item">').append(
+          $('<label>').append(input, ' ', document.createTextNode(choice.text))
+        )
+      );
+    });
+
+    $('#question-links > li').removeClass('active');
+    $('#question-links #' + key(position)).parent().addClass('active');
+  }
+
+  function go(to) {
+    if (to >= 1 && to <= questions.length) {
+      position = to;
+      render();
+    }
+  }
+
+  $(document).on('exam:answers', function (e, response) {
+    $.extend(answers, response);
+    render();
+  });
+
+  $('#exam').on('change', function () {
+    var selected = $('input[name=choice]:checked', '#exam');
+    answers[selected.attr('id')] = selected.val();
+  });
+
+  $('#question-links').on('click', 'a', function (e) {
+    e.preventDefault();
+    go(parseInt($(this).attr('data-position'), 10));
+  });
+
+  $('#prev').click(function (e) {
+    e.preventDefault();
+    go(position - 1);
+  });
+
+  $('#next').click(function (e) {
+    e.preventDefault();
+    go(position + 1);
+  });
+
+  $.getJSON(url, function (payload) {
+    questions = payload.questions;
+    $('#quiz-text').text(payload.text);
+    $('#total').text(questions.length);
+    renderLinks();
+    render();
+  });
+});
@@ -1,18 +1,7 @@
 $(function () {
 
-  function finish() {
-    var start = localStorage.getItem('start')
-    var time_spent = (new Date().getTime() - start)
-    var hours = Math.floor(
-      (time_spent % (1000 * 60 * 60 * 24)) / (1000 * 60 * 60)
-    );
-    var minutes = Math.floor((time_spent % (1000 * 60 * 60)) / (1000 * 60));
-    var seconds = Math.floor((time_spent % (1000 * 60)) / 1000);
-    var time_used = ((hours < 10 ? '0' : '') + hours) + ':' + ((minutes < 10 ? '0' : '') + minutes) + ':' + ((seconds < 10 ? '0' : '') + seconds)
-    $("input[name= 'elapse']").val(time_used)
-  }
-
-  var end = localStorage.getItem('end')
+  // the deadline is rendered into the page, so the timer needs no request
+  var end = parseInt($('#timer').data('deadline'), 10);
 
 
   function success(response) {
@@ -24,6 +13,7 @@ $(function () {
       $('#top > #' + key).removeClass('bg-danger')
       $('#top > #' + key).addClass('bg-success')
     }
+    $(document).trigger('exam:answers', [response]);
   }
 
 
@@ -48,34 +38,82 @@ $(function () {
 
     if (duration < 1) {
       clearInterval(x);
-      finish();
       $('input#finish').click();
     }
   }, 1000);
 
-  $('input#finish').click(function (e) {
-    finish();
-  });
+  // answers chosen since the last flush, sent to the server in batches
+  var FLUSH_INTERVAL = 10000;
+  var pending = {};
 
-  $('#exam').on('change', function () {
-    var selectedId = $('input[name=choice]:checked', '#exam').attr('id');
+  function csrfToken() {
+    return $("input[name= 'csrfmiddlewaretoken']").val();
+  }
 
-    data = {
-      [selectedId]: $('input[name=choice]:checked', '#exam').attr('value'),
-      csrfmiddlewaretoken: $("input[name= 'csrfmiddlewaretoken']").val(),
+  function batch() {
+    return {
+      version: new Date().getTime(),
+      answers: JSON.stringify(pending),
+      csrfmiddlewaretoken: csrfToken(),
     };
+  }
 
+  function flush() {
+    if ($.isEmptyObject(pending)) {
+      return;
+    }
+    var sent = pending;
+    var data = batch();
+    pending = {};
     $.ajax({
       type: 'POST',
-      url: '/exam/result/',
+      url: '/exam/autosave/',
       data: data,
-      success: success,
+    }).fail(function () {
+      // keep newer choices made while the flush was in flight
+      pending = $.extend(sent, pending);
     });
+  }
+
+  function flushOnLeave() {
+    if ($.isEmptyObject(pending)) {
+      return;
+    }
+    var data = batch();
+    var form = new FormData();
+    for (var key in data) {
+      form.append(key, data[key]);
+    }
+    navigator.sendBeacon('/exam/autosave/', form);
+    pending = {};
+  }
+
+  setInterval(flush, FLUSH_INTERVAL);
+  $(window).on('pagehide', flushOnLeave);
+
+  $('input#finish').click(function (e) {
+    // the finish form saves whatever has not been flushed yet
+    var form = $(this).closest('form');
+    for (var key in pending) {
+      $('<input type="hidden">').attr('name', key).val(pending[key]).appendTo(form);
+    }
+    pending = {};
+  });
+
+  $('#exam').on('change', function () {
+    var selected = $('input[name=choice]:checked', '#exam');
+    var answer = {
+      [selected.attr('id')]: selected.attr('value'),
+    };
+    $.extend(pending, answer);
+    success(answer);
   });
 
   $.ajax({
     type: 'GET',
-    url: '/exam/result/',
-    success: success,
+    url: '/exam/autosave/',
+    success: function (response) {
+      success(response.answers);
+    },
   });
 });
@@ -0,0 +1,56 @@
+$(function () {
+
+  // loads older results into the table when the reader reaches the
+  // bottom of the page; the Older Results link is the fallback
+  var link = $('#older-results');
+  var next = link.length ? new URLSearchParams(link.attr('href').slice(1)).get('after') : null;
+  var loading = false;
+
+  function cell(text, hidden) {
+    return $('<td>').addClass(hidden ? 'd-none d-sm-table-cell' : '').text(text);
+  }
+
+  function append(result) {
+    var row = $('<tr>').append(
+      cell(result.date),
+      cell(result.quiz),
+      cell(result.percentage + ' %'),
+      cell(result.time_spent, true),
+      cell(result.no_of_questions, true),
+      cell(result.no_of_correct_choices_answered, true),
+      cell(result.no_of_questions_answered, true)
+    );
+    $('#results').append($('<tbody>').append(row));
+  }
+
+  function load() {
+    if (!next || loading) {
+      return;
+    }
+    loading = true;
+    $.getJSON('', { format: 'json', after: next }, function (response) {
+      $.each(response.results, function (_, result) {
+        append(result);
+      });
+      next = response.next;
+      if (!next) {
+        link.parent().remove();
+      } else {
+        link.attr('href', '?after=' + next);
+      }
+    }).always(function () {
+      loading = false;
+    });
+  }
+
+  $(window).on('scroll', function () {
+    if ($(window).scrollTop() + $(window).height() > $(document).height() - 200) {
+      load();
+    }
+  });
+
+  link.on('click', function (e) {
+    e.preventDefault();
+    load();
+  });
+});
@@ -0,0 +1,110 @@
+import os
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from dashboard.export import export_queryset
+from dashboard.gradebook import pivot
+from dashboard.models import Quiz
+from exam.archive import archive_results
+from exam.models import (
+    Result, ArchivedResult, LeaderboardEntry, QuizStats, DailyQuizRollup)
+from exam.pagination import keyset_page
+
+
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+        cls.quiz = Quiz.objects.create(quiz_title='title 1', quiz_text='text 1')
+        today = timezone.localdate()
+        for i in range(10):
+            Result.objects.create(
+                percentage=i * 10, user=cls.student, quiz=cls.quiz,
+                time_spent=timedelta(minutes=i), date=today - timedelta(days=100 * i))
+
+    def test_moves_old_results_in_batches(self):
+        archived = archive_results(
+            timezone.localdate() - timedelta(days=250), batch_size=3)
+        self.assertEqual(archived, 7)
+        self.assertEqual(Result.objects.count(), 3)
+        self.assertEqual(ArchivedResult.objects.count(), 7)
+        archived = ArchivedResult.objects.get(percentage=90)
+        self.assertEqual(archived.time_spent, timedelta(minutes=9))
+        self.assertEqual(archived.user, self.student)
+
+    def test_command_uses_setting(self):
+        with self.settings(RESULT_ARCHIVE_AFTER_DAYS=450):
+            call_command('archive_results', stdout=open(os.devnull, 'w'))
+        self.assertEqual(Result.objects.count(), 5)
+
+    def test_leaderboard_entry_kept(self):
+        archive_results(timezone.localdate() + timedelta(days=1))
+        entry = LeaderboardEntry.objects.get(quiz=self.quiz, user=self.student)
+        self.assertIsNone(entry.result_id)
+        self.assertEqual(entry.percentage, 90)
+
+    def test_history_reads_both_tables(self):
+        archive_results(timezone.localdate() - timedelta(days=450))
+        self.client.force_login(self.student)
+        seen = []
+        cursor = None
+        while True:
+            params = {'after': cursor} if cursor else {}
+            response = self.client.get(reverse('exam:result_list'), params)
+            seen.extend(result.percentage for result in response.context['results'])
+            cursor = response.context['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, [i * 10 for i in range(10)])
+
+    def test_keyset_pages_cross_tables(self):
+        archive_results(timezone.localdate() - timedelta(days=450))
+        querysets = [Result.objects.all(), ArchivedResult.objects.all()]
+        seen = []
+        cursor = None
+        while True:
+            rows, cursor = keyset_page(querysets, cursor, per_page=3)
+            seen.extend(row.percentage for row in rows)
+            if cursor is None:
+                break
+        self.assertEqual(seen, [i * 10 for i in range(10)])
+
+    def test_rebuilds_read_both_tables(self):
+        stats = QuizStats.objects.get(quiz=self.quiz)
+        rollups = list(DailyQuizRollup.objects.order_by('date').values_list(
+            'date', 'results', 'total_percentage', 'total_time_spent'))
+        archive_results(timezone.localdate() - timedelta(days=450))
+        devnull = open(os.devnull, 'w')
+        call_command('rebuild_quiz_stats', stdout=devnull)
+        call_command('rebuild_daily_rollups', stdout=devnull)
+        call_command('rebuild_leaderboards', stdout=devnull)
+        rebuilt = QuizStats.objects.get(quiz=self.quiz)
+        self.assertEqual(
+            (rebuilt.attempts, rebuilt.total, rebuilt.total_squares,
+             rebuilt.min_percentage, rebuilt.max_percentage, rebuilt.histogram()),
+            (stats.attempts, stats.total, stats.total_squares,
+             stats.min_percentage, stats.max_percentage, stats.histogram()))
+        self.assertEqual(list(DailyQuizRollup.objects.order_by('date').values_list(
+            'date', 'results', 'total_percentage', 'total_time_spent')), rollups)
+        entry = LeaderboardEntry.objects.get(quiz=self.quiz, user=self.student)
+        self.assertEqual((entry.percentage, entry.result_id), (90, None))
+
+    def test_export_and_gradebook_read_both_tables(self):
+        archive_results(timezone.localdate() - timedelta(days=450))
+        self.assertEqual(
+            [row[5] for row in export_queryset(quiz=self.quiz.pk)],
+            [i * 10 for i in range(10)])
+        self.assertEqual(
+            [row[5] for row in export_queryset(
+                date_to=timezone.localdate() - timedelta(days=650))],
+            [70, 80, 90])
+        # the best result is archived, the latest one is not
+        self.assertEqual(pivot([self.student.pk]), {(self.student.pk, self.quiz.pk): (90, 0)})
+        Result.objects.all().delete()
+        self.assertEqual(pivot([self.student.pk]), {(self.student.pk, self.quiz.pk): (90, 50)})
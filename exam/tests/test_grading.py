@@ -0,0 +1,198 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from dashboard import models
+from exam.grading import (
+    grade, get_answer_key, record_result, compile_answer_key, _answer_key_version)
+from exam.models import ExamAttempt, Answer, Result
+
+
+class GradeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.quiz = models.Quiz.objects.create(
+            quiz_title='title 1', quiz_text='text 1')
+
+        ### create 10 questions with one right choice each ###
+        cls.right_choices = []
+        cls.wrong_choices = []
+        for i in range(1, 11):
+            question = models.Question.objects.create(
+                question_text=f'question text {i}', quiz=cls.quiz)
+            cls.right_choices.append(models.Choice.objects.create(
+                choice_text='right', mark='right', question=question))
+            cls.wrong_choices.append(models.Choice.objects.create(
+                choice_text='wrong', mark='wrong', question=question))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_no_answers(self):
+        result = grade(self.quiz.pk, [])
+        self.assertEqual(result['no_of_questions'], 10)
+        self.assertEqual(result['no_of_questions_answered'], 0)
+        self.assertEqual(result['no_of_correct_choices_answered'], 0)
+        self.assertEqual(result['percentage'], 0)
+        self.assertEqual(len(result['corrections']), 10)
+
+    def test_mixed_answers(self):
+        answers = [str(choice.pk) for choice in self.right_choices[:3]]
+        answers.append(str(self.wrong_choices[5].pk))
+        result = grade(self.quiz.pk, answers)
+        self.assertEqual(result['no_of_questions_answered'], 4)
+        self.assertEqual(result['no_of_correct_choices_answered'], 3)
+        self.assertEqual(result['percentage'], 30)
+        self.assertEqual(result['corrections'][5]['your_choice'], 'wrong')
+        self.assertEqual(result['corrections'][0]['your_choice'], 'right')
+
+    def test_query_count_does_not_grow_with_answers(self):
+        answers = [choice.pk for choice in self.right_choices]
+        # compiling the answer key
+        with self.assertNumQueries(2):
+            result = grade(self.quiz.pk, answers)
+        self.assertEqual(result['percentage'], 100)
+        # the cached answer key
+        with self.assertNumQueries(0):
+            result = grade(self.quiz.pk, answers)
+        self.assertEqual(result['percentage'], 100)
+
+    def test_record_result_with_answers(self):
+        student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+        attempt = ExamAttempt.start(self.quiz, student)
+        answers = [choice.pk for choice in self.right_choices[:4]]
+        result = grade(self.quiz.pk, answers)
+        result['time_spent'] = timedelta(minutes=1)
+        record_result(student, self.quiz.pk, result, attempt)
+        self.assertEqual(Result.objects.get().percentage, 40)
+        self.assertEqual(attempt.answers.count(), 4)
+
+    def test_record_result_query_count(self):
+        student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+        result = grade(self.quiz.pk, [choice.pk for choice in self.right_choices])
+        result['time_spent'] = timedelta(minutes=1)
+        # the first result creates the rows the next ones update
+        record_result(student, self.quiz.pk, result, ExamAttempt.start(self.quiz, student))
+        attempt = ExamAttempt.start(self.quiz, student)
+        with self.assertNumQueries(9):
+            # savepoint, result, one update each of the stats, daily rollup
+            # and score count, the leaderboard update and the entry it
+            # did not beat, answers in one insert, release
+            record_result(student, self.quiz.pk, result, attempt)
+
+    def test_record_result_without_attempt(self):
+        student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+        result = grade(self.quiz.pk, [self.right_choices[0].pk])
+        result['time_spent'] = timedelta(minutes=1)
+        record_result(student, self.quiz.pk, result)
+        self.assertEqual(Result.objects.count(), 1)
+        self.assertFalse(Answer.objects.exists())
+
+    def test_ignores_junk_and_foreign_choices(self):
+        other_quiz = models.Quiz.objects.create(
+            quiz_title='title 2', quiz_text='text 2')
+        other_question = models.Question.objects.create(
+            question_text='other', quiz=other_quiz)
+        other_choice = models.Choice.objects.create(
+            choice_text='other', mark='right', question=other_question)
+        result = grade(self.quiz.pk, ['junk', None, other_choice.pk])
+        self.assertEqual(result['no_of_questions_answered'], 0)
+
+    def test_repeated_answers_count_once(self):
+        right = str(self.right_choices[0].pk)
+        result = grade(self.quiz.pk, [right] * 8 + [str(self.wrong_choices[1].pk)] * 3)
+        self.assertEqual(result['no_of_questions_answered'], 2)
+        self.assertEqual(result['no_of_correct_choices_answered'], 1)
+        self.assertEqual(result['percentage'], 10)
+
+    def test_quiz_without_questions(self):
+        empty_quiz = models.Quiz.objects.create(
+            quiz_title='empty', quiz_text='empty')
+        result = grade(empty_quiz.pk, [])
+        self.assertEqual(result['no_of_questions'], 0)
+        self.assertEqual(result['percentage'], 0)
+
+
+class AnswerKeyInvalidationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ### create teacher ###
+        cls.teacher = get_user_model().objects.create_user(
+            email='teacher@test.com', password='asdf7890',)
+        cls.teacher.teacher = True
+        cls.teacher.save()
+
+        cls.quiz = models.Quiz.objects.create(
+            quiz_title='title 1', quiz_text='text 1')
+        cls.other_quiz = models.Quiz.objects.create(
+            quiz_title='title 2', quiz_text='text 2')
+        cls.question = models.Question.objects.create(
+            question_text='question text', quiz=cls.quiz)
+        cls.right = models.Choice.objects.create(
+            choice_text='right', mark='right', question=cls.question)
+        cls.wrong = models.Choice.objects.create(
+            choice_text='wrong', mark='wrong', question=cls.question)
+
+    def setUp(self):
+        cache.clear()
+        get_answer_key(self.quiz.pk)
+
+    def test_key_is_cached(self):
+        with self.assertNumQueries(0):
+            answer_key = get_answer_key(self.quiz.pk)
+        self.assertEqual(answer_key['answers'], {self.question.pk: self.right.pk})
+        self.assertEqual(answer_key['no_of_questions'], 1)
+
+    def test_choice_update_view_invalidates(self):
+        self.client.login(email='teacher@test.com', password='asdf7890')
+        self.client.post(
+            reverse('dash:choice_update', args=[self.wrong.pk]),
+            data={'choice_text': 'now right', 'mark': 'right'},
+        )
+        answer_key = get_answer_key(self.quiz.pk)
+        self.assertEqual(answer_key['answers'], {self.question.pk: self.wrong.pk})
+        self.assertEqual(answer_key['choices'][self.wrong.pk][1], 'now right')
+
+    def test_new_question_invalidates(self):
+        models.Question.objects.create(question_text='new', quiz=self.quiz)
+        self.assertEqual(get_answer_key(self.quiz.pk)['no_of_questions'], 2)
+
+    def test_moving_question_invalidates_both_quizzes(self):
+        get_answer_key(self.other_quiz.pk)
+        question = models.Question.objects.get(pk=self.question.pk)
+        question.quiz = self.other_quiz
+        question.save()
+        self.assertEqual(get_answer_key(self.quiz.pk)['no_of_questions'], 0)
+        self.assertEqual(get_answer_key(self.other_quiz.pk)['no_of_questions'], 1)
+
+    def test_deleting_choice_invalidates(self):
+        models.Choice.objects.get(pk=self.right.pk).delete()
+        self.assertEqual(get_answer_key(self.quiz.pk)['answers'], {})
+
+    def test_quiz_update_invalidates(self):
+        self.quiz.save()
+        with self.assertNumQueries(2):
+            get_answer_key(self.quiz.pk)
+
+
+class AnswerKeyCommitTest(TransactionTestCase):
+    def test_key_compiled_before_commit_is_not_read(self):
+        quiz = models.Quiz.objects.create(quiz_title='title 1', quiz_text='text 1')
+        question = models.Question.objects.create(question_text='question', quiz=quiz)
+        models.Choice.objects.create(
+            choice_text='right', mark='right', question=question)
+        cache.clear()
+        old_key = compile_answer_key(quiz.pk)
+        with transaction.atomic():
+            models.Choice.objects.create(
+                choice_text='wrong', mark='wrong', question=question)
+            # a Finish running meanwhile caches the key of the committed rows
+            cache.set(f'exam:answer-key:{quiz.pk}:{_answer_key_version(quiz.pk)}', old_key)
+        self.assertEqual(len(get_answer_key(quiz.pk)['choices']), 2)
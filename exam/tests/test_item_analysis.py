@@ -0,0 +1,137 @@
+import os
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from dashboard import models
+from exam.benchmark import seed_quiz
+from exam.item_analysis import ItemAnalysis, analyse_quiz
+from exam.management.commands.bench_item_analysis import random_chunks, seed_answers
+from exam.models import ExamAttempt, Answer, ItemStatistic
+
+
+class ItemAnalysisTest(TestCase):
+    def setUp(self):
+        # 6 attempts x 3 questions with 2 choices each, choice 2q is right
+        self.matrix = np.array([
+            [0, 2, 4],
+            [0, 2, 5],
+            [0, 3, 5],
+            [1, 2, -1],
+            [1, 3, 5],
+            [-1, 3, 5],
+        ])
+        self.analysis = ItemAnalysis(3, [0, 0, 1, 1, 2, 2], [True, False] * 3)
+
+    def add(self, matrix):
+        attempt_index, question_index = np.nonzero(matrix >= 0)
+        self.analysis.add_chunk(
+            len(matrix), attempt_index, matrix[attempt_index, question_index])
+
+    def test_matches_direct_computation(self):
+        self.add(self.matrix)
+        correct = np.isin(self.matrix, [0, 2, 4]).astype(float)
+        rest = correct.sum(axis=1)[:, None] - correct
+        expected = [np.corrcoef(correct[:, j], rest[:, j])[0, 1] for j in range(3)]
+        np.testing.assert_allclose(self.analysis.difficulty(), correct.mean(axis=0))
+        np.testing.assert_allclose(self.analysis.discrimination(), expected)
+        np.testing.assert_allclose(
+            self.analysis.choice_rates(), np.array([3, 2, 3, 3, 1, 4]) / 6)
+
+    def test_chunks_add_up(self):
+        self.add(self.matrix[:4])
+        self.add(self.matrix[4:])
+        chunked = self.analysis
+        self.analysis = ItemAnalysis(3, [0, 0, 1, 1, 2, 2], [True, False] * 3)
+        self.add(self.matrix)
+        np.testing.assert_allclose(
+            chunked.discrimination(), self.analysis.discrimination())
+        self.assertEqual(chunked.attempts, 6)
+
+    def test_no_variance_is_nan(self):
+        self.add(np.array([[0, 2, 4], [0, 2, 4]]))
+        self.assertTrue(np.isnan(self.analysis.discrimination()).all())
+
+
+class AnalyseQuizTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.quiz = models.Quiz.objects.create(
+            quiz_title='title 1', quiz_text='text 1')
+        cls.questions = []
+        cls.choices = []
+        for i in range(3):
+            question = models.Question.objects.create(
+                question_text=f'question {i}', quiz=cls.quiz)
+            cls.questions.append(question)
+            cls.choices.append([
+                models.Choice.objects.create(
+                    choice_text='right', mark='right', question=question),
+                models.Choice.objects.create(
+                    choice_text='wrong', mark='wrong', question=question),
+            ])
+        student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+        # the first two attempts get everything right, the last one nothing
+        picks = [(0, 0, 0), (0, 0, 0), (1, 1, 1)]
+        for pick in picks:
+            attempt = ExamAttempt.start(cls.quiz, student)
+            attempt.finished_at = timezone.now()
+            attempt.save()
+            for question, choices, i in zip(cls.questions, cls.choices, pick):
+                Answer.objects.create(
+                    attempt=attempt, question=question, choice=choices[i])
+        # unfinished attempts are left out
+        unfinished = ExamAttempt.start(cls.quiz, student)
+        Answer.objects.create(
+            attempt=unfinished, question=cls.questions[0], choice=cls.choices[0][1])
+        # so are anonymous attempts, which save no answers
+        anonymous = ExamAttempt.start(cls.quiz)
+        anonymous.finished_at = timezone.now()
+        anonymous.save()
+        # and attempts drawn from question pools
+        drawn = ExamAttempt.start(cls.quiz, student)
+        drawn.finished_at = timezone.now()
+        drawn.drawn = True
+        drawn.save()
+        Answer.objects.create(
+            attempt=drawn, question=cls.questions[0], choice=cls.choices[0][1])
+
+    def test_saves_statistics(self):
+        analyse_quiz(self.quiz.pk, chunk_size=2)
+        statistic = ItemStatistic.objects.get(question=self.questions[0])
+        self.assertEqual(statistic.attempts, 3)
+        self.assertAlmostEqual(statistic.difficulty, 0.6667)
+        self.assertAlmostEqual(statistic.discrimination, 1.0)
+        self.assertAlmostEqual(statistic.rate_of(self.choices[0][1].pk), 0.3333)
+
+    def test_replaces_previous_statistics(self):
+        analyse_quiz(self.quiz.pk)
+        analyse_quiz(self.quiz.pk)
+        self.assertEqual(ItemStatistic.objects.count(), 3)
+
+
+class BenchItemAnalysisTest(TestCase):
+    def test_seeded_answers_match_generated_chunks(self):
+        chunks = list(random_chunks(7, 5, 3, chunk_size=3))
+        analysis = ItemAnalysis(5, np.repeat(np.arange(5), 3), np.tile(np.arange(3) == 0, 5))
+        for chunk in chunks:
+            analysis.add_chunk(*chunk)
+        student = get_user_model().objects.create_user(email='student@test.com')
+        quiz, _ = seed_quiz(5, 3)
+        self.assertEqual(
+            seed_answers(quiz, student, chunks), sum(len(chunk[1]) for chunk in chunks))
+        statistics = analyse_quiz(quiz.pk, chunk_size=2)
+        self.assertEqual(statistics[0].attempts, 7)
+        self.assertEqual(
+            [statistic.difficulty for statistic in statistics],
+            [round(float(value), 4) for value in analysis.difficulty()])
+
+    def test_database_mode_leaves_no_rows(self):
+        call_command(
+            'bench_item_analysis', '20x5', '--database', stdout=open(os.devnull, 'w'))
+        self.assertFalse(models.Quiz.objects.exists())
+        self.assertFalse(Answer.objects.exists())
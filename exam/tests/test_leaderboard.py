@@ -0,0 +1,146 @@
+import os
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from dashboard.models import Quiz
+from exam import leaderboard
+from exam.models import Result, LeaderboardEntry
+
+
+class LeaderboardTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.quiz = Quiz.objects.create(quiz_title='title 1', quiz_text='text 1')
+        cls.users = [
+            get_user_model().objects.create_user(
+                email=f'student{i}@test.com', password='asdf7890')
+            for i in range(4)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def result(self, user, percentage, minutes):
+        return Result.objects.create(
+            percentage=percentage, time_spent=timedelta(minutes=minutes),
+            user=user, quiz=self.quiz)
+
+    def test_keeps_best_result(self):
+        self.result(self.users[0], 50, 5)
+        best = self.result(self.users[0], 80, 9)
+        self.result(self.users[0], 80, 10)
+        self.result(self.users[0], 20, 1)
+        entry = LeaderboardEntry.objects.get(quiz=self.quiz, user=self.users[0])
+        self.assertEqual(entry.result_id, best.pk)
+        self.assertEqual(entry.time_spent, timedelta(minutes=9))
+
+    def test_ranks(self):
+        self.result(self.users[0], 50, 5)
+        self.result(self.users[1], 90, 8)
+        self.result(self.users[2], 90, 3)
+        self.result(self.users[3], 50, 5)
+        self.assertEqual(leaderboard.rank_of(self.quiz.pk, self.users[2].pk), (1, 4))
+        self.assertEqual(leaderboard.rank_of(self.quiz.pk, self.users[1].pk), (2, 4))
+        # the same percentage and time share a rank
+        self.assertEqual(leaderboard.rank_of(self.quiz.pk, self.users[0].pk), (3, 4))
+        self.assertEqual(leaderboard.rank_of(self.quiz.pk, self.users[3].pk), (3, 4))
+        self.assertEqual(
+            leaderboard.top(self.quiz.pk, 2),
+            [(1, 'stu***', 90, 180), (2, 'stu***', 90, 480)],
+        )
+
+    def test_cached_top_dropped_on_save(self):
+        self.result(self.users[0], 50, 5)
+        self.assertEqual(leaderboard.top(self.quiz.pk), [(1, 'stu***', 50, 300)])
+        with self.assertNumQueries(0):
+            leaderboard.top(self.quiz.pk)
+        self.result(self.users[1], 60, 5)
+        self.assertEqual(
+            leaderboard.top(self.quiz.pk),
+            [(1, 'stu***', 60, 300), (2, 'stu***', 50, 300)])
+        # a result that is no better keeps the cached top
+        self.result(self.users[1], 10, 5)
+        with self.assertNumQueries(0):
+            leaderboard.top(self.quiz.pk)
+
+    def test_rank_counts_committed_entries(self):
+        self.result(self.users[0], 50, 5)
+        self.result(self.users[1], 60, 5)
+        with self.assertNumQueries(2):
+            self.assertEqual(
+                leaderboard.rank_of(self.quiz.pk, self.users[0].pk), (2, 2))
+        self.result(self.users[0], 70, 5)
+        self.assertEqual(leaderboard.rank_of(self.quiz.pk, self.users[0].pk), (1, 2))
+
+    def test_unranked_user(self):
+        self.assertEqual(leaderboard.rank_of(self.quiz.pk, self.users[0].pk), (None, 0))
+
+    def test_rebuild(self):
+        self.result(self.users[0], 50, 5)
+        best = self.result(self.users[0], 70, 5)
+        LeaderboardEntry.objects.all().delete()
+        call_command('rebuild_leaderboards', stdout=open(os.devnull, 'w'))
+        self.assertEqual(LeaderboardEntry.objects.get().result_id, best.pk)
+        self.assertEqual(leaderboard.rank_of(self.quiz.pk, self.users[0].pk), (1, 1))
+
+    def test_display_names(self):
+        self.assertEqual(
+            leaderboard.display_name('Ada', 'Obi', 'ada@test.com'), 'Ada Obi')
+        self.assertEqual(leaderboard.display_name('', '', 'ada@test.com'), 'ada***')
+        user = self.users[1]
+        user.first_name = 'Ada'
+        user.save()
+        self.result(self.users[0], 50, 5)
+        leaderboard.top(self.quiz.pk)
+        # a user new to the cached leaderboard
+        self.result(user, 60, 5)
+        self.assertEqual(
+            [name for _, name, _, _ in leaderboard.top(self.quiz.pk)], ['Ada', 'stu***'])
+
+    def test_leaderboard_view(self):
+        self.result(self.users[0], 50, 5)
+        self.result(self.users[1], 40, 5)
+        self.client.force_login(self.users[0])
+        response = self.client.get(reverse('exam:leaderboard', args=[self.quiz.pk]))
+        self.assertTemplateUsed(response, 'exam/leaderboard.html')
+        self.assertContains(response, 'stu***', count=2)
+        # the emails of other students are not shown
+        self.assertNotContains(response, 'student1@test.com')
+        self.assertContains(response, 'Your Rank: 1 of 2')
+
+    def test_leaderboard_view_requires_login(self):
+        response = self.client.get(reverse('exam:leaderboard', args=[self.quiz.pk]))
+        self.assertEqual(response.status_code, 302)
+
+
+class LeaderboardCommitTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.quiz = Quiz.objects.create(quiz_title='title 1', quiz_text='text 1')
+        self.user = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+
+    def test_rolled_back_result_leaves_no_entry(self):
+        leaderboard.top(self.quiz.pk)
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                Result.objects.create(
+                    percentage=90, time_spent=timedelta(minutes=5),
+                    user=self.user, quiz=self.quiz)
+                raise ValueError
+        self.assertEqual(leaderboard.top(self.quiz.pk), [])
+        self.assertEqual(leaderboard.rank_of(self.quiz.pk, self.user.pk), (None, 0))
+
+    def test_top_cached_before_commit_is_dropped(self):
+        with transaction.atomic():
+            Result.objects.create(
+                percentage=90, time_spent=timedelta(minutes=5),
+                user=self.user, quiz=self.quiz)
+            leaderboard.top(self.quiz.pk)
+        self.assertIsNone(cache.get(leaderboard._cache_key(self.quiz.pk)))
@@ -1,11 +1,13 @@
-from datetime import timedelta
+import os
+from datetime import date, timedelta
 
+from django.core.management import call_command
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
 from exam import models
-from dashboard.models import Quiz
+from dashboard.models import Quiz, Question
 
 
 class ExamResultListViewTest(TestCase):
@@ -105,3 +107,143 @@ class ExamResultListViewTest(TestCase):
 
     def test_str(self):
         self.assertEqual(str(self.result), str(self.result.percentage))
+
+
+class ExamAttemptModelTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.quiz = Quiz.objects.create(
+            quiz_title='title 1',
+            quiz_text='text 1',
+            duration=timedelta(minutes=10),
+        )
+        for i in range(1, 11):
+            Question.objects.create(question_text=f'question {i}', quiz=cls.quiz)
+
+    def setUp(self):
+        self.attempt = models.ExamAttempt.start(self.quiz)
+
+    def test_deadline_is_start_plus_duration(self):
+        self.assertEqual(
+            self.attempt.deadline - self.attempt.started_at, timedelta(minutes=10))
+
+    def test_token_round_trip(self):
+        token = self.attempt.token()
+        self.assertEqual(models.ExamAttempt.pk_from_token(token), self.attempt.pk)
+
+    def test_tampered_token(self):
+        token = self.attempt.token()
+        self.assertIsNone(models.ExamAttempt.pk_from_token(token + 'x'))
+        self.assertIsNone(models.ExamAttempt.pk_from_token(None))
+
+    def test_time_spent(self):
+        now = self.attempt.started_at + timedelta(minutes=3, microseconds=5)
+        self.assertEqual(self.attempt.time_spent(now), timedelta(minutes=3))
+
+    def test_time_spent_stops_at_deadline(self):
+        now = self.attempt.started_at + timedelta(hours=2)
+        self.assertEqual(self.attempt.time_spent(now), timedelta(minutes=10))
+
+    def test_question_order_is_a_permutation(self):
+        self.assertCountEqual(
+            self.attempt.question_order,
+            self.quiz.questions.values_list('pk', flat=True),
+        )
+
+    def test_question_order_depends_on_seed(self):
+        attempt = models.ExamAttempt.objects.get(pk=self.attempt.pk)
+        self.assertEqual(attempt.question_order, self.attempt.question_order)
+        orders = {
+            tuple(models.ExamAttempt.start(self.quiz).question_order)
+            for _ in range(5)
+        }
+        self.assertGreater(len(orders), 1)
+
+    def test_shuffle_choices_is_stable(self):
+        choices = list(range(1, 9))
+        shuffled = self.attempt.shuffle_choices(3, choices)
+        self.assertCountEqual(shuffled, choices)
+        self.assertEqual(self.attempt.shuffle_choices(3, choices), shuffled)
+        self.assertEqual(choices, list(range(1, 9)))
+
+
+class QuizStatsModelTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+        cls.quiz = Quiz.objects.create(quiz_title='title 1', quiz_text='text 1')
+        for percentage in (40, 100, 70, 10):
+            models.Result.objects.create(
+                percentage=percentage, user=cls.student, quiz=cls.quiz,
+                time_spent=timedelta(minutes=5))
+
+    def test_updated_when_result_created(self):
+        stats = models.QuizStats.objects.get(quiz=self.quiz)
+        self.assertEqual(stats.attempts, 4)
+        self.assertEqual(stats.total, 220)
+        self.assertEqual(stats.total_squares, 40**2 + 100**2 + 70**2 + 10**2)
+        self.assertEqual(stats.min_percentage, 10)
+        self.assertEqual(stats.max_percentage, 100)
+        self.assertEqual(stats.mean, 55)
+        self.assertAlmostEqual(stats.stdev, 33.54, places=2)
+
+    def test_histogram(self):
+        histogram = dict(models.QuizStats.objects.get(quiz=self.quiz).histogram())
+        self.assertEqual(histogram['10-19'], 1)
+        self.assertEqual(histogram['40-49'], 1)
+        self.assertEqual(histogram['70-79'], 1)
+        self.assertEqual(histogram['90-100'], 1)
+        self.assertEqual(histogram['0-9'], 0)
+
+    def test_one_update_per_result(self):
+        with self.assertNumQueries(1):
+            models.QuizStats.record(self.quiz.pk, 50)
+
+    def test_rebuild(self):
+        models.Result.objects.filter(percentage=100).delete()
+        models.QuizStats.objects.filter(quiz=self.quiz).update(attempts=99)
+        call_command('rebuild_quiz_stats', stdout=open(os.devnull, 'w'))
+        stats = models.QuizStats.objects.get(quiz=self.quiz)
+        self.assertEqual(stats.attempts, 3)
+        self.assertEqual(stats.total, 120)
+        self.assertEqual(stats.max_percentage, 70)
+        self.assertEqual(stats.bucket_9, 0)
+        self.assertEqual(stats.bucket_4, 1)
+
+
+class IndexPlanTest(TestCase):
+    def test_hot_paths_use_their_indexes(self):
+        # raises CommandError naming any index a query plan does not use
+        call_command('explain_indexes', '--check', stdout=open(os.devnull, 'w'))
+
+
+class DailyQuizRollupModelTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+        cls.quiz = Quiz.objects.create(quiz_title='title 1', quiz_text='text 1')
+        for percentage, minutes, day in ((40, 4, 1), (80, 6, 1), (50, 10, 2)):
+            models.Result.objects.create(
+                percentage=percentage, user=cls.student, quiz=cls.quiz,
+                time_spent=timedelta(minutes=minutes), date=date(2020, 10, day))
+
+    def test_updated_when_result_created(self):
+        rollup = models.DailyQuizRollup.objects.get(quiz=self.quiz, date=date(2020, 10, 1))
+        self.assertEqual(rollup.results, 2)
+        self.assertEqual(rollup.total_percentage, 120)
+        self.assertEqual(rollup.total_time_spent, 600)
+        self.assertEqual(rollup.average_percentage, 60)
+        self.assertEqual(rollup.average_time_spent, 300)
+
+    def test_rebuild_date_range(self):
+        models.DailyQuizRollup.objects.update(results=99)
+        call_command(
+            'rebuild_daily_rollups', '--from', '2020-10-02', '--to', '2020-10-02',
+            stdout=open(os.devnull, 'w'))
+        rollups = dict(models.DailyQuizRollup.objects.values_list('date', 'results'))
+        # days outside the range are left alone
+        self.assertEqual(rollups, {date(2020, 10, 1): 99, date(2020, 10, 2): 1})
+        self.assertEqual(
+            models.DailyQuizRollup.objects.get(date=date(2020, 10, 2)).total_time_spent, 600)
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from dashboard.models import Quiz
+from exam import percentiles
+from exam.models import Result, ScoreCount
+
+
+class PercentilesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+        cls.quiz = Quiz.objects.create(quiz_title='title 1', quiz_text='text 1')
+        cls.scores = [0, 10, 10, 40, 55, 70, 70, 70, 90, 100]
+        for percentage in cls.scores:
+            Result.objects.create(
+                percentage=percentage, user=cls.student, quiz=cls.quiz,
+                time_spent=timedelta(minutes=1))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts(self):
+        self.assertEqual(
+            ScoreCount.objects.get(quiz=self.quiz, percentage=70).count, 3)
+        self.assertEqual(ScoreCount.objects.filter(quiz=self.quiz).count(), 7)
+
+    def test_matches_sorting_every_score(self):
+        for percentage in (0, 10, 11, 70, 71, 100):
+            lower = sum(score < percentage for score in self.scores)
+            self.assertEqual(
+                percentiles.percentile_of(self.quiz.pk, percentage),
+                lower * 100 / len(self.scores))
+
+    def test_cached_histogram_dropped_on_save(self):
+        percentiles.percentile_of(self.quiz.pk, 50)
+        with self.assertNumQueries(0):
+            percentiles.percentile_of(self.quiz.pk, 50)
+        Result.objects.create(
+            percentage=20, user=self.student, quiz=self.quiz,
+            time_spent=timedelta(minutes=1))
+        self.assertIsNone(cache.get(percentiles._cache_key(self.quiz.pk)))
+        self.assertEqual(percentiles.percentile_of(self.quiz.pk, 50), 5 * 100 / 11)
+
+    def test_quiz_without_results(self):
+        other_quiz = Quiz.objects.create(quiz_title='title 2', quiz_text='text 2')
+        self.assertIsNone(percentiles.percentile_of(other_quiz.pk, 50))
+
+
+class PercentilesCommitTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.quiz = Quiz.objects.create(quiz_title='title 1', quiz_text='text 1')
+        self.student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+
+    def result(self, percentage):
+        return Result.objects.create(
+            percentage=percentage, user=self.student, quiz=self.quiz,
+            time_spent=timedelta(minutes=1))
+
+    def test_rolled_back_result_is_not_counted(self):
+        self.result(40)
+        percentiles.percentile_of(self.quiz.pk, 50)
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                self.result(10)
+                raise ValueError
+        self.assertEqual(percentiles.percentile_of(self.quiz.pk, 50), 100)
+
+    def test_histogram_cached_before_commit_is_dropped(self):
+        with transaction.atomic():
+            self.result(40)
+            percentiles.percentile_of(self.quiz.pk, 50)
+        self.assertIsNone(cache.get(percentiles._cache_key(self.quiz.pk)))
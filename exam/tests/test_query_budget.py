@@ -0,0 +1,131 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from dashboard.models import Quiz, Question, Choice, QuestionPool, PoolDraw
+from dashboard.pools import add_questions
+from quizproject.query_budget import QueryBudgetTestCase, seed_quizzes, seed_results
+
+
+class ExamQueryBudgetTest(QueryBudgetTestCase):
+    """
+    Query budgets of every exam url, with 20 quizzes of 50 questions and
+    200 results of the student
+    """
+    @classmethod
+    def setUpTestData(cls):
+        ### create student ###
+        cls.student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+
+        cls.quizzes = seed_quizzes(no_of_quizzes=20, no_of_questions=50)
+        cls.quiz = cls.quizzes[0]
+        Quiz.objects.filter(pk=cls.quizzes[1].pk).update(quiz_title='sample')
+        seed_results(cls.student, cls.quizzes, per_quiz=10)
+
+    def setUp(self):
+        self.client.force_login(self.student)
+
+    def start(self):
+        self.client.get(reverse('exam:exam_instruction', args=[self.quiz.pk]))
+
+    def test_exam_list(self):
+        self.assertQueryBudget(
+            'exam:exam_list', 3,
+            lambda: self.client.get(reverse('exam:exam_list')))
+
+    def test_exam_instruction(self):
+        self.assertQueryBudget(
+            'exam:exam_instruction', 9,
+            lambda: self.client.get(
+                reverse('exam:exam_instruction', args=[self.quiz.pk])))
+
+    def test_exam_instruction_drawn_from_pools(self):
+        # 1000 questions in two pools, the quiz draws 30 from each
+        quiz = Quiz.objects.get(pk=self.quizzes[2].pk)
+        for name, quizzes in (('A', self.quizzes[:10]), ('B', self.quizzes[10:])):
+            pool = QuestionPool.objects.create(name=name)
+            add_questions(pool, Question.objects.filter(quiz__in=quizzes))
+            PoolDraw.objects.create(quiz=quiz, pool=pool, no_of_questions=30)
+        # the blueprint, then the size of each pool and its drawn positions
+        self.assertQueryBudget(
+            'exam:exam_instruction drawn from pools', 13,
+            lambda: self.client.get(reverse('exam:exam_instruction', args=[quiz.pk])))
+
+    def test_sample_exam(self):
+        self.assertQueryBudget(
+            'exam:sample_exam', 9,
+            lambda: self.client.get(reverse('exam:sample_exam', args=['sample'])))
+
+    def test_exam_questions_list(self):
+        self.start()
+        self.assertQueryBudget(
+            'exam:exam_questions_list', 4,
+            lambda: self.client.get(
+                reverse('exam:exam_questions_list', args=[self.quiz.pk]), {'page': 25}))
+
+    def test_exam_questions_list_client_mode(self):
+        self.start()
+        self.assertQueryBudget(
+            'exam:exam_questions_list?mode=client', 1,
+            lambda: self.client.get(
+                reverse('exam:exam_questions_list', args=[self.quiz.pk]),
+                {'mode': 'client'}))
+
+    def test_exam_payload(self):
+        self.start()
+        self.assertQueryBudget(
+            'exam:exam_payload', 3,
+            lambda: self.client.get(reverse('exam:exam_payload', args=[self.quiz.pk])))
+
+    def test_exam_result_get(self):
+        self.assertQueryBudget(
+            'exam:exam_result GET', 1,
+            lambda: self.client.get(
+                reverse('exam:exam_result'), HTTP_X_REQUESTED_WITH='XMLHttpRequest'))
+
+    def test_exam_result_finish(self):
+        self.start()
+        right_choices = Choice.objects.filter(
+            question__quiz=self.quiz, mark='right').values_list('pk', flat=True)
+        answers = {
+            f'Question{i}': choice_pk
+            for i, choice_pk in enumerate(right_choices, start=1)
+        }
+        self.assertQueryBudget(
+            'exam:exam_result finish', 33,
+            lambda: self.client.post(
+                reverse('exam:exam_result'),
+                data={'finish': True, 'quiz_pk': self.quiz.pk, **answers}))
+
+    def test_exam_autosave(self):
+        self.start()
+        answers = {f'Question{i}': i for i in range(1, 51)}
+        self.assertQueryBudget(
+            'exam:exam_autosave', 4,
+            lambda: self.client.post(
+                reverse('exam:exam_autosave'),
+                data={'version': 1, 'answers': json.dumps(answers)}))
+
+    def test_leaderboard(self):
+        self.assertQueryBudget(
+            'exam:leaderboard', 6,
+            lambda: self.client.get(reverse('exam:leaderboard', args=[self.quiz.pk])))
+
+    def test_result_list(self):
+        self.assertQueryBudget(
+            'exam:result_list', 4,
+            lambda: self.client.get(reverse('exam:result_list')))
+
+    def test_result_list_deep_page(self):
+        last = self.student.results.order_by('date', 'pk').first()
+        cursor = f'{last.date.isoformat()}.{last.pk + 1}'
+        self.assertQueryBudget(
+            'exam:result_list?after', 4,
+            lambda: self.client.get(reverse('exam:result_list'), {'after': cursor}))
+
+    def test_result_list_json(self):
+        self.assertQueryBudget(
+            'exam:result_list?format=json', 4,
+            lambda: self.client.get(reverse('exam:result_list'), {'format': 'json'}))
@@ -27,6 +27,13 @@ class UrlTest(SimpleTestCase):
         self.assertEqual(resolve(url).func.view_class,
                          views.ExamQuestionsListView)
 
+    ### EXAM PAYLOAD VIEW ###
+    def test_exam_payload_url_resolves_to_exam_payload_view(self):
+        url = reverse('exam:exam_payload', args=[1])
+        self.assertURLEqual(url, '/exam/1/payload/')
+        self.assertEqual(resolve(url).func.view_class,
+                         views.ExamPayloadView)
+
     ### EXAM RESULT VIEW ###
     def test_exam_result_url_resolves_to_exam_result_view(self):
         url = reverse('exam:exam_result')
@@ -34,12 +41,12 @@ class UrlTest(SimpleTestCase):
         self.assertEqual(resolve(url).func.view_class,
                          views.ExamResultView)
 
-    ### EXAM TIMER VIEW ###
-    def test_exam_timer_url_resolves_to_exam_timer_view(self):
-        url = reverse('exam:timer')
-        self.assertURLEqual(url, '/exam/timer/')
+    ### EXAM AUTOSAVE VIEW ###
+    def test_exam_autosave_url_resolves_to_exam_autosave_view(self):
+        url = reverse('exam:exam_autosave')
+        self.assertURLEqual(url, '/exam/autosave/')
         self.assertEqual(resolve(url).func.view_class,
-                         views.ExamTimerView)
+                         views.ExamAutosaveView)
 
     ### SAMPLE EXAM VIEW ###
     def test_sample_exam_url_resolves_to_sample_exam_view(self):
@@ -53,3 +60,10 @@ class UrlTest(SimpleTestCase):
         self.assertURLEqual(url, '/exam/resultList/')
         self.assertEqual(resolve(url).func.view_class,
                          views.ExamResultListView)
+
+    ### LEADERBOARD VIEW ###
+    def test_leaderboard_url_resolves_to_leaderboard_view(self):
+        url = reverse('exam:leaderboard', args=[1])
+        self.assertURLEqual(url, '/exam/1/leaderboard/')
+        self.assertEqual(resolve(url).func.view_class,
+                         views.LeaderboardView)
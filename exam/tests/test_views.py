@@ -1,12 +1,15 @@
-from datetime import timedelta
+import json
+from datetime import date, timedelta
 
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.dateparse import parse_duration
 from django.contrib.messages import get_messages
 
 from dashboard import models
+from dashboard.pools import add_questions
 from exam import models as exam_models
 
 
@@ -98,6 +101,18 @@ class ExamInstructionsViewTest(TestCase):
     def test_returns_correct_template(self):
         self.assertTemplateUsed(self.response, 'exam/exam_instructions.html')
 
+    def test_starts_attempt(self):
+        attempt = exam_models.ExamAttempt.objects.get(
+            pk=self.client.session['attempt'])
+        self.assertEqual(attempt.quiz, self.quiz)
+        self.assertEqual(attempt.user, self.teacher)
+        # tokens are timestamped, so compare what they sign
+        self.assertEqual(
+            exam_models.ExamAttempt.pk_from_token(self.client.session['attempt-token']),
+            attempt.pk)
+        self.assertEqual(
+            self.client.session['attempt-deadline'], attempt.deadline_ms())
+
 
 class ExamQuestionsListViewTest(TestCase):
     """
@@ -154,12 +169,144 @@ class ExamQuestionsListViewTest(TestCase):
         self.assertEqual(self.response_after_instruct_page.context['quiz_pk'], self.quiz.pk)
         self.assertIn('questions', self.response_after_instruct_page.context)
 
+    def test_deadline_in_page(self):
+        self.assertContains(
+            self.response_after_instruct_page,
+            f'data-deadline="{self.client.session["attempt-deadline"]}"',
+        )
+        self.assertContains(
+            self.response_after_instruct_page, self.client.session['attempt-token'])
+
     def test_pagination(self):
         self.assertTrue(self.response_after_instruct_page.context['is_paginated'])
         self.assertEqual(
             self.response_after_instruct_page.context['paginator'].count, self.quiz.questions.count())
         self.assertEqual(self.response_after_instruct_page.context['paginator'].per_page, 1)
 
+    def test_pages_follow_attempt_order(self):
+        attempt = exam_models.ExamAttempt.objects.get(pk=self.client.session['attempt'])
+        for page in (1, 5, 10):
+            response = self.client.get(
+                reverse('exam:exam_questions_list', args=[self.quiz.pk]), {'page': page})
+            self.assertEqual(
+                response.context['questions'][0].pk, attempt.question_order[page - 1])
+
+    def test_order_stable_across_reloads(self):
+        url = reverse('exam:exam_questions_list', args=[self.quiz.pk])
+        first = self.client.get(url, {'page': 3}).context['questions'][0]
+        second = self.client.get(url, {'page': 3}).context['questions'][0]
+        self.assertEqual(first.pk, second.pk)
+
+    def test_attempt_of_other_quiz(self):
+        other_quiz = models.Quiz.objects.create(
+            quiz_title='title 2', quiz_text='text 2')
+        response = self.client.get(
+            reverse('exam:exam_questions_list', args=[other_quiz.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class ExamQuestionsClientModeTest(TestCase):
+    """
+    Test the client mode of the Exam Questions List View
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.client = Client()
+
+        ### create Quiz ###
+        cls.quiz = models.Quiz.objects.create(
+            quiz_title='title 1', quiz_text='text 1')
+
+        ### create 10 questions ###
+        for i in range(1, 11):
+            models.Question.objects.create(
+                question_text=f'question text {i}', quiz=cls.quiz)
+
+    def setUp(self):
+        self.client.get(
+            reverse('exam:exam_instruction', args=[self.quiz.pk]))
+        self.response = self.client.get(
+            reverse('exam:exam_questions_list', args=[self.quiz.pk]),
+            {'mode': 'client'},
+        )
+
+    def test_status_code(self):
+        self.assertEqual(self.response.status_code, 200)
+
+    def test_not_paginated(self):
+        self.assertTrue(self.response.context['client_mode'])
+        self.assertFalse(self.response.context['is_paginated'])
+
+    def test_links_payload(self):
+        self.assertContains(
+            self.response, reverse('exam:exam_payload', args=[self.quiz.pk]))
+
+
+class ExamPayloadViewTest(TestCase):
+    """
+    Test Exam Payload View
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.client = Client()
+
+        ### create Quiz ###
+        cls.quiz = models.Quiz.objects.create(
+            quiz_title='title 1', quiz_text='text 1', duration=timedelta(minutes=25))
+
+        ### create 10 questions with 4 choices each ###
+        for i in range(1, 11):
+            question = models.Question.objects.create(
+                question_text=f'question text {i:02}', quiz=cls.quiz)
+            for j in range(1, 5):
+                models.Choice.objects.create(
+                    choice_text=f'choice {j}', question=question)
+        models.Question.objects.create(
+            question_text='question text 11', quiz=cls.quiz)
+
+    def test_without_instructions_page(self):
+        response = self.client.get(
+            reverse('exam:exam_payload', args=[self.quiz.pk]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_404_for_wrong_pk(self):
+        self.client.get(
+            reverse('exam:exam_instruction', args=[self.quiz.pk]))
+        response = self.client.get(reverse('exam:exam_payload', args=[911]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_payload(self):
+        self.client.get(
+            reverse('exam:exam_instruction', args=[self.quiz.pk]))
+        with self.assertNumQueries(3):
+            # the session lookup plus the two payload queries
+            response = self.client.get(
+                reverse('exam:exam_payload', args=[self.quiz.pk]))
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload['duration'], 25 * 60)
+        self.assertEqual(payload['text'], 'text 1')
+        self.assertEqual(len(payload['questions']), 11)
+        # questions and choices come in the order of the attempt
+        attempt = exam_models.ExamAttempt.objects.get(pk=self.client.session['attempt'])
+        self.assertEqual(
+            [question['id'] for question in payload['questions']],
+            attempt.question_order,
+        )
+        for question in payload['questions']:
+            choices = [choice['id'] for choice in question['choices']]
+            self.assertEqual(
+                choices, attempt.shuffle_choices(question['id'], sorted(choices)))
+        empty = models.Question.objects.get(question_text='question text 11')
+        self.assertEqual(
+            payload['questions'][attempt.question_order.index(empty.pk)]['choices'], [])
+
+    def test_payload_stable_across_reloads(self):
+        self.client.get(
+            reverse('exam:exam_instruction', args=[self.quiz.pk]))
+        url = reverse('exam:exam_payload', args=[self.quiz.pk])
+        self.assertEqual(self.client.get(url).json(), self.client.get(url).json())
+
 
 class ExamResultViewTest(TestCase):
     """
@@ -253,6 +400,7 @@ class ExamResultViewTest(TestCase):
         self.assertEqual(response.context['percentage'], 0)
 
     def test_post_and_finish_with_correct_choices(self):
+        self.client.get(reverse('exam:exam_instruction', args=[self.quiz.pk]))
         response = self.client.post(
             reverse('exam:exam_result'),
             data={
@@ -261,7 +409,8 @@ class ExamResultViewTest(TestCase):
                 'quiz_pk': self.quiz.pk,
                 'Question1': models.Choice.objects.filter(mark='right').first().pk,
                 'Question2': models.Choice.objects.filter(mark='right').last().pk,
-                'Question3': models.Choice.objects.filter(mark='wrong').last().pk,
+                'Question3': models.Choice.objects.filter(
+                    mark='wrong', question__question_text='question text 5').last().pk,
             },
         )
         self.assertEqual(response.status_code, 200)
@@ -270,6 +419,19 @@ class ExamResultViewTest(TestCase):
         self.assertEqual(response.context['no_of_correct_choices_answered'], 2)
         self.assertEqual(response.context['no_of_questions_answered'], 3)
         self.assertEqual(response.context['percentage'], 20)
+        self.assertEqual(response.context['rank'], 1)
+        self.assertEqual(response.context['ranked'], 1)
+        self.assertContains(response, 'Your Rank: 1 of 1')
+        self.assertEqual(response.context['better_than'], 0)
+        self.assertContains(response, 'You scored better than 0% of takers')
+
+    def test_post_finish_with_repeated_answer(self):
+        right = models.Choice.objects.filter(mark='right').first().pk
+        data = {'finish': True, 'quiz_pk': self.quiz.pk}
+        data.update({f'Question{i}': right for i in range(1, 9)})
+        response = self.client.post(reverse('exam:exam_result'), data=data)
+        self.assertEqual(response.context['no_of_questions_answered'], 1)
+        self.assertEqual(response.context['percentage'], 10)
 
     def test_post_and_get(self):
         data={                
@@ -288,6 +450,121 @@ class ExamResultViewTest(TestCase):
                 'Question2': '2',
         })
 
+    def test_post_finish_time_spent_from_attempt(self):
+        self.client.get(reverse('exam:exam_instruction', args=[self.quiz.pk]))
+        attempt = exam_models.ExamAttempt.objects.get(
+            pk=self.client.session['attempt'])
+        attempt.started_at -= timedelta(minutes=2)
+        attempt.save()
+        response = self.client.post(
+            reverse('exam:exam_result'),
+            data={
+                'finish': True,
+                'quiz_pk': self.quiz.pk,
+                # a client supplied elapse is not trusted any more
+                'elapse': parse_duration('00:00:01'),
+                'attempt_token': attempt.token(),
+            },
+        )
+        self.assertGreaterEqual(response.context['time_spent'], timedelta(minutes=2))
+        self.assertLess(response.context['time_spent'], timedelta(minutes=3))
+        result = exam_models.Result.objects.get()
+        self.assertEqual(result.time_spent, response.context['time_spent'])
+        attempt.refresh_from_db()
+        self.assertIsNotNone(attempt.finished_at)
+
+    def test_post_finish_twice_records_one_result(self):
+        self.client.get(reverse('exam:exam_instruction', args=[self.quiz.pk]))
+        attempt = exam_models.ExamAttempt.objects.get(
+            pk=self.client.session['attempt'])
+        right = models.Choice.objects.filter(mark='right').first()
+        data = {
+            'finish': True,
+            'quiz_pk': self.quiz.pk,
+            'Question1': right.pk,
+            'attempt_token': attempt.token(),
+        }
+        self.client.post(reverse('exam:exam_result'), data=data)
+        # a browser resubmit replays the same token
+        response = self.client.post(reverse('exam:exam_result'), data=data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['percentage'], 10)
+        self.assertEqual(exam_models.Result.objects.count(), 1)
+        self.assertEqual(exam_models.Answer.objects.count(), 1)
+
+    def test_reload_keeps_attempt(self):
+        url = reverse('exam:exam_instruction', args=[self.quiz.pk])
+        self.client.get(url)
+        attempt_pk = self.client.session['attempt']
+        self.client.post(reverse('exam:exam_result'), {'Question1': 4})
+        self.client.get(url)
+        self.assertEqual(self.client.session['attempt'], attempt_pk)
+        self.assertEqual(self.client.session['Question1'], '4')
+        self.assertEqual(exam_models.ExamAttempt.objects.count(), 1)
+        # an expired attempt is not taken up again
+        exam_models.ExamAttempt.objects.update(deadline=timezone.now() - timedelta(hours=1))
+        self.client.get(url)
+        self.assertNotEqual(self.client.session['attempt'], attempt_pk)
+        self.assertNotIn('Question1', self.client.session)
+
+    def test_post_finish_after_deadline(self):
+        self.client.get(reverse('exam:exam_instruction', args=[self.quiz.pk]))
+        attempt = exam_models.ExamAttempt.objects.get(
+            pk=self.client.session['attempt'])
+        right = models.Choice.objects.filter(mark='right').first()
+        data = {
+            'finish': True,
+            'quiz_pk': self.quiz.pk,
+            'Question1': right.pk,
+            'attempt_token': attempt.token(),
+        }
+        # five hours after the deadline
+        attempt.started_at -= timedelta(hours=5)
+        attempt.deadline -= timedelta(hours=5)
+        attempt.save()
+        response = self.client.post(reverse('exam:exam_result'), data=data)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(exam_models.Result.objects.exists())
+        attempt.refresh_from_db()
+        self.assertIsNone(attempt.finished_at)
+
+        # within the grace period the finish is graded as usual
+        attempt.deadline = timezone.now() - exam_models.ExamAttempt.GRACE / 2
+        attempt.save()
+        response = self.client.post(reverse('exam:exam_result'), data=data)
+        self.assertEqual(response.context['percentage'], 10)
+
+    def test_post_finish_saves_answers(self):
+        self.client.get(reverse('exam:exam_instruction', args=[self.quiz.pk]))
+        right = models.Choice.objects.filter(mark='right').first()
+        wrong = models.Choice.objects.filter(mark='wrong').last()
+        self.client.post(
+            reverse('exam:exam_result'),
+            data={
+                'finish': True,
+                'quiz_pk': self.quiz.pk,
+                'Question1': right.pk,
+                'Question2': wrong.pk,
+            },
+        )
+        answers = exam_models.Answer.objects.order_by('choice_id')
+        self.assertEqual(
+            [(answer.question_id, answer.choice_id) for answer in answers],
+            [(right.question_id, right.pk), (wrong.question_id, wrong.pk)],
+        )
+        self.assertEqual(answers[0].attempt.quiz, self.quiz)
+
+    def test_post_finish_without_attempt(self):
+        response = self.client.post(
+            reverse('exam:exam_result'),
+            data={
+                'finish': True,
+                'quiz_pk': self.quiz.pk,
+                'attempt_token': 'tampered',
+            },
+        )
+        self.assertEqual(response.context['time_spent'], timedelta(0))
+
     def test_post_finish_not_authenticated(self):
         self.client.logout()
         response = self.client.post(
@@ -303,50 +580,91 @@ class ExamResultViewTest(TestCase):
         
 
 
-class ExamTimerViewTest(TestCase):
+class ExamAutosaveViewTest(TestCase):
     """
-    Test Exam Timer View
+    Test Exam Autosave View
     """
     @classmethod
     def setUpTestData(cls):
         cls.client = Client()
 
-        ### create teacher ###
-        cls.teacher = get_user_model().objects.create_user(
-            email='teacher@test.com', password='asdf7890',)
-        cls.teacher.teacher = True
-        cls.teacher.save()
-
         ### create Quiz ###
         cls.quiz = models.Quiz.objects.create(
-            quiz_title='title 1', quiz_text='text 1', duration=timedelta(minutes=25))
+            quiz_title='title 1', quiz_text='text 1')
 
     def setUp(self):
-        self.client.login(
-            email='teacher@test.com', password='asdf7890')
-        self.response = self.client.get(reverse('exam:timer'))
-
-    def test_not_ajax(self):
-        response = self.client.post(reverse('exam:timer'))
-        self.assertEqual(response.status_code, 404)
+        self.client.get(
+            reverse('exam:exam_instruction', args=[self.quiz.pk]))
 
-    def test_ajax_post_with_invalid_data(self):
-        response = self.client.post(
-            reverse('exam:timer'),
-            data={},
-            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+    def flush(self, version, answers):
+        return self.client.post(
+            reverse('exam:exam_autosave'),
+            data={'version': version, 'answers': json.dumps(answers)},
         )
+
+    def test_without_instructions_page(self):
+        self.client.logout()
+        response = self.flush(1, {'Question1': 4})
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_not_ajax(self):
+        response = self.client.get(reverse('exam:exam_autosave'))
         self.assertEqual(response.status_code, 404)
 
-    def test_ajax_post_with_valid_data(self):
-        response = self.client.post(
-            reverse('exam:timer'),
-            data={
-                'pk': self.quiz.pk,
-            },
-            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
-        )
+    def test_flush_applies_batch(self):
+        response = self.flush(10, {'Question1': 4, 'Question2': '7'})
         self.assertEqual(response.status_code, 200)
+        self.assertJSONEqual(response.content.decode(), {
+            'version': 10,
+            'stale': False,
+            'answers': {'Question1': '4', 'Question2': '7'},
+        })
+        # the saved answers are graded and served like single answers
+        response = self.client.get(
+            reverse('exam:exam_result'), HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertJSONEqual(response.content.decode(), {
+            'Question1': '4',
+            'Question2': '7',
+        })
+
+    def test_stale_flush_keeps_newer_answers(self):
+        self.flush(20, {'Question1': 4})
+        # answers the newer flush did not send are saved all the same
+        response = self.flush(15, {'Question1': 5, 'Question3': 6})
+        self.assertJSONEqual(response.content.decode(), {
+            'version': 20,
+            'stale': True,
+            'answers': {'Question1': '4', 'Question3': '6'},
+        })
+        response = self.flush(25, {'Question3': 7})
+        self.assertJSONEqual(response.content.decode(), {
+            'version': 25,
+            'stale': False,
+            'answers': {'Question1': '4', 'Question3': '7'},
+        })
+
+    def test_flush_after_deadline(self):
+        session = self.client.session
+        session['attempt-deadline'] -= 60 * 60 * 1000
+        session.save()
+        response = self.flush(1, {'Question1': 4})
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn('Question1', self.client.session)
+
+    def test_ignores_unknown_keys(self):
+        self.flush(1, {'Question1': 4, 'start-quiz': 'x', 'Question2': 'x'})
+        response = self.client.get(
+            reverse('exam:exam_autosave'), HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json()['answers'], {'Question1': '4'})
+        self.assertEqual(response.json()['version'], 1)
+
+    def test_bad_batch(self):
+        response = self.client.post(
+            reverse('exam:exam_autosave'), data={'version': 'x'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            reverse('exam:exam_autosave'), data={'version': 1, 'answers': '[1]'})
+        self.assertEqual(response.status_code, 400)
 
 
 class ExamResultListViewTest(TestCase):
@@ -401,6 +719,133 @@ class ExamResultListViewTest(TestCase):
         self.assertCountEqual(
             self.response.context['results'], self.response.context['user'].results.all())
 
+    def test_keyset_pages(self):
+        exam_models.Result.objects.bulk_create(
+            exam_models.Result(
+                percentage=i, time_spent=timedelta(minutes=1),
+                date=date(2020, 1, 1) + timedelta(days=i % 7),
+                user=self.student, quiz=self.quiz)
+            for i in range(60)
+        )
+        seen = []
+        cursor = None
+        while True:
+            params = {'after': cursor} if cursor else {}
+            with self.assertNumQueries(4):
+                # session, user and one page each of results and archived
+                # results with their quizzes
+                response = self.client.get(reverse('exam:result_list'), params)
+            seen.extend(result.pk for result in response.context['results'])
+            cursor = response.context['next_cursor']
+            if cursor is None:
+                break
+        expected = exam_models.Result.objects.filter(
+            user=self.student).order_by('-date', '-pk').values_list('pk', flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_json_variant(self):
+        response = self.client.get(reverse('exam:result_list'), {'format': 'json'})
+        data = response.json()
+        self.assertIsNone(data['next'])
+        self.assertEqual(len(data['results']), 4)
+        self.assertEqual(data['results'][0]['quiz'], 'title 1')
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('exam:result_list'), {'after': 'junk'})
+        self.assertEqual(response.status_code, 404)
+
+
 
 
 
+
+class BlueprintExamTest(TestCase):
+    """
+    Test a quiz whose attempts draw their questions from pools
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+
+        ### a bank of 30 questions in another quiz, in pools A and B ###
+        bank = models.Quiz.objects.create(quiz_title='bank', quiz_text='bank')
+        for i in range(30):
+            question = models.Question.objects.create(
+                question_text=f'question text {i}', quiz=bank)
+            models.Choice.objects.create(
+                choice_text='right', mark='right', question=question)
+            models.Choice.objects.create(
+                choice_text='wrong', mark='wrong', question=question)
+        questions = models.Question.objects.filter(quiz=bank).order_by('pk')
+        cls.pool_a = models.QuestionPool.objects.create(name='A')
+        cls.pool_b = models.QuestionPool.objects.create(name='B')
+        add_questions(cls.pool_a, questions.filter(pk__lt=questions[20].pk))
+        add_questions(cls.pool_b, questions.filter(pk__gte=questions[20].pk))
+
+        ### the quiz draws 5 from A and 3 from B ###
+        cls.quiz = models.Quiz.objects.create(
+            quiz_title='drawn', quiz_text='drawn quiz')
+        models.Question.objects.create(question_text='own question', quiz=cls.quiz)
+        models.PoolDraw.objects.create(quiz=cls.quiz, pool=cls.pool_a, no_of_questions=5)
+        models.PoolDraw.objects.create(quiz=cls.quiz, pool=cls.pool_b, no_of_questions=3)
+
+    def setUp(self):
+        self.client.login(email='student@test.com', password='asdf7890')
+
+    def start(self):
+        response = self.client.get(reverse('exam:exam_instruction', args=[self.quiz.pk]))
+        attempt = exam_models.ExamAttempt.objects.get(pk=self.client.session['attempt'])
+        return response, attempt
+
+    def test_attempt_draws_from_pools(self):
+        response, attempt = self.start()
+        self.assertTrue(attempt.drawn)
+        self.assertEqual(response.context['question_count'], 8)
+        self.assertEqual(len(set(attempt.question_order)), 8)
+        pools = models.PoolMembership.objects.filter(question__in=attempt.question_order)
+        self.assertEqual(pools.filter(pool=self.pool_a).count(), 5)
+        self.assertEqual(pools.filter(pool=self.pool_b).count(), 3)
+        # new attempts draw again
+        orders = set()
+        for _ in range(5):
+            exam_models.ExamAttempt.objects.update(finished_at=timezone.now())
+            orders.add(tuple(sorted(self.start()[1].question_order)))
+        self.assertGreater(len(orders), 1)
+
+    def test_exam_list_counts_drawn_questions(self):
+        response = self.client.get(reverse('exam:exam_list'))
+        self.assertContains(response, '8 questions')
+
+    def test_payload_and_pages_show_drawn_questions(self):
+        _, attempt = self.start()
+        payload = self.client.get(reverse('exam:exam_payload', args=[self.quiz.pk])).json()
+        self.assertEqual(
+            [question['id'] for question in payload['questions']], attempt.question_order)
+        response = self.client.get(
+            reverse('exam:exam_questions_list', args=[self.quiz.pk]), {'page': 8})
+        self.assertEqual(response.context['questions'][0].pk, attempt.question_order[7])
+
+    def test_grading_touches_drawn_questions_only(self):
+        _, attempt = self.start()
+        right = models.Choice.objects.filter(
+            question__in=attempt.question_order[:4], mark='right')
+        other = models.Choice.objects.filter(mark='right').exclude(
+            question__in=attempt.question_order).first()
+        data = {
+            'finish': True,
+            'quiz_pk': self.quiz.pk,
+            'attempt_token': attempt.token(),
+            # an answer to a question that was not drawn does not count
+            'Question9': other.pk,
+        }
+        for i, choice in enumerate(right, 1):
+            data[f'Question{i}'] = choice.pk
+        response = self.client.post(reverse('exam:exam_result'), data)
+        self.assertEqual(response.context['no_of_questions'], 8)
+        self.assertEqual(response.context['no_of_questions_answered'], 4)
+        self.assertEqual(response.context['percentage'], 50)
+        self.assertEqual(len(response.context['corrections']), 8)
+        result = exam_models.Result.objects.get()
+        self.assertEqual((result.quiz, result.no_of_questions), (self.quiz, 8))
+        self.assertEqual(attempt.answers.count(), 4)
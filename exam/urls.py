@@ -13,10 +13,14 @@ urlpatterns = [
          name='sample_exam'),
     path('<int:pk>/', views.ExamQuestionsListView.as_view(),
          name='exam_questions_list'),
+    path('<int:pk>/payload/', views.ExamPayloadView.as_view(),
+         name='exam_payload'),
+    path('<int:pk>/leaderboard/', views.LeaderboardView.as_view(),
+         name='leaderboard'),
     path('result/', views.ExamResultView.as_view(),
          name='exam_result'),
-    path('timer/', views.ExamTimerView.as_view(),
-         name='timer'),
+    path('autosave/', views.ExamAutosaveView.as_view(),
+         name='exam_autosave'),
     path('resultList/', views.ExamResultListView.as_view(),
          name='result_list'),
 ]
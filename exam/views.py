@@ -1,13 +1,23 @@
+import json
+import re
+from datetime import timedelta
+
 from django.shortcuts import render, redirect, reverse, get_object_or_404
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views import generic, View
-from django.http import JsonResponse, HttpResponse, Http404, HttpResponseNotFound
+from django.http import (
+    JsonResponse, Http404, HttpResponseNotFound, HttpResponseBadRequest)
 from django.utils import timezone
 from django.core.exceptions import PermissionDenied
-from django.utils.dateparse import parse_duration
+from django.db.models import Count, OuterRef, Subquery, Sum
 
-from dashboard.models import Quiz, Choice, Question
-from .models import Result
+from dashboard.models import Quiz, Question, PoolDraw
+from .models import ExamAttempt
+from .grading import grade, record_result
+from .payload import build_exam_payload
+from .ordering import AttemptQuestions
+from .pagination import keyset_page
+from . import leaderboard, percentiles
 
 
 def clearSessionWithoutLoggingOut(request):
@@ -17,8 +27,34 @@ def clearSessionWithoutLoggingOut(request):
             del request.session[key]
     return
 
+
+ANSWER_KEY = re.compile(r'^Question\d+$')
+
+
+def sessionAttempt(request, quiz_pk):
+    """returns the attempt of the session on the given quiz, or raises 404"""
+    return get_object_or_404(
+        ExamAttempt.objects.select_related('quiz'),
+        pk=request.session.get('attempt'),
+        quiz_id=quiz_pk,
+    )
+
+
+def sessionAnswers(request):
+    """returns the QuestionN answers saved in the session"""
+    return {
+        key: value for key, value in request.session.items()
+        if "Question" in key
+    }
+
+
 class ExamListView(LoginRequiredMixin, generic.ListView):
-    model = Quiz
+    queryset = Quiz.objects.annotate(
+        question_count=Count('questions'),
+        # the questions an attempt draws, for quizzes with a blueprint
+        drawn_count=Subquery(PoolDraw.objects.filter(quiz=OuterRef('pk')).values(
+            'quiz').annotate(total=Sum('no_of_questions')).values('total')),
+    )
     template_name = "exam/exam_list.html"
     context_object_name = 'exams'
 
@@ -29,13 +65,28 @@ class ExamListView(LoginRequiredMixin, generic.ListView):
 
 class ExamInstructionsView(View):
     def get(self, request, *args, **kwargs):
-        clearSessionWithoutLoggingOut(request)
-        request.session['start-quiz'] = True
         if kwargs.get('sample'):
             exam = get_object_or_404(Quiz, quiz_title='sample')            
         else:
             exam = get_object_or_404(Quiz, pk=kwargs['pk'])
-        return render(request, 'exam/exam_instructions.html', {'exam': exam})
+        # a reload goes on with the unfinished attempt of the session,
+        # keeping its answers
+        attempt = None
+        if request.session.get('attempt'):
+            attempt = ExamAttempt.objects.filter(
+                pk=request.session['attempt'], quiz=exam, finished_at=None).first()
+        if attempt is None or attempt.is_over():
+            clearSessionWithoutLoggingOut(request)
+            user = request.user if request.user.is_authenticated else None
+            attempt = ExamAttempt.start(exam, user)
+        request.session['start-quiz'] = True
+        request.session['attempt'] = attempt.pk
+        request.session['attempt-token'] = attempt.token()
+        request.session['attempt-deadline'] = attempt.deadline_ms()
+        return render(request, 'exam/exam_instructions.html', {
+            'exam': exam,
+            'question_count': len(attempt.question_order),
+        })
 
 
 class ExamQuestionsListView(UserPassesTestMixin, generic.ListView):
@@ -49,87 +100,223 @@ class ExamQuestionsListView(UserPassesTestMixin, generic.ListView):
             raise PermissionDenied
         return True
 
+    def client_mode(self):
+        """the client mode renders every question from the exam payload"""
+        return self.request.GET.get('mode') == 'client'
+
+    def get_paginate_by(self, queryset):
+        if self.client_mode():
+            return None
+        return self.paginate_by
+
     def get_queryset(self):
-        queryset = Quiz.objects.get(
-            pk=self.kwargs['pk']).questions.all().order_by('question_text')
-        return queryset
+        if self.client_mode():
+            return Question.objects.none()
+        return AttemptQuestions(sessionAttempt(self.request, self.kwargs['pk']))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['quiz_pk'] = self.kwargs['pk']
+        context['client_mode'] = self.client_mode()
+        # the timer counts down to the deadline without asking the server
+        context['attempt_token'] = self.request.session.get('attempt-token', '')
+        context['deadline'] = self.request.session.get('attempt-deadline', 0)
         return context
 
+
+class ExamPayloadView(UserPassesTestMixin, View):
+    def test_func(self):
+        if self.request.session.get('start-quiz') != True:
+            clearSessionWithoutLoggingOut(self.request)
+            raise PermissionDenied
+        return True
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(
+            build_exam_payload(sessionAttempt(request, kwargs['pk'])),
+            json_dumps_params={'separators': (',', ':')},
+        )
+
+
 class ExamResultView(View):
     def get(self, request):
-        data = {}
-        for key, value in request.session.items():
-            if "Question" in key:
-                data[key] = value
+        data = sessionAnswers(request)
         if not request.is_ajax():
             raise Http404
         return JsonResponse(data)
 
+    def attempt_of(self, request, quiz_pk=None):
+        """
+        returns the attempt being answered, found from the signed token of
+        the exam page or else the session
+        """
+        attempt_pk = ExamAttempt.pk_from_token(request.POST.get('attempt_token'))
+        if attempt_pk is None:
+            attempt_pk = request.session.get('attempt')
+        if attempt_pk is None:
+            return None
+        attempts = ExamAttempt.objects.filter(pk=attempt_pk)
+        if quiz_pk is not None:
+            attempts = attempts.filter(quiz_id=quiz_pk)
+        return attempts.first()
+
+    def finish_attempt(self, attempt):
+        """
+        records when the attempt finished, with a conditional update so
+        only one finish of an attempt claims it. Returns whether this one
+        did; a resubmitted or replayed finish does not.
+        """
+        if attempt is None:
+            return False
+        now = timezone.now()
+        claimed = ExamAttempt.objects.filter(
+            pk=attempt.pk, finished_at=None).update(finished_at=now)
+        if claimed:
+            attempt.finished_at = now
+        return bool(claimed)
+
     def post(self, request):
+        quiz_pk = request.POST.get('quiz_pk')
+        attempt = self.attempt_of(request, quiz_pk)
+        # only answers sent before the deadline are saved and graded
+        if attempt is not None and attempt.is_over():
+            raise PermissionDenied('The time for this exam is over')
         for key, value in request.POST.items():
             request.session[key] = value
         if not request.POST.get('finish'):
             return self.get(request)
-        correct_choices = Choice.objects.filter(
-            question__quiz__pk=request.POST.get('quiz_pk')).filter(mark='right')
-        result = {
-            'no_of_questions': Quiz.objects.get(pk=request.POST.get('quiz_pk')).questions.count(),
-            'no_of_correct_choices_answered': 0,
-            'no_of_questions_answered': 0,
-            'pk':request.POST.get('quiz_pk'),
-        }
-        corrections = {}
-        corrections_list = []
-        for correct_choice in correct_choices:
-            corrections[correct_choice.question.pk] = {
-                'question': correct_choice.question.question_text,
-                'correct_choice': correct_choice.choice_text,
-                'your_choice': 'You Did not Answer This Question',
-            }
-        for question_id, your_choice_id in request.session.items():
-            if 'Question' in question_id:
-                result['no_of_questions_answered'] += 1
-                your_choice = Choice.objects.get(
-                    pk=your_choice_id)
-                corrections[your_choice.question.pk]['your_choice'] = your_choice.choice_text
-                if your_choice in correct_choices:
-                    result['no_of_correct_choices_answered'] += 1
-        for _, value in corrections.items():
-            corrections_list.append(value)
-        result['corrections'] = corrections_list
-        result['percentage'] = int(result['no_of_correct_choices_answered'] /
-                                        result['no_of_questions'] * 100)
-        result['time_spent'] = request.POST.get('elapse')
+        answers = sessionAnswers(request).values()
+        claimed = self.finish_attempt(attempt)
+        # an attempt drawn from pools is graded on its drawn questions only
+        question_pks = attempt.question_order if attempt and attempt.drawn else None
+        result = grade(quiz_pk, answers, question_pks)
+        result['pk'] = quiz_pk
+        result['time_spent'] = (
+            attempt.time_spent(attempt.finished_at) if attempt else timedelta(0))
         clearSessionWithoutLoggingOut(request)
         if request.user.is_authenticated:
-            Result.objects.create(
-                percentage= result['percentage'],
-                user = request.user,
-                time_spent = parse_duration(result['time_spent']),
-                no_of_questions_answered = result['no_of_questions_answered'],
-                no_of_correct_choices_answered = result['no_of_correct_choices_answered'],
-                no_of_questions = result['no_of_questions'],
-                quiz = Quiz.objects.get(pk=request.POST.get('quiz_pk')),
-            )
+            # a result is recorded once, by the finish that claimed the attempt
+            if claimed:
+                record_result(request.user, result['pk'], result, attempt)
+            result['rank'], result['ranked'] = leaderboard.rank_of(
+                result['pk'], request.user.pk)
+            result['better_than'] = percentiles.percentile_of(
+                result['pk'], result['percentage'])
         return render(request, 'exam/result_sheet.html', result)
-        
-class ExamTimerView(View):
-    def post(self, request):
+
+
+class ExamAutosaveView(UserPassesTestMixin, View):
+    """
+    saves a batch of answers buffered by the exam page.
+
+    The client sends every answer chosen since its last flush together
+    with a version that only grows (the time of the flush), so the
+    session is written once per batch instead of once per click. Each
+    answer keeps the version of the flush that saved it: a flush that
+    arrives after a newer one still saves its other answers, and only
+    the answers the newer flush chose are kept.
+    """
+
+    def test_func(self):
+        if self.request.session.get('start-quiz') != True:
+            clearSessionWithoutLoggingOut(self.request)
+            raise PermissionDenied
+        return True
+
+    def state(self, request, **extra):
+        return JsonResponse({
+            'version': request.session.get('answers-version', 0),
+            'answers': sessionAnswers(request),
+            **extra
+        })
+
+    def get(self, request):
         if not request.is_ajax():
             raise Http404
-        exam_duration = get_object_or_404(
-            Quiz, pk=request.POST.get('pk')).duration
-        return HttpResponse(str(exam_duration))
+        return self.state(request)
+
+    def post(self, request):
+        # the deadline of the attempt is kept in the session
+        deadline = request.session.get('attempt-deadline')
+        grace = ExamAttempt.GRACE.total_seconds() * 1000
+        if deadline and timezone.now().timestamp() * 1000 > deadline + grace:
+            raise PermissionDenied('The time for this exam is over')
+        try:
+            version = int(request.POST.get('version'))
+            answers = json.loads(request.POST.get('answers', '{}'))
+        except (TypeError, ValueError):
+            return HttpResponseBadRequest()
+        if not isinstance(answers, dict):
+            return HttpResponseBadRequest()
+        versions = request.session.get('answers-versions', {})
+        stale = False
+        for key, value in answers.items():
+            if not (ANSWER_KEY.match(key) and str(value).isdigit()):
+                continue
+            if version <= versions.get(key, 0):
+                stale = True
+                continue
+            request.session[key] = str(value)
+            versions[key] = version
+        request.session['answers-versions'] = versions
+        request.session['answers-version'] = max(
+            version, request.session.get('answers-version', 0))
+        return self.state(request, stale=stale)
+
+
+class LeaderboardView(LoginRequiredMixin, generic.DetailView):
+    queryset = Quiz.objects.only('pk', 'quiz_title')
+    template_name = 'exam/leaderboard.html'
+    context_object_name = 'quiz'
+    size = 10
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['entries'] = leaderboard.top(self.object.pk, self.size)
+        context['rank'], context['ranked'] = leaderboard.rank_of(
+            self.object.pk, self.request.user.pk)
+        return context
+
 
 class ExamResultListView(LoginRequiredMixin, generic.ListView):
     template_name = 'exam/result_list.html'
     context_object_name = 'results'
+    paginate_by = 25
 
     def get_queryset(self):
-        queryset = self.request.user.results.all().order_by('-date')
-        return queryset
+        return self.request.user.results.select_related('quiz')
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        pages by (date, id) from the `after` cursor instead of by offset,
+        through the archived results as well
+        """
+        archived = self.request.user.archived_results.select_related('quiz')
+        results, self.next_cursor = keyset_page(
+            [queryset, archived], self.request.GET.get('after'), page_size)
+        return None, None, results, self.next_cursor is not None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.next_cursor
+        return context
 
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.GET.get('format') != 'json':
+            return super().render_to_response(context, **response_kwargs)
+        return JsonResponse({
+            'results': [
+                {
+                    'id': result.pk,
+                    'date': result.date,
+                    'quiz': result.quiz.quiz_title,
+                    'percentage': result.percentage,
+                    'time_spent': str(result.time_spent),
+                    'no_of_questions': result.no_of_questions,
+                    'no_of_correct_choices_answered': result.no_of_correct_choices_answered,
+                    'no_of_questions_answered': result.no_of_questions_answered,
+                }
+                for result in context['results']
+            ],
+            'next': self.next_cursor,
+        })
@@ -0,0 +1,125 @@
+"""
+Query budget harness for view tests.
+
+`QueryBudgetTestCase.assertQueryBudget` makes a request and fails when it
+runs more queries, or takes longer, than its budget. Every measurement of
+a test run is written as JSON to the file named by the QUERY_BUDGET_REPORT
+environment variable, keyed by test class and url name, so reports can be
+diffed across releases:
+
+    QUERY_BUDGET_REPORT=budget.json python manage.py test
+"""
+import json
+import os
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from dashboard.models import Quiz, Question, Choice
+from dashboard.duplicates import index_bands
+from dashboard.search import index_quizzes, index_questions, index_choices
+from exam.models import Result
+
+
+DEFAULT_MAX_MS = 500
+
+
+def seed_quizzes(no_of_quizzes=20, no_of_questions=50, no_of_choices=4):
+    """creates quizzes with questions and one right choice per question"""
+    Quiz.objects.bulk_create(
+        Quiz(quiz_title=f'quiz {i}', quiz_text=f'quiz text {i}')
+        for i in range(no_of_quizzes)
+    )
+    quizzes = list(Quiz.objects.order_by('-pk')[:no_of_quizzes])
+    Question.objects.bulk_create(
+        Question(question_text=f'question {i}', quiz=quiz)
+        for quiz in quizzes
+        for i in range(no_of_questions)
+    )
+    question_pks = Question.objects.filter(
+        quiz__in=quizzes).values_list('pk', flat=True)
+    Choice.objects.bulk_create(
+        Choice(
+            choice_text=f'choice {i}',
+            mark='right' if i == 0 else 'wrong',
+            question_id=question_pk,
+        )
+        for question_pk in question_pks
+        for i in range(no_of_choices)
+    )
+    # the search entries and buckets the signals would have saved
+    index_quizzes(Quiz.objects.filter(pk__in=[quiz.pk for quiz in quizzes]))
+    index_questions(Question.objects.filter(quiz__in=quizzes))
+    index_choices(Choice.objects.filter(question__quiz__in=quizzes))
+    index_bands(Question.objects.filter(quiz__in=quizzes))
+    return quizzes
+
+
+def seed_results(user, quizzes, per_quiz=10):
+    """creates `per_quiz` results of `user` for every quiz"""
+    Result.objects.bulk_create(
+        Result(
+            percentage=(i * 7) % 101,
+            user=user,
+            time_spent=timedelta(minutes=i % 30),
+            no_of_questions=50,
+            quiz=quiz,
+        )
+        for quiz in quizzes
+        for i in range(per_quiz)
+    )
+
+
+def write_report(name, measurements, path=None):
+    """merges the measurements of one test class into the report file"""
+    path = path or os.environ.get('QUERY_BUDGET_REPORT')
+    if not path or not measurements:
+        return
+    report = {}
+    if os.path.exists(path):
+        with open(path) as report_file:
+            report = json.load(report_file)
+    report[name] = measurements
+    with open(path, 'w') as report_file:
+        json.dump(report, report_file, indent=2, sort_keys=True)
+        report_file.write('\n')
+
+
+class QueryBudgetTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.measurements = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        write_report(f'{cls.__module__}.{cls.__qualname__}', cls.measurements)
+        super().tearDownClass()
+
+    def assertQueryBudget(self, name, max_queries, request,
+                          max_ms=DEFAULT_MAX_MS, status_code=200):
+        """
+        calls `request`, a function returning a response, and checks its
+        status code, number of queries and wall-clock time in milliseconds.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = request()
+            ms = (time.perf_counter() - start) * 1000
+        self.measurements[name] = {
+            'queries': len(queries),
+            'max_queries': max_queries,
+            'ms': round(ms, 2),
+            'max_ms': max_ms,
+        }
+        self.assertEqual(response.status_code, status_code)
+        self.assertLessEqual(
+            len(queries), max_queries,
+            '\n'.join([f'{name} ran {len(queries)} queries:'] +
+                      [query['sql'] for query in queries.captured_queries]),
+        )
+        self.assertLessEqual(ms, max_ms, f'{name} took {ms:.0f}ms')
+        return response
@@ -0,0 +1,33 @@
+"""
+versioned cache keys.
+
+A cached value is saved under a key that includes a version counter,
+itself kept in the cache. Bumping the counter makes every value cached
+under the old version unreachable, so they need no explicit deletion and
+expire on their own. Counters start from the clock, so a counter evicted
+from the cache never comes back with a version already used.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def get_version(key):
+    """returns the current version kept under `key`, starting one if needed"""
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """moves the version kept under `key` on, so older values are not read"""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _new_version(), None)
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from quizproject.query_budget import QueryBudgetTestCase
+
+
+class UsersQueryBudgetTest(QueryBudgetTestCase):
+    """
+    Query budgets of every users url
+    """
+    @classmethod
+    def setUpTestData(cls):
+        ### create student ###
+        cls.student = get_user_model().objects.create_user(
+            email='student@test.com', password='asdf7890')
+
+    def test_home(self):
+        self.assertQueryBudget(
+            'users:home', 0, lambda: self.client.get(reverse('users:home')))
+
+    def test_home_logged_in(self):
+        self.client.force_login(self.student)
+        self.assertQueryBudget(
+            'users:home logged in', 2,
+            lambda: self.client.get(reverse('users:home')), status_code=302)
+
+    def test_login(self):
+        self.assertQueryBudget(
+            'users:login', 0, lambda: self.client.get(reverse('users:login')))
+
+    def test_login_post(self):
+        # password hashing dominates the time of a login
+        self.assertQueryBudget(
+            'users:login POST', 9,
+            lambda: self.client.post(
+                reverse('users:login'),
+                data={'username': 'student@test.com', 'password': 'asdf7890'}),
+            max_ms=2000, status_code=302)
+
+    def test_logout(self):
+        self.client.force_login(self.student)
+        self.assertQueryBudget(
+            'users:logout', 4,
+            lambda: self.client.get(reverse('users:logout')), status_code=302)
+
+    def test_register(self):
+        self.assertQueryBudget(
+            'users:register', 0, lambda: self.client.get(reverse('users:register')))
+
+    def test_register_post(self):
+        self.assertQueryBudget(
+            'users:register POST', 10,
+            lambda: self.client.post(
+                reverse('users:register'),
+                data={
+                    'email': 'new@test.com',
+                    'password1': 'kjhg7890poiu',
+                    'password2': 'kjhg7890poiu',
+                }),
+            max_ms=2000, status_code=302)